@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from src.browser_manager import BaseBrowserManager, EXTRA_HTTP_HEADERS, STEALTH_INIT_SCRIPT
+from src.performance_monitor import monitor_operation
+
+logger = logging.getLogger(__name__)
+
+class AsyncBrowserManager(BaseBrowserManager):
+    """
+    asyncio-native browser manager built on playwright.async_api.
+    
+    Uses the same profiles, session files and browser settings as BrowserManager,
+    but many pages can be in flight on one event loop. Since pages run concurrently,
+    contexts are passed around explicitly instead of being tracked in self.context.
+    
+    If the browser crashes, recover_browser relaunches it once for all the pages that
+    were in flight on it; a browser that is still connected is never relaunched, since
+    that would fail the other accounts' pages.
+    """
+    
+    # Seconds to wait for a context to close before leaving it to the browser
+    CLOSE_TIMEOUT = 10
+    
+    def __init__(self):
+        super().__init__()
+        # Serializes relaunches between the coroutines whose pages failed together
+        self._relaunch_lock = asyncio.Lock()
+    
+    @monitor_operation("browser_launch")
+    async def launch_browser(self) -> Browser:
+        """Launch browser with optimized settings."""
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        
+        self.browser = await self.playwright.chromium.launch(
+            headless=True,
+            args=self.get_optimized_browser_args()
+        )
+        
+        logger.info("Browser launched with optimized settings (async engine)")
+        return self.browser
+    
+    async def create_context(self, profile_name: str = "default", session_name: str = None) -> BrowserContext:
+        """Create a browser context with optimized settings and optional session restoration."""
+        context_options = self.prepare_context(profile_name, session_name)
+        
+        context = await self.browser.new_context(**context_options)
+        
+        # Set additional properties to avoid detection
+        await context.add_init_script(STEALTH_INIT_SCRIPT)
+        
+        # Abort requests we never read
+        if self.resource_policy.enabled:
+            await context.route("**/*", self._route_request)
+        
+        return context
+    
+    async def _route_request(self, route):
+        """Route handler applying the resource policy."""
+        if self.should_block_request(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def create_page(self, profile_name: str = "default", session_name: str = None) -> Page:
+        """Create a page in a fresh context with session management."""
+        if not self.browser:
+            await self.launch_browser()
+        
+        context = await self.create_context(profile_name, session_name)
+        page = await context.new_page()
+        
+        # Set additional page properties
+        await page.set_extra_http_headers(EXTRA_HTTP_HEADERS)
+        
+        return page
+    
+    async def recover_browser(self, failed_browser: Browser) -> bool:
+        """
+        Relaunch the browser if failed_browser (the one a page failed on) crashed.
+        Returns True if a fresh browser is now running, relaunched by this or a concurrent call.
+        """
+        async with self._relaunch_lock:
+            if self.browser is not failed_browser:
+                return self.browser is not None
+            if failed_browser is None or failed_browser.is_connected():
+                return False
+            logger.warning("Browser crashed, relaunching it (async engine)")
+            try:
+                await failed_browser.close()
+            except Exception as e:
+                logger.debug(f"Closing the crashed browser failed: {e}")
+            self.browser = None
+            await self.launch_browser()
+            self.performance_monitor.increment_counter("browser_relaunches")
+            return True
+    
+    async def close_context(self, context: BrowserContext):
+        """Close a page's context, giving up after CLOSE_TIMEOUT seconds on a hung browser."""
+        try:
+            await asyncio.wait_for(context.close(), timeout=self.CLOSE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed to close browser context: {e}")
+    
+    async def save_context_session(self, context: BrowserContext, session_name: str):
+        """Save the session of the given context."""
+        try:
+            self.save_session(session_name, await context.storage_state())
+        except Exception as e:
+            logger.error(f"Failed to save session: {e}")
+    
+    async def close(self, log_summary: bool = True):
+        """Close browser and cleanup resources."""
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.save_sessions()
+        
+        # Log performance summary
+        if log_summary:
+            self.performance_monitor.log_performance_summary()
+        
+        logger.info("Async browser manager closed")
@@ -0,0 +1,216 @@
+"""
+Long-lived Chromium that scraper runs attach to over CDP (BROWSER_DAEMON=1).
+
+Cold-launching Chromium costs seconds per run. In daemon mode, Chromium runs detached with
+a remote debugging port, and BrowserManager connects to it with connect_over_cdp, which
+takes milliseconds. The daemon is described by browser_daemon.json in the cache directory
+(pid, port, start time). ensure_browser_daemon checks it and replaces it when it does not
+answer /json/version or is older than BROWSER_DAEMON_MAX_AGE_HOURS.
+
+Workers connected to the daemon hold a shared lock on browser_daemon.attached
+(attach_browser_daemon). A stale daemon is only replaced while no worker holds it, so a
+run never kills the browser under another one; a daemon that stopped answering is
+replaced regardless.
+
+Fly machines are stopped between runs, which ends the daemon too. Run the supervisor as
+the machine's process so Chromium starts during machine warm-up and is restarted if it dies:
+
+    python -m src.browser_daemon
+"""
+import fcntl
+import json
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Optional, Tuple
+import requests
+from src.config import BROWSER_DAEMON_PORT, BROWSER_DAEMON_MAX_AGE_HOURS
+from src.utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a freshly started daemon to answer health checks
+START_TIMEOUT = 15
+HEALTH_CHECK_TIMEOUT = 2
+# Seconds between health checks in the supervisor
+SUPERVISE_INTERVAL = 30
+
+# Serializes daemon checks and restarts between the threads of one process;
+# the state file lock does the same between processes
+_lock = threading.Lock()
+
+def state_path() -> Path:
+    return get_cache_dir() / "browser_daemon.json"
+
+def attach_lock_path() -> Path:
+    return state_path().with_suffix(".attached")
+
+def endpoint_url(port: int) -> str:
+    return f"http://127.0.0.1:{port}"
+
+def boot_id() -> Optional[str]:
+    """Identifier of the current boot; the state file outlives machine restarts on the volume."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def read_state() -> Optional[dict]:
+    """
+    The recorded daemon ({"pid", "port", "started_at", "boot_id"}), or None.
+    A daemon recorded before the last restart is gone, and its pid may now belong to another process.
+    """
+    try:
+        with open(state_path(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or "pid" not in state or "port" not in state:
+        return None
+    return state if state.get("boot_id") == boot_id() else None
+
+def is_healthy(port: int) -> bool:
+    """True if a browser answers the DevTools version endpoint on the port."""
+    try:
+        response = requests.get(f"{endpoint_url(port)}/json/version", timeout=HEALTH_CHECK_TIMEOUT)
+        return response.ok and "webSocketDebuggerUrl" in response.json()
+    except (requests.RequestException, ValueError):
+        return False
+
+def is_stale(state: dict) -> bool:
+    """True if the daemon has outlived BROWSER_DAEMON_MAX_AGE_HOURS (0 = never stale)."""
+    if not BROWSER_DAEMON_MAX_AGE_HOURS:
+        return False
+    return time.time() - state.get("started_at", 0) > BROWSER_DAEMON_MAX_AGE_HOURS * 3600
+
+def stop_daemon(state: dict):
+    """Kill a recorded daemon and its child processes."""
+    try:
+        # The daemon leads its own process group (start_new_session)
+        os.killpg(state["pid"], signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    logger.info(f"Stopped browser daemon (pid {state['pid']})")
+
+def start_daemon(executable_path: str, args: list, port: Optional[int] = None) -> Optional[dict]:
+    """Start a detached headless Chromium on the port (BROWSER_DAEMON_PORT); returns its state once healthy, else None."""
+    if port is None:
+        port = BROWSER_DAEMON_PORT
+    user_data_dir = Path("/tmp") / f"threads-browser-daemon-{port}"
+    command = [
+        executable_path,
+        "--headless",
+        f"--remote-debugging-port={port}",
+        "--remote-debugging-address=127.0.0.1",
+        f"--user-data-dir={user_data_dir}",
+        *args,
+        "about:blank",
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, start_new_session=True)
+    state = {"pid": process.pid, "port": port, "started_at": time.time(), "boot_id": boot_id()}
+
+    deadline = time.time() + START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            logger.warning(f"Browser daemon exited during startup (code {process.returncode})")
+            return None
+        if is_healthy(port):
+            with open(state_path(), 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            logger.info(f"Browser daemon started (pid {process.pid}, port {port})")
+            return state
+        time.sleep(0.2)
+
+    logger.warning(f"Browser daemon did not become healthy within {START_TIMEOUT}s")
+    stop_daemon(state)
+    return None
+
+def is_attached() -> bool:
+    """True if a worker holds the daemon's attach lock."""
+    with open(attach_lock_path(), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+def _ensure_locked(executable_path: str, args: list, replace_stale: bool) -> Optional[str]:
+    """ensure_browser_daemon, with the state file lock held."""
+    state = read_state()
+    if state:
+        if is_healthy(state["port"]):
+            if not (replace_stale and is_stale(state)):
+                return endpoint_url(state["port"])
+            if is_attached():
+                logger.info("Browser daemon is stale but other workers are attached to it, keeping it")
+                return endpoint_url(state["port"])
+            logger.warning("Browser daemon is stale, replacing it")
+        else:
+            logger.warning("Browser daemon is not responding, replacing it")
+        stop_daemon(state)
+    try:
+        state = start_daemon(executable_path, args)
+    except OSError as e:
+        logger.warning(f"Failed to start browser daemon: {e}")
+        return None
+    return endpoint_url(state["port"]) if state else None
+
+@contextmanager
+def _state_lock():
+    with _lock:
+        state_path().parent.mkdir(parents=True, exist_ok=True)
+        with open(state_path().with_suffix(".lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+def ensure_browser_daemon(executable_path: str, args: list, replace_stale: bool = True) -> Optional[str]:
+    """
+    Return the CDP endpoint of a healthy daemon, starting (or replacing) one if needed.
+    A stale daemon is replaced only if replace_stale and no worker is attached.
+    Returns None if no daemon could be started; callers then cold-launch a browser.
+    """
+    with _state_lock():
+        return _ensure_locked(executable_path, args, replace_stale)
+
+def attach_browser_daemon(executable_path: str, args: list) -> Optional[Tuple[str, IO]]:
+    """
+    ensure_browser_daemon for a worker that connects to the daemon: also returns the attach
+    lock file, held shared until the worker closes it on disconnecting. None if unavailable.
+    """
+    with _state_lock():
+        endpoint = _ensure_locked(executable_path, args, replace_stale=True)
+        if endpoint is None:
+            return None
+        # Taken under the state lock, so the daemon cannot be replaced in between
+        attachment = open(attach_lock_path(), 'w')
+        fcntl.flock(attachment, fcntl.LOCK_SH)
+        return endpoint, attachment
+
+def supervise():
+    """Keep a healthy daemon running (the machine's process in daemon mode)."""
+    from playwright.sync_api import sync_playwright
+    from src.browser_manager import BaseBrowserManager
+
+    playwright = sync_playwright().start()
+    executable_path = playwright.chromium.executable_path
+    playwright.stop()
+    args = BaseBrowserManager().get_optimized_browser_args()
+
+    logger.info("Supervising browser daemon...")
+    while True:
+        # Only runs replace a daemon for its age, when they attach; the supervisor would
+        # otherwise kill it under a run in progress
+        if ensure_browser_daemon(executable_path, args, replace_stale=False) is None:
+            logger.error("Browser daemon unavailable, retrying")
+        time.sleep(SUPERVISE_INTERVAL)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    supervise()
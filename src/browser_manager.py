@@ -1,26 +1,103 @@
 import os
-import json
+import fcntl
+import itertools
+import signal
 import logging
 import hashlib
+from collections import OrderedDict
 from pathlib import Path
 from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
 from typing import Optional, Dict, Any
+import requests
+from src.config import (
+    CONTEXT_POOL_SIZE,
+    BROWSER_MAX_PAGES,
+    BROWSER_MAX_RSS_MB,
+    BROWSER_DAEMON,
+    BROWSER_PERSISTENT_PROFILE,
+    BROWSER_CACHE_MAX_MB,
+)
 from src.performance_monitor import get_performance_monitor, monitor_operation
+from src.browser_daemon import attach_browser_daemon
+from src.http_cache import HttpCacheObserver, trim_cache
+from src.resource_policy import get_resource_policy
+from src.session_store import get_session_store
+from src.utils import get_cache_dir
 
 logger = logging.getLogger(__name__)
 
-class BrowserManager:
+# Headers sent with every request to look like a regular desktop browser
+EXTRA_HTTP_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Init script that hides common automation fingerprints
+STEALTH_INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+    
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+    
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['en-US', 'en'],
+    });
+    
+    window.chrome = {
+        runtime: {},
+    };
+"""
+
+def _pss_bytes(pid) -> Optional[int]:
+    """Proportional set size of a process from /proc/<pid>/smaps_rollup (Linux 4.14+), or None."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _rss_bytes(pid) -> Optional[int]:
+    """Resident set size of a process from /proc/<pid>/statm, or None."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def process_memory_bytes(pids) -> Optional[int]:
     """
-    Optimized browser manager with session persistence and anti-detection measures.
+    Total memory of the given processes. Chromium's processes share much of their memory
+    (libraries, shared memory segments), which summed RSS counts once per process, so the
+    proportional set size is used, falling back to RSS where smaps_rollup is unavailable.
+    Returns None when none of them could be read (no /proc, or all exited).
+    """
+    total = None
+    for pid in pids:
+        size = _pss_bytes(pid)
+        if size is None:
+            size = _rss_bytes(pid)
+        if size is not None:
+            total = (total or 0) + size
+    return total
+
+class BaseBrowserManager:
+    """
+    Engine-independent browser settings, profile paths and session persistence.
+    Shared by the sync BrowserManager and the asyncio-based AsyncBrowserManager.
     """
     
     def __init__(self):
-        # Use local cache directory for development, Docker cache for production
-        if os.path.exists("/app/.cache"):
-            self.cache_dir = Path("/app/.cache")
-        else:
-            # Local development - use current directory
-            self.cache_dir = Path(".cache")
+        self.cache_dir = get_cache_dir()
         
         self.profiles_dir = self.cache_dir / "browser_profiles"
         self.sessions_dir = self.cache_dir / "sessions"
@@ -28,6 +105,8 @@ class BrowserManager:
         # Ensure directories exist
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        # Sessions are kept in memory and only changed ones are written back
+        self.session_store = get_session_store(self.sessions_dir)
         
         self.playwright = None
         self.browser = None
@@ -36,6 +115,9 @@ class BrowserManager:
         # Performance monitor
         self.performance_monitor = get_performance_monitor()
         
+        # Requests to abort (images, fonts, media, telemetry)
+        self.resource_policy = get_resource_policy()
+        
     def get_optimized_browser_args(self) -> list:
         """Get optimized browser arguments for faster startup and anti-detection."""
         return [
@@ -116,148 +198,436 @@ class BrowserManager:
     
     def get_session_path(self, session_name: str) -> Path:
         """Get the path for a specific session file."""
-        return self.sessions_dir / f"{session_name}.json"
-    
-    def save_session(self, session_name: str, cookies: list, storage_state: dict):
-        """Save browser session data for later restoration."""
-        session_data = {
-            "cookies": cookies,
-            "storage_state": storage_state,
-            "timestamp": str(Path().stat().st_mtime)
-        }
-        
-        session_path = self.get_session_path(session_name)
-        with open(session_path, 'w') as f:
-            json.dump(session_data, f)
-        
-        logger.info(f"Saved session: {session_name}")
+        return self.session_store.path(session_name)
+    
+    def save_session(self, session_name: str, storage_state: dict):
+        """Keep a session's storage state (cookies included) for later restoration; written by save_sessions."""
+        if self.session_store.put(session_name, storage_state):
+            logger.debug(f"Session changed: {session_name}")
     
     def load_session(self, session_name: str) -> Optional[Dict[str, Any]]:
-        """Load browser session data if it exists."""
-        session_path = self.get_session_path(session_name)
-        
-        if session_path.exists():
-            try:
-                with open(session_path, 'r') as f:
-                    session_data = json.load(f)
-                logger.info(f"Loaded session: {session_name}")
-                return session_data
-            except Exception as e:
-                logger.warning(f"Failed to load session {session_name}: {e}")
-        
-        return None
+        """Load a session's storage state if it exists."""
+        return self.session_store.get(session_name)
     
-    def create_context(self, profile_name: str = "default", session_name: str = None) -> BrowserContext:
-        """Create a browser context with optimized settings and optional session restoration."""
-        
+    def save_sessions(self):
+        """Write the sessions that changed since the last save."""
+        self.session_store.save()
+    
+    def prepare_context(self, profile_name: str = "default", session_name: str = None):
+        """
+        Prepare everything needed to create a context.
+        Returns the context options for the given profile and session.
+        """
         profile_path = self.get_profile_path(profile_name)
         profile_path.mkdir(parents=True, exist_ok=True)
         
         # Load existing session if available
-        session_data = None
+        storage_state = None
         if session_name:
-            session_data = self.load_session(session_name)
+            storage_state = self.load_session(session_name)
         
         context_options = {
             "ignore_https_errors": True,
             "viewport": {"width": 1920, "height": 1080},
             "locale": "en-US",
             "timezone_id": "America/Los_Angeles",
-            "extra_http_headers": {
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "DNT": "1",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            }
+            "extra_http_headers": dict(EXTRA_HTTP_HEADERS),
         }
         
-        # Restore session data if available
-        if session_data and session_data.get("storage_state"):
-            context_options["storage_state"] = session_data["storage_state"]
+        # Restore session data (cookies and local storage) if available
+        if storage_state:
+            context_options["storage_state"] = storage_state
         
-        self.context = self.browser.new_context(**context_options)
+        return context_options
+
+    def should_block_request(self, request) -> bool:
+        """Apply the resource policy to a request, counting blocked requests and estimated bytes saved."""
+        resource_type = request.resource_type
+        if not self.resource_policy.should_block(resource_type, request.url):
+            return False
+        self.performance_monitor.increment_counter("blocked_requests")
+        self.performance_monitor.increment_counter(f"blocked_requests_{resource_type}")
+        self.performance_monitor.increment_counter("blocked_bytes_estimated", self.resource_policy.estimated_bytes(resource_type))
+        return True
+
+class BrowserManager(BaseBrowserManager):
+    """
+    Optimized browser manager with session persistence and anti-detection measures.
+    
+    Contexts are pooled by session name (at most CONTEXT_POOL_SIZE, least recently used
+    evicted), so a run over hundreds of accounts keeps a bounded number of contexts open.
+    self.context is the context of the most recently created page.
+    
+    Before each new page the browser is relaunched if it has served max_pages pages or its
+    process tree holds more than max_rss_mb of memory (PSS), which keeps Chromium's
+    memory from growing over a long run.
+    
+    With use_daemon the browser is the shared browser daemon: closing or recycling only
+    disconnects from it, closing this manager's contexts. Its memory is shared by every
+    worker, so it is not recycled for max_rss_mb, and a hung stage closes this manager's
+    pages instead of killing the daemon.
+    
+    With persistent_profile every page opens in one persistent context on the profile
+    directory, whose cookie jar and HTTP cache outlive the run. Session files are still
+    saved but not restored, and requests are blocked through CDP instead of routing,
+    which would disable the cache.
+    """
+    
+    def __init__(self, pool_size: int = CONTEXT_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES,
+                 max_rss_mb: int = BROWSER_MAX_RSS_MB, use_daemon: bool = BROWSER_DAEMON,
+                 persistent_profile: bool = BROWSER_PERSISTENT_PROFILE):
+        super().__init__()
+        self.pool_size = max(1, pool_size)
+        # session (or profile) name -> (BrowserContext, session_name), least recently used first
+        self.contexts = OrderedDict()
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        # Pages created since the browser was (re)launched
+        self.pages_served = 0
+        # Pid of the browser process, so a hung browser can be killed from the watchdog thread
+        self.browser_pid = None
+        self.use_daemon = use_daemon
+        # CDP endpoint and attach lock of the browser daemon while connected to it
+        self.daemon_endpoint = None
+        self.daemon_attachment = None
+        # Open page -> CDP target id, so the watchdog thread can close them on the daemon
+        self.page_targets = {}
+        self.persistent_profile = persistent_profile
+        # Profile of the persistent context (the profile_name of the first page)
+        self.profile_name = "default"
+        self.persistent_context = None
+        self._profile_lock = None
+        self.cache_observer = HttpCacheObserver(self.performance_monitor)
+    
+    def create_context(self, profile_name: str = "default", session_name: str = None) -> BrowserContext:
+        """Create a browser context with optimized settings and optional session restoration."""
+        context_options = self.prepare_context(profile_name, session_name)
         
-        # Set cookies after context creation if available
-        if session_data and session_data.get("cookies"):
-            self.context.add_cookies(session_data["cookies"])
+        context = self.browser.new_context(**context_options)
         
         # Set additional properties to avoid detection
-        self.context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en'],
-            });
-            
-            window.chrome = {
-                runtime: {},
-            };
-        """)
+        context.add_init_script(STEALTH_INIT_SCRIPT)
+        
+        # Abort requests we never read
+        if self.resource_policy.enabled:
+            context.route("**/*", self._route_request)
+        
+        return context
+    
+    def get_context(self, profile_name: str = "default", session_name: str = None) -> BrowserContext:
+        """Return the pooled context for a session, creating it (and evicting the least recently used) if needed."""
+        if self.persistent_context is not None:
+            return self.persistent_context
+        key = session_name or profile_name
+        if key in self.contexts:
+            self.contexts.move_to_end(key)
+            self.performance_monitor.increment_counter("context_pool_hits")
+            return self.contexts[key][0]
         
-        return self.context
+        while len(self.contexts) >= self.pool_size:
+            self._evict_context()
+        context = self.create_context(profile_name, session_name)
+        self.contexts[key] = (context, session_name)
+        self.performance_monitor.increment_counter("context_pool_misses")
+        return context
+    
+    def _evict_context(self):
+        """Save the session of the least recently used context and close it."""
+        key, (context, session_name) = self.contexts.popitem(last=False)
+        self._close_context(context, session_name)
+        self.performance_monitor.increment_counter("context_pool_evictions")
+        logger.debug(f"Evicted browser context: {key}")
+    
+    def _close_context(self, context: BrowserContext, session_name: str = None):
+        """Close a pooled context, saving its session first when it has one."""
+        if session_name:
+            self.save_context_session(context, session_name)
+        try:
+            context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser context: {e}")
+        if self.context is context:
+            self.context = None
+    
+    def _route_request(self, route):
+        """Route handler applying the resource policy."""
+        if self.should_block_request(route.request):
+            route.abort()
+        else:
+            route.continue_()
     
     @monitor_operation("browser_launch")
     def launch_browser(self) -> Browser:
-        """Launch browser with optimized settings."""
-        self.playwright = sync_playwright().start()
+        """Launch browser with optimized settings, or attach to the browser daemon (BROWSER_DAEMON)."""
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
         
-        self.browser = self.playwright.chromium.launch(
-            headless=True,
-            args=self.get_optimized_browser_args()
-        )
+        if self.persistent_profile:
+            self.persistent_context = self.launch_persistent_context()
+            self.browser = self.persistent_context.browser
+        else:
+            self.browser = self.connect_browser_daemon() if self.use_daemon else None
+        if self.browser is None:
+            self.browser = self.playwright.chromium.launch(
+                headless=True,
+                args=self.get_optimized_browser_args()
+            )
+            self.performance_monitor.increment_counter("browser_cold_launches")
+        self.pages_served = 0
+        # The daemon is shared: its pid is never killed for one worker's hang
+        self.browser_pid = None if self.daemon_endpoint else next((process["id"] for process in self.browser_processes() if process.get("type") == "browser"), None)
         
         logger.info("Browser launched with optimized settings")
         return self.browser
     
+    def claim_profile_dir(self, profile_name: str) -> Path:
+        """
+        Lock a profile directory for this manager. Chromium runs one browser per profile, so
+        concurrent workers get numbered copies (<profile>-1, <profile>-2, ...).
+        """
+        for index in itertools.count():
+            path = self.get_profile_path(profile_name if index == 0 else f"{profile_name}-{index}")
+            path.mkdir(parents=True, exist_ok=True)
+            lock_file = open(path / ".scraper.lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            self._profile_lock = lock_file
+            # We own the directory now; a Chromium killed earlier may have left its singleton files
+            for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+                try:
+                    (path / name).unlink()
+                except FileNotFoundError:
+                    pass
+            return path
+    
+    def release_profile_dir(self):
+        if self._profile_lock:
+            self._profile_lock.close()
+            self._profile_lock = None
+    
+    def launch_persistent_context(self) -> BrowserContext:
+        """Launch Chromium on a persistent profile directory, after trimming its cache."""
+        cache_bytes = BROWSER_CACHE_MAX_MB * 1024 * 1024
+        profile_path = self.claim_profile_dir(self.profile_name)
+        trim_cache(profile_path, cache_bytes)
+        
+        context_options = self.prepare_context(self.profile_name)
+        context = self.playwright.chromium.launch_persistent_context(
+            str(profile_path),
+            headless=True,
+            args=self.get_optimized_browser_args() + [f"--disk-cache-size={cache_bytes}"],
+            **context_options
+        )
+        context.add_init_script(STEALTH_INIT_SCRIPT)
+        logger.info(f"Launched persistent profile {profile_path.name}")
+        return context
+    
+    def observe_page_network(self, page: Page):
+        """Count cache hits of a page and block the resource policy's URLs via CDP (persistent profile)."""
+        try:
+            session = page.context.new_cdp_session(page)
+            session.send("Network.enable")
+            if self.resource_policy.enabled:
+                session.send("Network.setBlockedURLs", {"urls": self.resource_policy.blocked_url_patterns()})
+            self.cache_observer.attach(session)
+        except Exception as e:
+            logger.warning(f"Failed to observe page network: {e}")
+    
+    def connect_browser_daemon(self) -> Optional[Browser]:
+        """Connect to the browser daemon over CDP, starting it if needed; None if unavailable."""
+        attached = attach_browser_daemon(self.playwright.chromium.executable_path, self.get_optimized_browser_args())
+        if attached is None:
+            logger.warning("Browser daemon unavailable, launching a browser instead")
+            return None
+        endpoint, attachment = attached
+        try:
+            browser = self.playwright.chromium.connect_over_cdp(endpoint, timeout=10000)
+        except Exception as e:
+            attachment.close()
+            logger.warning(f"Failed to connect to the browser daemon at {endpoint}, launching a browser instead: {e}")
+            return None
+        self.daemon_endpoint = endpoint
+        self.daemon_attachment = attachment
+        self.performance_monitor.increment_counter("browser_daemon_connects")
+        logger.info(f"Connected to browser daemon at {endpoint}")
+        return browser
+    
+    def browser_processes(self) -> list:
+        """The browser's processes ({"type", "id", ...}) from CDP SystemInfo.getProcessInfo, or [] if unavailable."""
+        try:
+            session = self.browser.new_browser_cdp_session()
+            try:
+                info = session.send("SystemInfo.getProcessInfo")
+            finally:
+                session.detach()
+        except Exception as e:
+            logger.debug(f"Could not list browser processes: {e}")
+            return []
+        return info.get("processInfo", [])
+    
+    def detach_browser_daemon(self):
+        """Release the daemon's attach lock, so a stale daemon may be replaced once no worker holds it."""
+        if self.daemon_attachment:
+            self.daemon_attachment.close()
+        self.daemon_endpoint = None
+        self.daemon_attachment = None
+    
+    def browser_memory_mb(self) -> Optional[float]:
+        """Memory (PSS) of the browser and its child processes in MB, or None if unavailable."""
+        size = process_memory_bytes(process["id"] for process in self.browser_processes())
+        return size / (1024 * 1024) if size is not None else None
+    
+    def recycle_reason(self) -> Optional[str]:
+        """Return why the browser should be relaunched ("pages" or "memory"), or None."""
+        if self.max_pages and self.pages_served >= self.max_pages:
+            return "pages"
+        # The daemon's memory is shared by every worker, and disconnecting frees none of it
+        if self.max_rss_mb and not self.daemon_endpoint:
+            memory_mb = self.browser_memory_mb()
+            if memory_mb is not None:
+                self.performance_monitor.record_peak("browser_memory_mb_peak", memory_mb)
+                if memory_mb >= self.max_rss_mb:
+                    logger.info(f"Browser holds {memory_mb:.0f} MB (limit {self.max_rss_mb} MB)")
+                    return "memory"
+        return None
+    
+    def recycle_browser(self, reason: str):
+        """Close the browser (saving pooled sessions) and launch a fresh one."""
+        logger.info(f"Recycling browser after {self.pages_served} pages ({reason})")
+        self.close_browser()
+        self.launch_browser()
+        self.performance_monitor.increment_counter("browser_recycles")
+        self.performance_monitor.increment_counter(f"browser_recycles_{reason}")
+    
+    def kill_browser(self):
+        """
+        Kill the browser process. Called from the watchdog thread when a browser stage hangs:
+        the Playwright call blocked on the browser then fails at once.
+        On the browser daemon, which other workers share, only this manager's pages are closed.
+        """
+        if self.daemon_endpoint:
+            self.close_daemon_pages()
+            return
+        if self.browser_pid is None:
+            logger.error("Cannot kill the hung browser: its pid is unknown")
+            return
+        try:
+            os.kill(self.browser_pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.performance_monitor.increment_counter("browser_kills")
+    
+    def close_daemon_pages(self):
+        """
+        Close this manager's pages on the browser daemon through its DevTools HTTP endpoint,
+        which unlike the Playwright objects can be used from the watchdog thread.
+        """
+        for target_id in list(self.page_targets.values()):
+            try:
+                requests.get(f"{self.daemon_endpoint}/json/close/{target_id}", timeout=5)
+            except requests.RequestException as e:
+                logger.warning(f"Failed to close hung page {target_id} on the browser daemon: {e}")
+        self.performance_monitor.increment_counter("browser_daemon_page_kills")
+    
+    def track_page_target(self, page: Page):
+        """Record the CDP target id of a page on the browser daemon until it closes."""
+        try:
+            session = page.context.new_cdp_session(page)
+            try:
+                self.page_targets[page] = session.send("Target.getTargetInfo")["targetInfo"]["targetId"]
+            finally:
+                session.detach()
+        except Exception as e:
+            logger.warning(f"Could not get the page's target id: {e}")
+            return
+        page.on("close", lambda closed: self.page_targets.pop(closed, None))
+    
+    def recover_browser(self, force: bool = False) -> bool:
+        """
+        Relaunch the browser if it crashed or was killed (or unconditionally with force).
+        Returns True if it was relaunched; the sessions of its contexts are lost.
+        """
+        if self.browser is None or (not force and self.browser.is_connected()):
+            return False
+        logger.warning("Browser crashed or hung, relaunching it")
+        self.close_browser(save_sessions=False)
+        self.launch_browser()
+        self.performance_monitor.increment_counter("browser_relaunches")
+        return True
+    
     def create_page(self, profile_name: str = "default", session_name: str = None) -> Page:
         """Create a page with optimized context and session management."""
         if not self.browser:
+            self.profile_name = profile_name
             self.launch_browser()
+        else:
+            # Between accounts: no page of this manager is open at this point
+            reason = self.recycle_reason()
+            if reason:
+                self.recycle_browser(reason)
         
-        context = self.create_context(profile_name, session_name)
-        page = context.new_page()
+        self.context = self.get_context(profile_name, session_name)
+        page = self.context.new_page()
+        self.pages_served += 1
+        if self.persistent_context is not None:
+            self.observe_page_network(page)
+        if self.daemon_endpoint:
+            self.track_page_target(page)
         
         # Set additional page properties
-        page.set_extra_http_headers({
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        })
+        page.set_extra_http_headers(EXTRA_HTTP_HEADERS)
         
         return page
     
+    def save_context_session(self, context: BrowserContext, session_name: str):
+        """Save the session of the given context."""
+        try:
+            self.save_session(session_name, context.storage_state())
+        except Exception as e:
+            logger.error(f"Failed to save session: {e}")
+    
     def save_current_session(self, session_name: str):
         """Save the current browser session."""
         if self.context:
+            self.save_context_session(self.context, session_name)
+    
+    def close_browser(self, save_sessions: bool = True):
+        """Close the pooled contexts (saving their sessions) and the browser."""
+        while self.contexts:
+            _, (context, session_name) = self.contexts.popitem(last=False)
+            self._close_context(context, session_name if save_sessions else None)
+        if self.persistent_context is not None:
+            # Closing a persistent context closes its browser
+            self._close_context(self.persistent_context)
+            self.persistent_context = None
+            self.browser = None
+            self.browser_pid = None
+        if self.browser:
             try:
-                cookies = self.context.cookies()
-                storage_state = self.context.storage_state()
-                self.save_session(session_name, cookies, storage_state)
+                self.browser.close()
             except Exception as e:
-                logger.error(f"Failed to save session: {e}")
+                logger.warning(f"Failed to close browser: {e}")
+            self.browser = None
+            self.browser_pid = None
+        self.page_targets.clear()
+        self.detach_browser_daemon()
+        self.release_profile_dir()
+        if save_sessions:
+            self.save_sessions()
     
-    def close(self):
+    def close(self, log_summary: bool = True):
         """Close browser and cleanup resources."""
-        if self.context:
-            self.context.close()
-        if self.browser:
-            self.browser.close()
+        self.close_browser()
         if self.playwright:
             self.playwright.stop()
+        self.cache_observer.log_summary()
         
         # Log performance summary
-        self.performance_monitor.log_performance_summary()
+        if log_summary:
+            self.performance_monitor.log_performance_summary()
         
         logger.info("Browser manager closed")
 
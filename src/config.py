@@ -7,3 +7,120 @@ THREADS_USER = os.getenv("THREADS_USER", "example_user")
 USER_URL = f"https://www.threads.net/@{THREADS_USER}"
 POSTS_JSON_PATH = "data/posts.json"
 NEW_SOURCE_CODE_PATH = "new_source_code.html"
+
+# Number of accounts scraped concurrently. Each worker drives its own browser,
+# so keep this small on memory-constrained machines. 1 = sequential scraping.
+SCRAPER_WORKERS = max(1, int(os.getenv("SCRAPER_WORKERS", "1")))
+
+# Browser engine: "sync" (playwright.sync_api, one browser per worker) or
+# "async" (playwright.async_api, one browser with SCRAPER_WORKERS pages in flight)
+SCRAPER_ENGINE = os.getenv("SCRAPER_ENGINE", "sync").strip().lower()
+
+# Extraction method: "method_1" parses the rendered HTML, "method_2" decodes the
+# JSON/GraphQL responses the profile page loads in the background
+SCRAPE_METHOD = os.getenv("SCRAPE_METHOD", "method_1").strip().lower()
+
+# Where method 1 runs its extraction: "html" serializes the page and parses it in Python,
+# "browser" runs the same heuristic inside the page and only transfers the post records
+METHOD_1_EXTRACTION = os.getenv("METHOD_1_EXTRACTION", "html").strip().lower()
+
+# BeautifulSoup parser for method 1: "auto" uses lxml when installed, else "html.parser"
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+# Infinite-scroll pagination (method 1, sync engine): keep scrolling each profile and
+# extracting only the newly loaded posts until the newest stored post is reached, or
+# SCROLL_MAX_POSTS posts, posts older than SCROLL_SINCE_DAYS days (0 = no cutoff), the end
+# of the feed or SCROLL_MAX_STEPS scrolls. Processed posts are pruned from the page.
+SCROLL_PAGINATION = os.getenv("SCROLL_PAGINATION", "0") != "0"
+SCROLL_MAX_POSTS = max(1, int(os.getenv("SCROLL_MAX_POSTS", "200")))
+SCROLL_MAX_STEPS = max(1, int(os.getenv("SCROLL_MAX_STEPS", "50")))
+SCROLL_SINCE_DAYS = float(os.getenv("SCROLL_SINCE_DAYS", "0"))
+SCROLL_PRUNE = os.getenv("SCROLL_PRUNE", "1") != "0"
+
+# Worker processes parsing downloaded HTML (method 1) while the browsers keep fetching and
+# the main thread stores results. 0 parses in the fetching thread instead.
+PARSE_PROCESSES = max(0, int(os.getenv("PARSE_PROCESSES", "0")))
+
+# Page readiness: a profile counts as loaded once post permalinks are present and their count
+# has not changed for READY_STABLE_MS milliseconds (pages without posts give up after READY_TIMEOUT s).
+READY_STABLE_MS = int(os.getenv("READY_STABLE_MS", "500"))
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "15"))
+
+# Human-like time spent on each page, drawn from [DWELL_MIN, DWELL_MAX] seconds. Navigation
+# and readiness waits count toward it, so only the remainder is slept.
+DWELL_MIN = float(os.getenv("DWELL_MIN", "2.0"))
+DWELL_MAX = max(DWELL_MIN, float(os.getenv("DWELL_MAX", "5.0")))
+
+# Per-stage deadlines in seconds (0 disables one), enforced by src/watchdog.py. A browser
+# stage past its deadline kills the hung browser, which is relaunched before the account
+# is retried once; parse and store overruns are reported only.
+DEADLINE_NAVIGATE = float(os.getenv("DEADLINE_NAVIGATE", "75"))
+DEADLINE_SETTLE = float(os.getenv("DEADLINE_SETTLE", str(READY_TIMEOUT + DWELL_MAX + 15)))
+DEADLINE_CAPTURE = float(os.getenv("DEADLINE_CAPTURE", "30"))
+DEADLINE_PARSE = float(os.getenv("DEADLINE_PARSE", "60"))
+DEADLINE_STORE = float(os.getenv("DEADLINE_STORE", "180"))
+
+# Multi-row inserts into user_posts. The batch size starts at INSERT_BATCH_SIZE and adapts
+# to request latency (halves above INSERT_TARGET_LATENCY seconds or on timeouts).
+INSERT_BATCH_SIZE = max(1, int(os.getenv("INSERT_BATCH_SIZE", "10")))
+INSERT_MAX_BATCH_SIZE = max(1, int(os.getenv("INSERT_MAX_BATCH_SIZE", "100")))
+INSERT_TARGET_LATENCY = float(os.getenv("INSERT_TARGET_LATENCY", "2.0"))
+
+# Local index of already-stored post keys on the cache volume, consulted before asking
+# Supabase. Bounded per account and in number of accounts (least recently used evicted).
+SEEN_INDEX_ENABLED = os.getenv("SEEN_INDEX_ENABLED", "1") != "0"
+SEEN_INDEX_MAX_KEYS = int(os.getenv("SEEN_INDEX_MAX_KEYS", "200"))
+SEEN_INDEX_MAX_ACCOUNTS = int(os.getenv("SEEN_INDEX_MAX_ACCOUNTS", "1000"))
+
+# Incremental scraping: remember the newest stored post per account, skip accounts whose
+# leading posts are unchanged and stop extraction at the newest stored post.
+INCREMENTAL_SCRAPING = os.getenv("INCREMENTAL_SCRAPING", "1") != "0"
+
+# Requests aborted by the browser: we only read the DOM and image src URLs, never the bytes.
+# Patterns are comma-separated shell-style globs matched against the full URL; allow wins.
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") != "0"
+BLOCKED_RESOURCE_TYPES = os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font")
+BLOCKED_URL_PATTERNS = os.getenv(
+    "BLOCKED_URL_PATTERNS",
+    "*/ajax/bz*,*/logging_client_events*,*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,*connect.facebook.net*",
+)
+ALLOWED_URL_PATTERNS = os.getenv("ALLOWED_URL_PATTERNS", "")
+
+# Browser contexts each sync BrowserManager keeps open, keyed by session name. When the pool
+# is full the least recently used context is closed after saving its session.
+CONTEXT_POOL_SIZE = max(1, int(os.getenv("CONTEXT_POOL_SIZE", "4")))
+
+# Sessions (cookies and storage state) shared by all accounts, handed out in rotation, so
+# consent and bootstrap cookies carry over from one account to the next. 0 gives every
+# account its own session (threads_session_<handle>).
+SESSION_POOL_SIZE = max(0, int(os.getenv("SESSION_POOL_SIZE", "0")))
+
+# Sync BrowserManager relaunches its browser between accounts once it has served
+# BROWSER_MAX_PAGES pages or its process tree (browser, renderers, GPU and utility processes)
+# holds more than BROWSER_MAX_RSS_MB of memory, measured as PSS so pages shared between
+# Chromium's processes count once (RSS where /proc/<pid>/smaps_rollup is unavailable).
+# Calibrate it from the browser_memory_mb_peak run counter. 0 disables a threshold.
+BROWSER_MAX_PAGES = max(0, int(os.getenv("BROWSER_MAX_PAGES", "100")))
+BROWSER_MAX_RSS_MB = max(0, int(os.getenv("BROWSER_MAX_RSS_MB", "600")))
+
+# Browser daemon: a long-lived headless Chromium that runs attach to over CDP instead of
+# cold-launching one (see src/browser_daemon.py). Replaced when unresponsive or older than
+# BROWSER_DAEMON_MAX_AGE_HOURS (0 = no age limit); runs fall back to a cold launch.
+BROWSER_DAEMON = os.getenv("BROWSER_DAEMON", "0") != "0"
+BROWSER_DAEMON_PORT = int(os.getenv("BROWSER_DAEMON_PORT", "9222"))
+BROWSER_DAEMON_MAX_AGE_HOURS = float(os.getenv("BROWSER_DAEMON_MAX_AGE_HOURS", "12"))
+
+# Persistent profile: launch Chromium on browser_profiles/<profile> on the cache volume
+# (launch_persistent_context) so its HTTP and code caches survive between runs. Cache
+# directories are kept under BROWSER_CACHE_MAX_MB. Takes precedence over BROWSER_DAEMON.
+BROWSER_PERSISTENT_PROFILE = os.getenv("BROWSER_PERSISTENT_PROFILE", "0") != "0"
+BROWSER_CACHE_MAX_MB = max(1, int(os.getenv("BROWSER_CACHE_MAX_MB", "256")))
+
+# Performance metrics are buffered and appended to JSON Lines segments in metrics/ (see
+# src/metrics_store.py) every METRICS_FLUSH_SIZE samples or METRICS_FLUSH_INTERVAL seconds.
+# Past METRICS_MAX_SEGMENTS segments they are compacted, dropping samples older than
+# METRICS_RETENTION_DAYS (0 = keep everything).
+METRICS_FLUSH_SIZE = max(1, int(os.getenv("METRICS_FLUSH_SIZE", "100")))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "30"))
+METRICS_RETENTION_DAYS = float(os.getenv("METRICS_RETENTION_DAYS", "30"))
+METRICS_MAX_SEGMENTS = max(1, int(os.getenv("METRICS_MAX_SEGMENTS", "8")))
@@ -0,0 +1,99 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from src.utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+class HighWaterMarks:
+    """
+    Per-account record of the newest post already stored.
+
+    Each mark holds the newest stored post's ID and datetime, plus the leading
+    permalink IDs of the profile page as last seen (the "head"). An unchanged head
+    means nothing new was posted, and extraction can stop at the stored post ID.
+    Like the seen-post index this is a cache: losing it only costs a full scrape.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            path = get_cache_dir() / "high_water_marks.json"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._marks: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        # Shared by concurrent scrape workers
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load marks from disk, starting empty if the file is missing or corrupt."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("unexpected format")
+            self._marks = {handle: mark for handle, mark in data.items() if isinstance(mark, dict)}
+        except Exception as e:
+            logger.warning(f"Failed to load high-water marks, starting fresh: {e}")
+            self._marks = {}
+            self._dirty = True
+
+    def get(self, account_handle: str) -> Optional[Dict[str, Any]]:
+        """Return the mark for an account, or None if it has never been scraped."""
+        with self._lock:
+            mark = self._marks.get(account_handle)
+            return dict(mark) if mark else None
+
+    def update(self, account_handle: str, head: List[str], posts: Optional[List[Dict]] = None):
+        """
+        Record the page head and, if posts were stored, advance the mark to the newest of them.
+        Posts without a datetime only count when no dated post is available.
+        """
+        with self._lock:
+            mark = dict(self._marks.get(account_handle) or {})
+            mark["head"] = list(head)
+            dated = [post for post in posts or [] if post.get("id") and post.get("datetime")]
+            undated = [post for post in posts or [] if post.get("id")]
+            newest = None
+            if dated:
+                newest = max(dated, key=lambda post: post["datetime"])
+            elif undated and not mark.get("post_id"):
+                newest = undated[0]
+            if newest and (not mark.get("datetime") or not newest.get("datetime") or newest["datetime"] >= mark["datetime"]):
+                mark["post_id"] = newest["id"]
+                mark["datetime"] = newest.get("datetime")
+            self._marks[account_handle] = mark
+            self._dirty = True
+
+    def save(self):
+        """Persist marks atomically if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._marks, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"Failed to save high-water marks: {e}")
+
+# Global high-water marks instance
+_high_water_marks = None
+_high_water_marks_lock = threading.Lock()
+
+def get_high_water_marks() -> HighWaterMarks:
+    """Get the global high-water marks instance."""
+    global _high_water_marks
+    with _high_water_marks_lock:
+        if _high_water_marks is None:
+            _high_water_marks = HighWaterMarks()
+        return _high_water_marks
@@ -0,0 +1,120 @@
+"""
+Chromium's HTTP disk cache in persistent-profile mode (BROWSER_PERSISTENT_PROFILE=1).
+
+trim_cache keeps a profile's cache directories under BROWSER_CACHE_MAX_MB before Chromium
+starts, evicting the least recently written entries first. Chromium enforces the same cap
+on the HTTP cache itself (--disk-cache-size) while running; the code cache (compiled JS)
+is only bounded here.
+
+HttpCacheObserver listens to a page's CDP Network events and counts responses served from
+cache, with an estimate of the bytes saved. Playwright request routing disables the HTTP
+cache, so in this mode blocked URLs are handed to Network.setBlockedURLs instead, and the
+observer also counts the requests Chromium blocked.
+"""
+import logging
+from pathlib import Path
+from typing import Optional
+from src.resource_policy import ResourcePolicy
+
+logger = logging.getLogger(__name__)
+
+# Cache directories inside a Chromium user data directory
+CACHE_DIRS = ("Default/Cache", "Default/Code Cache")
+# Index files of the simple cache backend; deleting them would invalidate every entry
+INDEX_FILE_NAMES = ("index", "the-real-index")
+# Trimming stops at this fraction of the cap, so it does not run again on every launch
+TRIM_TARGET = 0.8
+
+def trim_cache(profile_dir: Path, max_bytes: int) -> int:
+    """
+    Delete the oldest cache entries of a (closed) profile until it fits in max_bytes.
+    Returns the number of bytes freed.
+    """
+    entries = []
+    for cache_dir in CACHE_DIRS:
+        for path in (Path(profile_dir) / cache_dir).rglob("*"):
+            if path.is_file() and path.name not in INDEX_FILE_NAMES:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return 0
+
+    freed = 0
+    target = total - int(max_bytes * TRIM_TARGET)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if freed >= target:
+            break
+        try:
+            path.unlink()
+            freed += size
+        except OSError as e:
+            logger.debug(f"Could not evict cache entry {path}: {e}")
+    logger.info(f"Evicted {freed / (1024 * 1024):.1f} MB of old cache entries from {profile_dir}")
+    return freed
+
+def _content_length(headers: dict) -> Optional[int]:
+    for name, value in headers.items():
+        if name.lower() == "content-length":
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+class HttpCacheObserver:
+    """Counts cache hits and CDP-blocked requests of the pages it is attached to."""
+
+    def __init__(self, performance_monitor):
+        self.performance_monitor = performance_monitor
+        self.requests = 0
+        self.hits = 0
+        self.bytes_saved = 0
+        self._served_from_cache = set()
+
+    def attach(self, cdp_session):
+        """Subscribe to the Network events of a page's CDP session (Network must be enabled)."""
+        cdp_session.on("Network.requestServedFromCache", self._on_served_from_cache)
+        cdp_session.on("Network.responseReceived", self._on_response)
+        cdp_session.on("Network.loadingFailed", self._on_loading_failed)
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        return self.hits / self.requests if self.requests else None
+
+    def _on_served_from_cache(self, params: dict):
+        self._served_from_cache.add(params["requestId"])
+
+    def _on_response(self, params: dict):
+        response = params.get("response", {})
+        if not response.get("url", "").startswith("http"):
+            return
+        self.requests += 1
+        self.performance_monitor.increment_counter("http_cache_requests")
+        from_cache = (response.get("fromDiskCache") or response.get("fromPrefetchCache")
+                      or params["requestId"] in self._served_from_cache)
+        self._served_from_cache.discard(params["requestId"])
+        if not from_cache:
+            return
+        saved = _content_length(response.get("headers", {}))
+        if saved is None:
+            saved = ResourcePolicy.estimated_bytes(params.get("type", "").lower())
+        self.hits += 1
+        self.bytes_saved += saved
+        self.performance_monitor.increment_counter("http_cache_hits")
+        self.performance_monitor.increment_counter("http_cache_bytes_saved", saved)
+
+    def _on_loading_failed(self, params: dict):
+        # "inspector" is the reason for URLs blocked with Network.setBlockedURLs
+        if params.get("blockedReason") != "inspector":
+            return
+        resource_type = params.get("type", "").lower()
+        self.performance_monitor.increment_counter("blocked_requests")
+        self.performance_monitor.increment_counter(f"blocked_requests_{resource_type}")
+        self.performance_monitor.increment_counter("blocked_bytes_estimated", ResourcePolicy.estimated_bytes(resource_type))
+
+    def log_summary(self):
+        if self.requests:
+            logger.info(f"HTTP cache: {self.hits}/{self.requests} responses from cache ({self.hit_ratio:.0%}), "
+                        f"~{self.bytes_saved / (1024 * 1024):.1f} MB saved")
@@ -0,0 +1,86 @@
+"""
+Streaming latency histogram shared by PerformanceMonitor (per-run histograms) and
+MetricsStore (daily rollups of stored samples).
+"""
+import math
+from typing import Any, Dict, Optional
+
+class LatencyHistogram:
+    """
+    Streaming latency histogram with logarithmic buckets: percentiles are within
+    BUCKET_GROWTH / 2 (2.5%) of the exact value, in constant memory per bucket.
+    """
+    MIN_SECONDS = 0.001
+    BUCKET_GROWTH = 1.05
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.MIN_SECONDS:
+            return 0
+        return int(math.log(value / self.MIN_SECONDS, self.BUCKET_GROWTH)) + 1
+
+    def record(self, value: float):
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimated q-th percentile (0-100), or None if nothing was recorded."""
+        if not self.count:
+            return None
+        if q >= 100:
+            return self.max
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                break
+        if bucket == 0:
+            return self.min
+        # Geometric middle of the bucket, clamped to the values actually seen
+        estimate = self.MIN_SECONDS * self.BUCKET_GROWTH ** (bucket - 0.5)
+        return min(max(estimate, self.min), self.max)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "average": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, e.g. for the metrics store's rollups."""
+        return {"buckets": {str(bucket): count for bucket, count in self.buckets.items()},
+                "count": self.count, "total": self.total, "min": self.min if self.count else None, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(bucket): count for bucket, count in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.min = data["min"] if data.get("min") is not None else math.inf
+        histogram.max = data.get("max", 0.0)
+        return histogram
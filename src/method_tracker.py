@@ -2,6 +2,7 @@ import json
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from src.config import SCRAPE_METHOD
 
 # Store history in a writable cache directory inside the app (mounted volume)
 # Can be overridden via env METHOD_HISTORY_DIR if needed
@@ -9,7 +10,11 @@ HISTORY_DIR = os.environ.get("METHOD_HISTORY_DIR", "/app/.cache/method_history")
 os.makedirs(HISTORY_DIR, exist_ok=True)
 HISTORY_PATH = os.path.join(HISTORY_DIR, "threads_rotation_history.json")
 
-METHOD_NAME = "Method 1: Span hierarchy"
+METHOD_NAMES = {
+    "method_1": "Method 1: Span hierarchy",
+    "method_2": "Method 2: Network JSON",
+}
+METHOD_NAME = METHOD_NAMES.get(SCRAPE_METHOD, METHOD_NAMES["method_1"])
 
 def now_pacific():
     """Return current time in America/Los_Angeles as 'YYYY-MM-DD HH:MM:SS TZ'."""
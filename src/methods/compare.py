@@ -0,0 +1,58 @@
+"""
+Side-by-side comparison of the extraction methods on the same accounts.
+
+Usage:
+    python -m src.methods.compare handle1 handle2 ...
+"""
+import sys
+import time
+import logging
+from src.browser_manager import get_browser_manager, cleanup_browser_manager
+from src.methods import method_1, method_2
+
+logger = logging.getLogger(__name__)
+
+def compare_methods(account_handle: str) -> dict:
+    """Scrape one account with both methods and report duration and yield of each."""
+    url = f"https://www.threads.net/@{account_handle}"
+    browser_manager = get_browser_manager()
+    results = {}
+
+    started = time.time()
+    html = method_1.download_html_playwright(url, browser_manager=browser_manager)
+    posts_1 = method_1.extract_posts(html)
+    results["method_1"] = {"seconds": time.time() - started, "posts": len(posts_1)}
+
+    started = time.time()
+    _, posts_1b = method_1.download_posts_playwright(url, browser_manager=browser_manager)
+    results["method_1_browser"] = {"seconds": time.time() - started, "posts": len(posts_1b)}
+    results["method_1_browser_matches"] = posts_1b == posts_1
+
+    started = time.time()
+    posts_2 = method_2.download_posts_from_network(url, browser_manager=browser_manager)
+    results["method_2"] = {"seconds": time.time() - started, "posts": len(posts_2)}
+
+    ids_1 = {post.get("id") for post in posts_1}
+    ids_2 = {post.get("id") for post in posts_2}
+    results["common_posts"] = len(ids_1 & ids_2)
+    return results
+
+def main(handles):
+    try:
+        for account_handle in handles:
+            results = compare_methods(account_handle)
+            print(f"@{account_handle}:", flush=True)
+            for method in ("method_1", "method_1_browser", "method_2"):
+                stats = results[method]
+                print(f"  {method}: {stats['posts']} posts in {stats['seconds']:.2f}s", flush=True)
+            print(f"  method_1_browser matches method_1: {results['method_1_browser_matches']}", flush=True)
+            print(f"  posts found by method_1 and method_2: {results['common_posts']}", flush=True)
+    finally:
+        cleanup_browser_manager()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
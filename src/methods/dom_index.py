@@ -0,0 +1,150 @@
+"""
+Single-pass index over a parsed profile page, backing method_1's DOM heuristic.
+
+The heuristic used to rescan each post container's subtree with find_all, then walk
+up from every span looking for <a>/<time> ancestors. That costs roughly
+O(links × subtree × depth). DomIndex instead walks the tree once and numbers the tags
+in document (preorder) order, recording where each subtree ends. "Descendants of X"
+then becomes a bisect into a sorted list. Every query returns exactly what the
+equivalent BeautifulSoup find/find_all call would.
+"""
+import re
+from bisect import bisect_right
+from bs4 import Tag
+
+POST_LINK_RE = re.compile(r"/@[\w.]+/post/[A-Za-z0-9_-]+$")
+USER_LINK_RE = re.compile(r"/@[\w.]+$")
+PROFILE_LINK_RE = re.compile(r"^/@[A-Za-z0-9_.]+$")
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_.]+$")
+
+class DomIndex:
+    """Preorder index of the tags the post heuristic looks at."""
+
+    def __init__(self, root: Tag):
+        self._pos = {}
+        self._end = []
+        # Parallel lists sorted by preorder position
+        self._link_pos, self._links = [], []
+        self._span_pos, self._spans, self._span_excluded_by = [], [], []
+        self._img_pos, self._imgs, self._img_links = [], [], []
+        self._time_pos, self._times = [], []
+        self._text = {}
+        self._build(root)
+
+    def _build(self, root: Tag):
+        """Number the tags and collect links, spans, images and times in one traversal."""
+        end = self._end
+        # Entries are (tag, position of nearest <a>/<time> ancestor, nearest <a href> ancestor);
+        # ints mark the exit from the subtree at that position
+        stack = [(root, -1, None)]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, int):
+                end[item] = len(end) - 1
+                continue
+            tag, excluded_by, link = item
+            pos = len(end)
+            self._pos[id(tag)] = pos
+            end.append(pos)
+
+            name = tag.name
+            if name == "span":
+                self._span_pos.append(pos)
+                self._spans.append(tag)
+                self._span_excluded_by.append(excluded_by)
+            elif name == "a":
+                excluded_by = pos
+                if tag.get("href") is not None:
+                    self._link_pos.append(pos)
+                    self._links.append(tag)
+                    link = tag
+            elif name == "time":
+                excluded_by = pos
+                if tag.get("datetime") is not None:
+                    self._time_pos.append(pos)
+                    self._times.append(tag)
+            elif name == "img" and tag.get("src") is not None:
+                self._img_pos.append(pos)
+                self._imgs.append(tag)
+                self._img_links.append(link)
+
+            stack.append(pos)
+            stack.extend((child, excluded_by, link) for child in reversed(tag.contents) if isinstance(child, Tag))
+
+    def _descendants(self, positions: list, tag: Tag) -> range:
+        """Indexes into a position list of the entries inside tag's subtree (tag excluded)."""
+        pos = self._pos[id(tag)]
+        return range(bisect_right(positions, pos), bisect_right(positions, self._end[pos]))
+
+    def position(self, tag: Tag) -> int:
+        return self._pos[id(tag)]
+
+    def text(self, tag: Tag) -> str:
+        """tag.get_text(strip=True), memoized: containers share spans and links repeat."""
+        key = id(tag)
+        text = self._text.get(key)
+        if text is None:
+            text = self._text[key] = tag.get_text(strip=True)
+        return text
+
+    def post_links(self) -> list:
+        """soup.find_all("a", href=POST_LINK_RE)"""
+        return [a for a in self._links if POST_LINK_RE.search(a["href"])]
+
+    def first_span(self, tag: Tag):
+        """tag.find("span")"""
+        indexes = self._descendants(self._span_pos, tag)
+        return self._spans[indexes[0]] if indexes else None
+
+    def first_time(self, tag: Tag):
+        """tag.find("time", datetime=True)"""
+        indexes = self._descendants(self._time_pos, tag)
+        return self._times[indexes[0]] if indexes else None
+
+    def profile_username(self):
+        """Text of the first profile link on the page, like extract_profile_username."""
+        for a in self._links:
+            if PROFILE_LINK_RE.match(a["href"]):
+                span = self.first_span(a)
+                return self.text(span) if span else self.text(a)
+        return None
+
+    def username(self, container: Tag):
+        """Username shown in a post container: its first user link, else a bare username span."""
+        for i in self._descendants(self._link_pos, container):
+            a = self._links[i]
+            if USER_LINK_RE.search(a["href"]):
+                span = self.first_span(a)
+                username = self.text(span) if span else self.text(a)
+                if username:
+                    return username
+                break
+        for i in self._descendants(self._span_pos, container):
+            span = self._spans[i]
+            if span.string is not None and USERNAME_RE.search(span.string):
+                return self.text(span)
+        return None
+
+    def content_spans(self, container: Tag):
+        """Spans of a container that are not inside an <a> or <time> within it."""
+        container_pos = self.position(container)
+        for i in self._descendants(self._span_pos, container):
+            if self._span_excluded_by[i] <= container_pos:
+                yield self._spans[i]
+
+    def image(self, container: Tag):
+        """Image URL of a post container: an image inside a /media link, else the first non-avatar image."""
+        # Prefer <img> inside <a> with /media in href
+        for i in self._descendants(self._link_pos, container):
+            a = self._links[i]
+            if "/media" in a["href"]:
+                indexes = self._descendants(self._img_pos, a)
+                if indexes:
+                    return self._imgs[indexes[0]]["src"]
+        # Otherwise the first <img> that is not a profile picture
+        for i in self._descendants(self._img_pos, container):
+            parent_a = self._img_links[i]
+            if parent_a is not None and PROFILE_LINK_RE.match(parent_a["href"]):
+                continue
+            return self._imgs[i]["src"]
+        return None
@@ -0,0 +1,164 @@
+"""
+Conversion of Threads' own JSON post data into the post dicts extract_posts returns.
+
+Threads loads posts through GraphQL responses whose post nodes look like
+{"code": "<permalink id>", "taken_at": <unix seconds>, "caption": {"text": ...},
+ "user": {"username": ...}, "image_versions2": {"candidates": [{"url": ...}]}}.
+The nodes are nested differently depending on the query, so payloads are walked
+recursively and every node with that shape is converted.
+"""
+import re
+import json
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Raw-HTML scanning of <script type="application/json"> tags, without building a DOM
+SCRIPT_OPEN_RE = re.compile(r"<script\b([^>]*)>", re.IGNORECASE)
+SCRIPT_CLOSE_RE = re.compile(r"</script", re.IGNORECASE)
+ATTR_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+
+# Prefix Meta prepends to some JSON responses to prevent JSON hijacking
+JSON_HIJACK_PREFIX = "for (;;);"
+
+def parse_json_payloads(text: str) -> list:
+    """
+    Decode a response body into JSON payloads.
+    Handles the anti-hijacking prefix and bodies with one JSON document per line
+    (streamed/deferred GraphQL results). Undecodable bodies yield no payloads.
+    """
+    text = text.strip()
+    if text.startswith(JSON_HIJACK_PREFIX):
+        text = text[len(JSON_HIJACK_PREFIX):]
+    if not text or text[0] not in "{[":
+        return []
+    try:
+        return [json.loads(text)]
+    except ValueError:
+        pass
+    payloads = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payloads.append(json.loads(line))
+        except ValueError:
+            continue
+    return payloads
+
+def parse_tag_attrs(attr_text: str) -> dict:
+    """Parse the attributes of an opening tag into a dict (names lowercased)."""
+    attrs = {}
+    for match in ATTR_RE.finditer(attr_text):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue
+        value = next((v for v in match.group(2, 3, 4) if v is not None), "")
+        attrs[name] = value
+    return attrs
+
+def iter_json_scripts(html: str):
+    """
+    Yield (attrs, text) for each <script type="application/json"> in the page.
+    Scans the raw HTML string once, jumping from tag to tag; script bodies are sliced, not parsed.
+    """
+    pos = 0
+    while True:
+        opening = SCRIPT_OPEN_RE.search(html, pos)
+        if not opening:
+            return
+        closing = SCRIPT_CLOSE_RE.search(html, opening.end())
+        end = closing.start() if closing else len(html)
+        pos = end
+        attrs = parse_tag_attrs(opening.group(1))
+        if attrs.get("type") == "application/json":
+            yield attrs, html[opening.end():end]
+
+def embedded_json_payloads(html: str) -> list:
+    """Decode the embedded JSON script blobs of a page that may contain post nodes."""
+    payloads = []
+    for attrs, text in iter_json_scripts(html):
+        # Cheap substring check before paying for json.loads on unrelated blobs
+        if '"taken_at"' not in text:
+            continue
+        try:
+            payloads.append(json.loads(text))
+        except ValueError as e:
+            logger.debug("Skipping undecodable JSON script blob: %s", e)
+    return payloads
+
+def is_post_node(node) -> bool:
+    """Return True if a JSON object looks like a Threads post."""
+    return (
+        isinstance(node, dict)
+        and isinstance(node.get("code"), str)
+        and "taken_at" in node
+        and ("caption" in node or "user" in node)
+    )
+
+def iter_post_nodes(payload):
+    """Yield post nodes found anywhere in a payload, in document order."""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if is_post_node(node):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def format_timestamp(taken_at):
+    """Format a unix timestamp like the datetime attribute of Threads' <time> tags."""
+    try:
+        dt = datetime.fromtimestamp(int(taken_at), tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def node_image(node):
+    """First image candidate of a post, or of the first carousel item."""
+    sources = [node] + list(node.get("carousel_media") or [])
+    for source in sources:
+        if not isinstance(source, dict):
+            continue
+        candidates = (source.get("image_versions2") or {}).get("candidates") or []
+        for candidate in candidates:
+            if isinstance(candidate, dict) and candidate.get("url"):
+                return candidate["url"]
+    return None
+
+def post_from_node(node, profile_username=None):
+    """Convert a post node into a post dict."""
+    caption = node.get("caption") or {}
+    content = caption.get("text") if isinstance(caption, dict) else None
+    user = (node.get("user") or {}).get("username") or profile_username
+    return {
+        "id": node["code"],
+        "datetime": format_timestamp(node.get("taken_at")),
+        "user": user,
+        "content": content.strip() if isinstance(content, str) else None,
+        "image": node_image(node),
+    }
+
+def posts_from_payloads(payloads, profile_username=None):
+    """
+    Convert JSON payloads into post dicts, deduplicated by post ID.
+    Like the DOM heuristic, posts without a user or content are dropped.
+    """
+    posts = []
+    seen = set()
+    for payload in payloads:
+        for node in iter_post_nodes(payload):
+            post = post_from_node(node, profile_username)
+            if post["id"] in seen:
+                continue
+            seen.add(post["id"])
+            if post["user"] and post["content"]:
+                posts.append(post)
+            else:
+                logger.debug("Skipped JSON post: user=%s content=%s", post["user"], post["content"])
+    return posts
@@ -1,6 +1,26 @@
-from src.config import USER_URL, NEW_SOURCE_CODE_PATH
-from src.browser_manager import get_browser_manager, cleanup_browser_manager
-from bs4 import BeautifulSoup
+from src.config import (
+    USER_URL,
+    NEW_SOURCE_CODE_PATH,
+    SCROLL_MAX_POSTS,
+    SCROLL_MAX_STEPS,
+    SCROLL_SINCE_DAYS,
+    SCROLL_PRUNE,
+)
+from src.browser_manager import BrowserManager, get_browser_manager, cleanup_browser_manager
+from src.async_browser_manager import AsyncBrowserManager
+from src.methods.json_posts import iter_json_scripts, posts_from_payloads
+from src.methods.page_scripts import EXTRACT_POSTS_JS, PENDING_POST_LINKS_JS, SCROLL_TO_END_JS, MORE_POST_LINKS_JS
+from src.methods.dom_index import DomIndex
+from src.methods.parsers import parse_html
+from src.methods.page_loading import load_profile_page, load_profile_page_async
+from src.performance_monitor import get_performance_monitor
+from src.watchdog import async_stage_deadline, stage_deadline
+from src.utils import iter_until_known
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import random
+import time
 import re
 import json
 import logging
@@ -8,7 +28,7 @@ import hashlib
 
 logger = logging.getLogger(__name__)
 
-def download_html_playwright(url: str, profile_name: str = "threads_scraper", session_name: str = None) -> str:
+def download_html_playwright(url: str, profile_name: str = "threads_scraper", session_name: str = None, browser_manager: BrowserManager = None) -> str:
     """
     Download HTML using optimized browser manager with session persistence.
     
@@ -16,40 +36,71 @@ def download_html_playwright(url: str, profile_name: str = "threads_scraper", se
         url: The URL to scrape
         profile_name: Browser profile name for persistence
         session_name: Session name for cookie/storage restoration
+        browser_manager: Browser manager to use (defaults to the global instance)
     
     Returns:
         HTML content as string
     """
-    browser_manager = get_browser_manager()
+    if browser_manager is None:
+        browser_manager = get_browser_manager()
     
+    page = None
     try:
         # Create page with optimized settings
         page = browser_manager.create_page(profile_name, session_name)
+        load_profile_page(page, url)
         
-        # Add random delays to avoid detection
-        import random
-        import time
-        
-        # Navigate to the page
-        logger.info(f"Navigating to: {url}")
-        page.goto(url, timeout=60000, wait_until="networkidle")
+        # Get the HTML content
+        capture_start = time.time()
+        with stage_deadline("capture"):
+            html = page.content()
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
         
-        # Random delay to simulate human behavior
-        time.sleep(random.uniform(2, 5))
+        # Save session for future use
+        if session_name:
+            browser_manager.save_current_session(session_name)
         
-        # Scroll a bit to simulate human interaction
-        page.evaluate("window.scrollTo(0, Math.random() * 500)")
-        time.sleep(random.uniform(1, 3))
+        logger.info(f"Successfully downloaded HTML from {url}")
+        return html
         
-        # Wait for content to load
-        page.wait_for_load_state('networkidle')
+    except Exception as e:
+        logger.error(f"Error downloading HTML from {url}: {e}")
+        raise
+    finally:
+        # The context stays pooled in the browser manager; only the page goes
+        if page:
+            page.close()
+
+async def download_html_playwright_async(url: str, profile_name: str = "threads_scraper", session_name: str = None, browser_manager: AsyncBrowserManager = None) -> str:
+    """
+    Async counterpart of download_html_playwright for the asyncio engine.
+    
+    Each call gets its own context, which is closed once the HTML has been captured
+    so that many concurrent calls don't pile up contexts in the shared browser.
+    
+    Args:
+        url: The URL to scrape
+        profile_name: Browser profile name for persistence
+        session_name: Session name for cookie/storage restoration
+        browser_manager: Async browser manager owning the browser
+    
+    Returns:
+        HTML content as string
+    """
+    page = None
+    try:
+        page = await browser_manager.create_page(profile_name, session_name)
+        await load_profile_page_async(page, url)
         
         # Get the HTML content
-        html = page.content()
+        capture_start = time.time()
+        async with async_stage_deadline("capture"):
+            html = await page.content()
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
         
         # Save session for future use
         if session_name:
-            browser_manager.save_current_session(session_name)
+            await browser_manager.save_context_session(page.context, session_name)
         
         logger.info(f"Successfully downloaded HTML from {url}")
         return html
@@ -58,8 +109,205 @@ def download_html_playwright(url: str, profile_name: str = "threads_scraper", se
         logger.error(f"Error downloading HTML from {url}: {e}")
         raise
     finally:
-        # Don't close the browser manager here - let it be reused
-        pass
+        if page:
+            await browser_manager.close_context(page.context)
+
+def download_posts_playwright(url: str, profile_name: str = "threads_scraper", session_name: str = None,
+                              browser_manager: BrowserManager = None, stop_at_id: str = None):
+    """
+    Like download_html_playwright followed by extract_posts, but runs the extraction
+    inside the page and only transfers the resulting post records.
+    
+    Returns:
+        (head, posts): the leading permalink IDs (as leading_post_ids) and the posts
+        in front of stop_at_id (as extract_posts)
+    """
+    if browser_manager is None:
+        browser_manager = get_browser_manager()
+    
+    page = None
+    try:
+        page = browser_manager.create_page(profile_name, session_name)
+        load_profile_page(page, url)
+        
+        capture_start = time.time()
+        with stage_deadline("capture"):
+            result = page.evaluate(EXTRACT_POSTS_JS, {"stopAtId": stop_at_id, "headLimit": 5})
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
+        
+        # Save session for future use
+        if session_name:
+            browser_manager.save_current_session(session_name)
+        
+        head, posts = posts_from_page_result(result, stop_at_id)
+        logger.info(f"Extracted {len(posts)} posts in the page from {url}")
+        return head, posts
+        
+    except Exception as e:
+        logger.error(f"Error extracting posts in the page from {url}: {e}")
+        raise
+    finally:
+        if page:
+            page.close()
+
+async def download_posts_playwright_async(url: str, profile_name: str = "threads_scraper", session_name: str = None,
+                                          browser_manager: AsyncBrowserManager = None, stop_at_id: str = None):
+    """Async counterpart of download_posts_playwright for the asyncio engine."""
+    page = None
+    try:
+        page = await browser_manager.create_page(profile_name, session_name)
+        await load_profile_page_async(page, url)
+        
+        capture_start = time.time()
+        async with async_stage_deadline("capture"):
+            result = await page.evaluate(EXTRACT_POSTS_JS, {"stopAtId": stop_at_id, "headLimit": 5})
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
+        
+        # Save session for future use
+        if session_name:
+            await browser_manager.save_context_session(page.context, session_name)
+        
+        head, posts = posts_from_page_result(result, stop_at_id)
+        logger.info(f"Extracted {len(posts)} posts in the page from {url}")
+        return head, posts
+        
+    except Exception as e:
+        logger.error(f"Error extracting posts in the page from {url}: {e}")
+        raise
+    finally:
+        if page:
+            await browser_manager.close_context(page.context)
+
+# Scrolls in a row that load no new posts before the feed is considered exhausted
+SCROLL_IDLE_STEPS = 3
+
+@contextmanager
+def scroll_profile(url: str, profile_name: str = "threads_scraper", session_name: str = None,
+                   browser_manager: BrowserManager = None, stop_at_id: str = None):
+    """
+    Open a profile page for infinite-scroll extraction.
+    Yields (head, posts) as scroll_posts does, with the SCROLL_* limits from src.config;
+    the page stays open while posts are consumed and is closed on exit.
+    
+    Usage:
+        with scroll_profile(url, stop_at_id=...) as (head, posts):
+            for post in posts: ...
+    """
+    if browser_manager is None:
+        browser_manager = get_browser_manager()
+    
+    cutoff = None
+    if SCROLL_SINCE_DAYS > 0:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=SCROLL_SINCE_DAYS)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    
+    page = browser_manager.create_page(profile_name, session_name)
+    try:
+        try:
+            load_profile_page(page, url)
+            head, posts = scroll_posts(page, stop_at_id, max_posts=SCROLL_MAX_POSTS, max_steps=SCROLL_MAX_STEPS,
+                                       cutoff=cutoff, prune=SCROLL_PRUNE)
+        except Exception as e:
+            logger.error(f"Error extracting posts in the page from {url}: {e}")
+            raise
+        yield head, posts
+        
+        # Save session for future use
+        if session_name:
+            browser_manager.save_current_session(session_name)
+    finally:
+        page.close()
+
+def scroll_posts(page, stop_at_id: str = None, max_posts: int = SCROLL_MAX_POSTS, max_steps: int = SCROLL_MAX_STEPS,
+                 cutoff: str = None, prune: bool = SCROLL_PRUNE, step_timeout: float = 5000):
+    """
+    Extract the posts of a loaded profile page, then keep scrolling for older ones.
+    
+    Each step runs the in-page extraction on the permalinks not handled by earlier
+    steps only, marking (and with prune, removing) the containers it handled. The first
+    step prefers the JSON script blobs and adds the DOM posts missing from them; later
+    steps skip collecting the blobs and use the DOM posts. Scrolling
+    stops at stop_at_id, after max_posts posts, once a whole step is older than cutoff
+    (an ISO datetime string), when SCROLL_IDLE_STEPS scrolls load nothing, or after max_steps.
+    
+    Returns:
+        (head, posts): the leading permalink IDs of the first screen, and a generator of
+        posts in page order that scrolls on demand as it is consumed
+    """
+    options = {"stopAtId": stop_at_id, "headLimit": 5, "skipProcessed": True, "prune": prune}
+    with stage_deadline("capture"):
+        result = page.evaluate(EXTRACT_POSTS_JS, options)
+    # Set once the stored post was skipped as pinned; later steps stop at posts not newer than it
+    options["knownDatetime"] = result.get("knownDatetime")
+    # Only the first screen's blobs are read; they are not transferred again
+    options["collectScripts"] = False
+    head, posts = posts_from_page_result(result, stop_at_id)
+    if posts is not result["posts"]:
+        # The step marked (and pruned) every container it handled, so a post missing
+        # from the JSON blobs would never be extracted again
+        json_ids = {post["id"] for post in posts}
+        posts = posts + [post for post in result["posts"] if post["id"] not in json_ids]
+    return head, _scroll_steps(page, options, result, posts, max_posts, max_steps, cutoff, step_timeout)
+
+def _scroll_steps(page, options, result, posts, max_posts, max_steps, cutoff, step_timeout):
+    """Generator behind scroll_posts."""
+    seen = set()
+    yielded = 0
+    idle = 0
+    steps = 1
+    while True:
+        new_posts = [post for post in posts if post["id"] not in seen]
+        older = 0
+        for post in new_posts:
+            seen.add(post["id"])
+            if cutoff and post.get("datetime") and post["datetime"] < cutoff:
+                older += 1
+                continue
+            yield post
+            yielded += 1
+            if yielded >= max_posts:
+                logger.info(f"Scrolling stopped after {yielded} posts (limit reached)")
+                return
+        
+        if result["reachedStop"]:
+            logger.info(f"Scrolling reached the newest stored post after {steps} steps")
+            return
+        if new_posts and older == len(new_posts):
+            logger.info(f"Scrolling reached posts older than {cutoff} after {steps} steps")
+            return
+        idle = idle + 1 if not new_posts else 0
+        if idle >= SCROLL_IDLE_STEPS:
+            logger.info(f"Scrolling reached the end of the feed after {steps} steps")
+            return
+        if steps >= max_steps:
+            logger.info(f"Scrolling stopped after {steps} steps (limit reached)")
+            return
+        
+        # Scroll and wait for the next page of posts to be rendered; each step is one capture stage
+        with stage_deadline("capture"):
+            pending = page.evaluate(PENDING_POST_LINKS_JS)
+            page.evaluate(SCROLL_TO_END_JS)
+            try:
+                page.wait_for_function(MORE_POST_LINKS_JS, arg=pending, timeout=step_timeout)
+            except PlaywrightTimeoutError:
+                logger.debug("No new posts loaded within %sms", step_timeout)
+            time.sleep(random.uniform(0.5, 1.5))
+            steps += 1
+            
+            result = page.evaluate(EXTRACT_POSTS_JS, options)
+        options["knownDatetime"] = result.get("knownDatetime")
+        posts = result["posts"]
+        logger.debug("Scroll step %d found %d new posts", steps, len(posts))
+
+def posts_from_page_result(result: dict, stop_at_id: str = None):
+    """
+    Turn the result of EXTRACT_POSTS_JS into (head, posts), preferring the JSON script
+    blobs over the DOM heuristic exactly like extract_posts does.
+    """
+    scripts = [({"id": script["id"]} if script.get("id") else {}, script["text"]) for script in result["scripts"]]
+    posts = posts_from_json_scripts(scripts, stop_at_id, lambda: result["profileUsername"])
+    if posts is None:
+        posts = result["posts"]
+    return result["head"], posts
 
 def extract_profile_username(soup):
     import re
@@ -72,16 +320,67 @@ def extract_profile_username(soup):
             return a.get_text(strip=True)
     return None
 
-def extract_posts(html: str):
-    soup = BeautifulSoup(html, "html.parser")
-    profile_username = extract_profile_username(soup)
-    logger.debug("Profile username: %s", profile_username)
+# Post permalinks as they appear in raw HTML attributes (no trailing /media)
+RAW_POST_LINK_RE = re.compile(r"""href=["'][^"']*?/@[\w.]+/post/([A-Za-z0-9_-]+)["']""")
+
+def leading_post_ids(html: str, limit: int = 5):
+    """
+    Return the IDs of the first `limit` distinct post permalinks in page order.
+    Scans the raw HTML string, so it costs almost nothing compared to extract_posts.
+    """
+    ids = []
+    for match in RAW_POST_LINK_RE.finditer(html):
+        post_id = match.group(1)
+        if post_id not in ids:
+            ids.append(post_id)
+            if len(ids) >= limit:
+                break
+    return ids
+
+def _truncate_at(posts, stop_at_id):
+    """Drop the post with stop_at_id and everything after it (see iter_until_known for pinned posts)."""
+    return list(iter_until_known(posts, stop_at_id))
+
+def extract_posts_from_embedded_json(html: str, stop_at_id: str = None):
+    """
+    Fast path: decode posts from JSON script blobs found by scanning the raw HTML string.
+    Understands __NEXT_DATA__ (used in unit tests) and Threads' embedded post data.
+    Returns None when no usable blob is found, so the caller falls back to the DOM heuristic.
+    """
+    return posts_from_json_scripts(
+        iter_json_scripts(html),
+        stop_at_id,
+        # Only build a DOM when a post needs the profile username as fallback
+        lambda: extract_profile_username(parse_html(html)),
+    )
 
-    # Check for JSON data first (used in unit tests)
-    script = soup.find("script", id="__NEXT_DATA__", type="application/json")
-    if script and script.string:
+def posts_from_json_scripts(scripts, stop_at_id: str = None, get_profile_username=None):
+    """
+    Convert (attrs, text) pairs of JSON script blobs into posts, or None if none is usable.
+    get_profile_username is called lazily for __NEXT_DATA__ posts that lack a user.
+    """
+    next_data = None
+    payloads = []
+    for attrs, text in scripts:
+        if attrs.get("id") == "__NEXT_DATA__":
+            # Like soup.find, only the first __NEXT_DATA__ script counts
+            if next_data is None:
+                next_data = text
+            continue
+        if '"taken_at"' not in text:
+            continue
+        try:
+            payloads.append(json.loads(text))
+        except ValueError as e:
+            logger.debug("Skipping undecodable JSON script blob: %s", e)
+
+    if next_data:
         try:
-            data = json.loads(script.string)
+            data = json.loads(next_data)
+            raw_posts = data.get("posts", [])
+            profile_username = None
+            if get_profile_username and any(not p.get("user") for p in raw_posts):
+                profile_username = get_profile_username()
             posts = [
                 {
                     "id": p.get("id"),
@@ -90,20 +389,60 @@ def extract_posts(html: str):
                     "content": p.get("content"),
                     "image": p.get("image"),
                 }
-                for p in data.get("posts", [])
+                for p in raw_posts
             ]
+            posts = _truncate_at(posts, stop_at_id)
             logger.debug("Extracted %d posts from JSON data.", len(posts))
             return posts
         except (ValueError, KeyError, TypeError) as e:
             logger.debug("Failed to extract posts from JSON data: %s", e)
-            pass
 
-    posts = []
-    # Stricter regex: /@username/post/<id> (no trailing /media)
-    post_link_re = re.compile(r"/@[\w.]+/post/[A-Za-z0-9_-]+$")
-    post_links = soup.find_all("a", href=post_link_re)
+    threads_posts = posts_from_payloads(payloads)
+    if threads_posts:
+        posts = _truncate_at(threads_posts, stop_at_id)
+        logger.debug("Extracted %d posts from embedded JSON blobs.", len(posts))
+        return posts
+
+    return None
+
+def extract_posts(html: str, stop_at_id: str = None):
+    """
+    Extract posts from a profile page.
+    If stop_at_id is given, extraction stops at that (already stored) post and
+    only the posts in front of it are returned.
+    """
+    posts = list(iter_posts(html, stop_at_id))
+    logger.debug("Extracted %d posts.", len(posts))
+    return posts
+
+def iter_posts(html: str, stop_at_id: str = None):
+    """
+    Streaming extract_posts: yields posts in page order as they are found, so consumers
+    can normalize, dedupe and write them while the rest of the page is still being read.
+    """
+    posts = extract_posts_from_embedded_json(html, stop_at_id)
+    if posts is not None:
+        yield from posts
+        return
+    quoted_ids = set()
+    yield from iter_until_known(_iter_dom_posts(html, stop_at_id, quoted_ids), stop_at_id,
+                                lambda post: post.get("id") in quoted_ids)
+
+def _iter_dom_posts(html: str, stop_at_id: str = None, quoted_ids: set = None):
+    """
+    DOM heuristic behind iter_posts. The stored post stop_at_id is always yielded so it can be
+    recognized; IDs of permalinks quoted inside an earlier link's post container go to quoted_ids.
+    """
+    soup = parse_html(html)
+    index = DomIndex(soup)
+    profile_username = index.profile_username()
+    logger.debug("Profile username: %s", profile_username)
+
+    post_links = index.post_links()
     logger.debug("Found %d post permalinks.", len(post_links))
     date_re = re.compile(r"\d{2}/\d{2}/\d{2}")
+    # Quoted posts put several permalinks in one container; compute each container once
+    containers = {}
     for link in post_links:
         post = {}
         # ID from permalink
@@ -111,7 +450,7 @@ def extract_posts(html: str):
         if m:
             post["id"] = m.group(1)
         # Datetime: <time> tag inside the link
-        time_tag = link.find("time", datetime=True)
+        time_tag = index.first_time(link)
         post["datetime"] = time_tag["datetime"] if time_tag else None
         # Walk up the tree until we reach the post container
         ancestor = link
@@ -122,80 +461,49 @@ def extract_posts(html: str):
                 ancestor = ancestor.parent
             else:
                 break
-        logger.debug("Ancestor tag for permalink: <%s>", ancestor.name)
-        # Username: first <a href="/@username"> in ancestor's subtree
-        username = None
-        user_a = ancestor.find("a", href=re.compile(r"/@[\w.]+$"))
-        if user_a:
-            username_span = user_a.find("span")
-            if username_span:
-                username = username_span.get_text(strip=True)
-            else:
-                username = user_a.get_text(strip=True)
-        if not username:
-            user_span = ancestor.find("span", string=re.compile(r"^[A-Za-z0-9_.]+$"))
-            if user_span:
-                username = user_span.get_text(strip=True)
-        # Fallback to profile username if not found
-        if not username:
-            username = profile_username
-        logger.debug("Username found: %s", username)
+        if id(ancestor) not in containers:
+            containers[id(ancestor)] = _container_fields(index, ancestor, profile_username, date_re)
+        elif quoted_ids is not None and post.get("id") and ancestor.has_attr("data-pressable-container"):
+            quoted_ids.add(post["id"])
+        username, content, image_url = containers[id(ancestor)]
         post["user"] = username
-        # Content: for each <span> in ancestor, not inside <a> or <time>, use span.get_text(strip=True)
-        content = None
-        max_len = 0
-        def valid_text(text):
-            if not text:
-                return False
-            if text == username:
-                return False
-            if date_re.fullmatch(text):
-                return False
-            return True
-        for span in ancestor.find_all("span"):
-            # Skip if inside <a> or <time>
-            parent = span.parent
-            skip = False
-            while parent and parent != ancestor:
-                if parent.name in ("a", "time"):
-                    skip = True
-                    break
-                parent = parent.parent
-            if skip:
-                continue
-            text = span.get_text(strip=True)
-            if valid_text(text) and len(text) > max_len:
-                content = text
-                max_len = len(text)
-        logger.debug("Content found: %s", content)
         post["content"] = content
-        # Image: use extract_post_image helper
-        image_url = extract_post_image(ancestor)
         post["image"] = image_url
         # Only keep posts with both username and content
-        if post["user"] and post["content"]:
-            posts.append(post)
+        if (post["user"] and post["content"]) or (stop_at_id and post.get("id") == stop_at_id):
+            yield post
         else:
             logger.debug("Skipped post: user=%s content=%s", post['user'], post['content'])
-    logger.debug("Extracted %d posts.", len(posts))
-    return posts
+
+def _container_fields(index: DomIndex, ancestor, profile_username, date_re):
+    """Username, content and image of a post container."""
+    logger.debug("Ancestor tag for permalink: <%s>", ancestor.name)
+    # Username: first <a href="/@username"> in the container, else a bare username span,
+    # else the profile username
+    username = index.username(ancestor) or profile_username
+    logger.debug("Username found: %s", username)
+    # Content: longest span text in the container, ignoring spans inside <a> or <time>
+    content = None
+    max_len = 0
+    for span in index.content_spans(ancestor):
+        text = index.text(span)
+        if not text or text == username or date_re.fullmatch(text):
+            continue
+        if len(text) > max_len:
+            content = text
+            max_len = len(text)
+    logger.debug("Content found: %s", content)
+    return username, content, index.image(ancestor)
+
+def extract_posts_job(html: str, stop_at_id: str = None):
+    """
+    extract_posts for a parse worker process.
+    Returns (posts, seconds spent parsing) so the parent can record the parse time.
+    """
+    started = time.time()
+    posts = extract_posts(html, stop_at_id=stop_at_id)
+    return posts, time.time() - started
 
 def scrape_threads():
     html = download_html_playwright(USER_URL)
     return extract_posts(html)
-
-def extract_post_image(ancestor):
-    import re
-    # Prefer <img> inside <a> with /media in href
-    for a in ancestor.find_all("a", href=True):
-        if "/media" in a["href"]:
-            img = a.find("img", src=True)
-            if img:
-                return img["src"]
-    # Otherwise, find all <img> tags not inside <a> with /@username in href
-    for img in ancestor.find_all("img", src=True):
-        parent_a = img.find_parent("a", href=True)
-        if parent_a and re.match(r"^/@[A-Za-z0-9_.]+$", parent_a["href"]):
-            continue  # skip profile image
-        return img["src"]
-    return None
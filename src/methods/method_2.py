@@ -0,0 +1,133 @@
+from src.browser_manager import BrowserManager, get_browser_manager
+from src.async_browser_manager import AsyncBrowserManager
+from src.methods.json_posts import embedded_json_payloads, parse_json_payloads, posts_from_payloads
+from src.methods.page_loading import load_profile_page, load_profile_page_async
+from src.performance_monitor import monitor_operation, get_performance_monitor
+from src.watchdog import async_stage_deadline, stage_deadline
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Method 2: read posts from the JSON/GraphQL responses the profile page loads itself,
+# instead of serializing and re-parsing the rendered DOM.
+
+POST_PAYLOAD_URL_MARKERS = ("/graphql", "/api/")
+
+def is_post_payload_response(response) -> bool:
+    """
+    Return True for responses that may carry post lists: background JSON responses,
+    and the profile document itself, whose embedded JSON blobs hold the first page of posts.
+    """
+    if response.request.resource_type == "document":
+        return response.request.is_navigation_request()
+    if response.request.resource_type not in ("xhr", "fetch"):
+        return False
+    if not any(marker in response.url for marker in POST_PAYLOAD_URL_MARKERS):
+        return False
+    content_type = response.headers.get("content-type", "")
+    return "json" in content_type or "javascript" in content_type or "text/html" in content_type
+
+def profile_username_from_url(url: str):
+    """Extract the handle from a https://www.threads.net/@handle URL."""
+    if "/@" not in url:
+        return None
+    return url.split("/@", 1)[1].split("/", 1)[0].split("?", 1)[0] or None
+
+def posts_from_responses(bodies, url: str):
+    """Convert captured response bodies into post dicts."""
+    payloads = []
+    for body in bodies:
+        if body.lstrip().startswith("<"):
+            payloads.extend(embedded_json_payloads(body))
+        else:
+            payloads.extend(parse_json_payloads(body))
+    posts = posts_from_payloads(payloads, profile_username_from_url(url))
+    logger.debug("Extracted %d posts from %d JSON payloads.", len(posts), len(payloads))
+    return posts
+
+@monitor_operation("method_2_download")
+def download_posts_from_network(url: str, profile_name: str = "threads_scraper", session_name: str = None, browser_manager: BrowserManager = None):
+    """
+    Load a profile page and return posts decoded from its JSON network responses.
+
+    Args:
+        url: The URL to scrape
+        profile_name: Browser profile name for persistence
+        session_name: Session name for cookie/storage restoration
+        browser_manager: Browser manager to use (defaults to the global instance)
+
+    Returns:
+        List of post dicts, in the same format as method_1.extract_posts
+    """
+    if browser_manager is None:
+        browser_manager = get_browser_manager()
+
+    responses = []
+    page = browser_manager.create_page(profile_name, session_name)
+    page.on("response", lambda response: responses.append(response) if is_post_payload_response(response) else None)
+
+    try:
+        # Rendered posts mean the responses carrying them have arrived
+        load_profile_page(page, url)
+
+        capture_start = time.time()
+        bodies = []
+        with stage_deadline("capture"):
+            for response in responses:
+                try:
+                    bodies.append(response.text())
+                except Exception as e:
+                    logger.debug("Could not read response body from %s: %s", response.url, e)
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
+
+        # Save session for future use
+        if session_name:
+            browser_manager.save_current_session(session_name)
+
+        posts = posts_from_responses(bodies, url)
+        logger.info(f"Captured {len(posts)} posts from {len(bodies)} JSON responses for {url}")
+        return posts
+
+    except Exception as e:
+        logger.error(f"Error capturing posts from {url}: {e}")
+        raise
+    finally:
+        page.close()
+
+@monitor_operation("method_2_download")
+async def download_posts_from_network_async(url: str, profile_name: str = "threads_scraper", session_name: str = None, browser_manager: AsyncBrowserManager = None):
+    """Async counterpart of download_posts_from_network for the asyncio engine."""
+    responses = []
+    page = None
+    try:
+        page = await browser_manager.create_page(profile_name, session_name)
+        page.on("response", lambda response: responses.append(response) if is_post_payload_response(response) else None)
+
+        # Rendered posts mean the responses carrying them have arrived
+        await load_profile_page_async(page, url)
+
+        capture_start = time.time()
+        bodies = []
+        async with async_stage_deadline("capture"):
+            for response in responses:
+                try:
+                    bodies.append(await response.text())
+                except Exception as e:
+                    logger.debug("Could not read response body from %s: %s", response.url, e)
+        get_performance_monitor().record_duration("page_capture", time.time() - capture_start)
+
+        # Save session for future use
+        if session_name:
+            await browser_manager.save_context_session(page.context, session_name)
+
+        posts = posts_from_responses(bodies, url)
+        logger.info(f"Captured {len(posts)} posts from {len(bodies)} JSON responses for {url}")
+        return posts
+
+    except Exception as e:
+        logger.error(f"Error capturing posts from {url}: {e}")
+        raise
+    finally:
+        if page:
+            await browser_manager.close_context(page.context)
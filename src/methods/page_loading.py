@@ -0,0 +1,84 @@
+"""
+Loading a profile page until its posts are rendered, shared by the extraction methods.
+
+Waiting for "networkidle" rarely works on Threads: long-polling connections keep the
+network busy, so the wait often only ends at its timeout. Pages are instead considered
+ready once post permalinks are present and stable (POSTS_READY_JS). The human-like
+pause is a dwell budget per page: time spent navigating and waiting already counts
+toward it, so the fixed sleeps no longer add up on top of slow loads.
+
+Each stage is recorded with PerformanceMonitor: page_navigate, page_ready, page_dwell,
+plus page_capture in the callers that read the page afterwards. Navigation and settling
+(readiness and dwell) run under the watchdog's navigate and settle deadlines.
+"""
+import asyncio
+import logging
+import random
+import time
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from src.config import READY_STABLE_MS, READY_TIMEOUT, DWELL_MIN, DWELL_MAX
+from src.methods.page_scripts import POSTS_READY_JS
+from src.performance_monitor import get_performance_monitor
+from src.watchdog import async_stage_deadline, stage_deadline
+
+logger = logging.getLogger(__name__)
+
+# Small scroll after the posts are rendered, to simulate human interaction
+HUMAN_SCROLL_JS = "window.scrollTo(0, Math.random() * 500)"
+
+def load_profile_page(page, url: str) -> bool:
+    """
+    Navigate to a profile page and return once its posts are rendered and the dwell budget is spent.
+    Returns False if no stable post permalinks appeared within READY_TIMEOUT.
+    """
+    monitor = get_performance_monitor()
+    dwell = random.uniform(DWELL_MIN, DWELL_MAX)
+    started = time.time()
+
+    # Navigate to the page
+    logger.info(f"Navigating to: {url}")
+    with stage_deadline("navigate"):
+        page.goto(url, timeout=60000, wait_until="domcontentloaded")
+    navigated = monitor.record_duration("page_navigate", time.time() - started)
+
+    with stage_deadline("settle"):
+        ready = True
+        try:
+            page.wait_for_function(POSTS_READY_JS, arg=READY_STABLE_MS, polling=100, timeout=READY_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            logger.warning(f"No stable post permalinks on {url} after {READY_TIMEOUT:.0f}s, capturing the page as is")
+            ready = False
+        monitor.record_duration("page_ready", time.time() - started - navigated)
+
+        page.evaluate(HUMAN_SCROLL_JS)
+        remaining = max(0.0, dwell - (time.time() - started))
+        time.sleep(remaining)
+    monitor.record_duration("page_dwell", remaining)
+    return ready
+
+async def load_profile_page_async(page, url: str) -> bool:
+    """Async counterpart of load_profile_page."""
+    monitor = get_performance_monitor()
+    dwell = random.uniform(DWELL_MIN, DWELL_MAX)
+    started = time.time()
+
+    # Navigate to the page
+    logger.info(f"Navigating to: {url}")
+    async with async_stage_deadline("navigate"):
+        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+    navigated = monitor.record_duration("page_navigate", time.time() - started)
+
+    async with async_stage_deadline("settle"):
+        ready = True
+        try:
+            await page.wait_for_function(POSTS_READY_JS, arg=READY_STABLE_MS, polling=100, timeout=READY_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            logger.warning(f"No stable post permalinks on {url} after {READY_TIMEOUT:.0f}s, capturing the page as is")
+            ready = False
+        monitor.record_duration("page_ready", time.time() - started - navigated)
+
+        await page.evaluate(HUMAN_SCROLL_JS)
+        remaining = max(0.0, dwell - (time.time() - started))
+        await asyncio.sleep(remaining)
+    monitor.record_duration("page_dwell", remaining)
+    return ready
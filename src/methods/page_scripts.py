@@ -0,0 +1,261 @@
+"""
+JavaScript evaluated inside the profile page with page.evaluate.
+
+EXTRACT_POSTS_JS is a port of method_1's permalink → container → username/content/image
+heuristic. Running it in the page means only a few kilobytes of post records cross the
+CDP connection, instead of the serialized DOM that extract_posts would re-parse.
+It mirrors BeautifulSoup's semantics where they differ from the DOM's:
+  - get_text(strip=True) joins every stripped text node, skipping <script>/<style> text
+  - tag.string is the only child's string, followed through single-child tags
+  - attribute values are read raw (getAttribute), not resolved against the page URL
+
+The result is {"head", "profileUsername", "scripts", "posts", "reachedStop", "knownDatetime"}:
+the leading permalink IDs, the JSON script blobs extract_posts would decode first, the DOM
+heuristic's posts, whether the permalink of options.stopAtId was reached, and the datetime of
+that post once it was skipped as pinned (pass it back as options.knownDatetime on later calls).
+
+For infinite scrolling, options.skipProcessed skips permalinks already handled by an
+earlier call and marks the ones handled now (data-scraped), and options.prune then
+removes the processed post containers so the DOM does not grow with every scroll.
+options.collectScripts = false leaves "scripts" empty, for the steps after the first.
+"""
+
+EXTRACT_POSTS_JS = r"""
+(options) => {
+  const stopAtId = options.stopAtId || null;
+  const headLimit = options.headLimit || 5;
+  const skipProcessed = Boolean(options.skipProcessed);
+  const prune = Boolean(options.prune);
+  const collectScripts = options.collectScripts !== false;
+  const PROCESSED_ATTR = "data-scraped";
+
+  // Python's \w is Unicode-aware: letters, numbers and the underscore
+  const POST_LINK_RE = /\/@[\p{L}\p{N}_.]+\/post\/[A-Za-z0-9_-]+$/u;
+  const HEAD_LINK_RE = /^[^"']*?\/@[\p{L}\p{N}_.]+\/post\/([A-Za-z0-9_-]+)$/u;
+  const POST_ID_RE = /\/post\/([A-Za-z0-9_-]+)$/;
+  const USER_LINK_RE = /\/@[\p{L}\p{N}_.]+$/u;
+  const PROFILE_LINK_RE = /^\/@[A-Za-z0-9_.]+$/;
+  const USERNAME_RE = /^[A-Za-z0-9_.]+\n?$/;
+  const DATE_RE = /^\d{2}\/\d{2}\/\d{2}$/;
+
+  const textOf = (el) => {
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+      const parentName = node.parentNode.localName;
+      if (parentName === "script" || parentName === "style") continue;
+      const text = node.data.trim();
+      if (text) parts.push(text);
+    }
+    return parts.join("");
+  };
+
+  const stringOf = (el) => {
+    if (el.childNodes.length !== 1) return null;
+    const child = el.childNodes[0];
+    if (child.nodeType === Node.ELEMENT_NODE) return stringOf(child);
+    if (child.nodeType === Node.TEXT_NODE || child.nodeType === Node.COMMENT_NODE) return child.data;
+    return null;
+  };
+
+  const hrefOf = (el) => el.getAttribute("href");
+
+  const profileUsername = (() => {
+    for (const a of document.querySelectorAll("a[href]")) {
+      if (PROFILE_LINK_RE.test(hrefOf(a))) {
+        const span = a.querySelector("span");
+        return textOf(span || a);
+      }
+    }
+    return null;
+  })();
+
+  const containerOf = (link) => {
+    let ancestor = link;
+    for (let i = 0; i < 10; i++) {
+      if (ancestor.hasAttribute("data-pressable-container")) break;
+      if (!ancestor.parentElement) break;
+      ancestor = ancestor.parentElement;
+    }
+    return ancestor;
+  };
+
+  const usernameOf = (container) => {
+    for (const a of container.querySelectorAll("a[href]")) {
+      if (USER_LINK_RE.test(hrefOf(a))) {
+        const span = a.querySelector("span");
+        const username = textOf(span || a);
+        if (username) return username;
+        break;
+      }
+    }
+    for (const span of container.querySelectorAll("span")) {
+      const string = stringOf(span);
+      if (string !== null && USERNAME_RE.test(string)) return textOf(span);
+    }
+    return null;
+  };
+
+  const contentOf = (container, username) => {
+    let content = null;
+    let maxLen = 0;
+    for (const span of container.querySelectorAll("span")) {
+      let parent = span.parentElement;
+      let skip = false;
+      while (parent && parent !== container) {
+        if (parent.localName === "a" || parent.localName === "time") {
+          skip = true;
+          break;
+        }
+        parent = parent.parentElement;
+      }
+      if (skip) continue;
+      const text = textOf(span);
+      if (!text || text === username || DATE_RE.test(text)) continue;
+      // Count code points like Python's len()
+      const length = [...text].length;
+      if (length > maxLen) {
+        content = text;
+        maxLen = length;
+      }
+    }
+    return content;
+  };
+
+  const imageOf = (container) => {
+    for (const a of container.querySelectorAll("a[href]")) {
+      if (hrefOf(a).includes("/media")) {
+        const img = a.querySelector("img[src]");
+        if (img) return img.getAttribute("src");
+      }
+    }
+    for (const img of container.querySelectorAll("img[src]")) {
+      const parentA = img.parentElement && img.parentElement.closest("a[href]");
+      if (parentA && PROFILE_LINK_RE.test(hrefOf(parentA))) continue;
+      return img.getAttribute("src");
+    }
+    return null;
+  };
+
+  const head = [];
+  for (const el of document.querySelectorAll("[href]")) {
+    if (head.length >= headLimit) break;
+    const match = HEAD_LINK_RE.exec(hrefOf(el));
+    if (match && !head.includes(match[1])) head.push(match[1]);
+  }
+
+  const scripts = [];
+  let nextDataSeen = false;
+  for (const script of collectScripts ? document.querySelectorAll("script[type]") : []) {
+    if (script.getAttribute("type") !== "application/json") continue;
+    const id = script.getAttribute("id");
+    const text = script.textContent;
+    if (id === "__NEXT_DATA__") {
+      if (nextDataSeen) continue;
+      nextDataSeen = true;
+    } else if (!text.includes('"taken_at"')) {
+      continue;
+    }
+    scripts.push({ id, text });
+  }
+
+  // Like iter_until_known: the stored post is skipped instead of stopping when it leads the
+  // feed and a newer post follows it (it is pinned); extraction then stops at the first post
+  // not newer than it
+  const isNewer = (datetime, than) => Boolean(datetime && than && datetime > than);
+  const posts = [];
+  const processed = new Set();
+  let reachedStop = false;
+  let pending = null;
+  let knownDatetime = options.knownDatetime || null;
+  let previousContainer = null;
+  // Only the first post of the page can be pinned, not the first one of a later scroll step
+  let seenPost = skipProcessed && document.querySelector(`[${PROCESSED_ATTR}]`) !== null;
+  for (const link of document.querySelectorAll("a[href]")) {
+    const href = hrefOf(link);
+    if (!POST_LINK_RE.test(href)) continue;
+    const id = POST_ID_RE.exec(href)[1];
+    const container = containerOf(link);
+    if (skipProcessed && (link.hasAttribute(PROCESSED_ATTR) || container.hasAttribute(PROCESSED_ATTR))) continue;
+    const time = link.querySelector("time[datetime]");
+    const datetime = time ? time.getAttribute("datetime") : null;
+    // A permalink quoted inside the previous link's post is older and never decides the stop
+    const quote = container === previousContainer && container.hasAttribute("data-pressable-container");
+    previousContainer = container;
+    if (quote && pending) continue;
+    if (!quote) {
+      if (pending) {
+        if (!isNewer(datetime, pending.datetime)) {
+          reachedStop = true;
+          break;
+        }
+        knownDatetime = pending.datetime;
+        for (const el of pending.elements) processed.add(el);
+        pending = null;
+      }
+      if (knownDatetime && !isNewer(datetime, knownDatetime)) {
+        reachedStop = true;
+        break;
+      }
+    }
+    // Only real post containers are marked: a fallback ancestor may hold the whole feed
+    const elements = container.hasAttribute("data-pressable-container") ? [link, container] : [link];
+    const leading = !seenPost;
+    if (!quote) seenPost = true;
+    if (!quote && stopAtId && id === stopAtId) {
+      if (!leading) {
+        reachedStop = true;
+        break;
+      }
+      pending = { datetime, elements };
+      continue;
+    }
+    if (skipProcessed) {
+      for (const el of elements) processed.add(el);
+    }
+    const user = usernameOf(container) || profileUsername;
+    const content = contentOf(container, user);
+    if (user && content) {
+      posts.push({
+        id,
+        datetime,
+        user,
+        content,
+        image: imageOf(container),
+      });
+    }
+  }
+
+  // The stored post was the last one found
+  if (pending) reachedStop = true;
+  if (!skipProcessed) processed.clear();
+
+  for (const el of processed) el.setAttribute(PROCESSED_ATTR, "");
+  if (prune) {
+    for (const el of processed) {
+      if (el.hasAttribute("data-pressable-container")) el.remove();
+    }
+  }
+
+  return { head, profileUsername, scripts, posts, reachedStop, knownDatetime };
+}
+"""
+
+# Infinite scrolling: count post permalinks not handled yet, scroll to the end of the feed,
+# and (with wait_for_function) wait until more permalinks than before have been loaded
+PENDING_POST_LINKS_JS = """() => document.querySelectorAll('a[href*="/post/"]:not([data-scraped])').length"""
+SCROLL_TO_END_JS = "() => window.scrollTo(0, document.body.scrollHeight)"
+MORE_POST_LINKS_JS = """(pending) => document.querySelectorAll('a[href*="/post/"]:not([data-scraped])').length > pending"""
+
+# Readiness: true once post permalinks are present and their count has not changed for
+# `stableMs` milliseconds. Polled by wait_for_function; state lives on the page's window.
+POSTS_READY_JS = """(stableMs) => {
+  const count = document.querySelectorAll('a[href*="/post/"]').length;
+  const now = performance.now();
+  const state = window.__postsReady || (window.__postsReady = { count: -1, since: now });
+  if (count !== state.count) {
+    state.count = count;
+    state.since = now;
+  }
+  return count > 0 && now - state.since >= stableMs;
+}"""
@@ -0,0 +1,51 @@
+"""
+HTML parser backend for method_1's BeautifulSoup trees.
+
+BeautifulSoup can build the same tree with different parsers. The pure-Python
+"html.parser" was the only one used so far, and it dominates CPU time on multi-MB
+profile pages. lxml's C parser builds the tree roughly twice as fast. HTML_PARSER
+picks the backend: "auto" takes the fastest installed one, any other value names a
+BeautifulSoup parser, and "html.parser" is always available as the fallback.
+"""
+import logging
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from src.config import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+# Fastest first; html.parser ships with Python so "auto" always resolves
+PREFERRED_PARSERS = ("lxml", "html.parser")
+FALLBACK_PARSER = "html.parser"
+
+def is_parser_available(name: str) -> bool:
+    """Return True if BeautifulSoup has a tree builder for this parser installed."""
+    return builder_registry.lookup(name) is not None
+
+def available_parsers() -> list:
+    """The preferred parsers that are installed, fastest first."""
+    return [name for name in PREFERRED_PARSERS if is_parser_available(name)]
+
+def resolve_parser(name: str = None) -> str:
+    """Resolve a configured parser name to an installed one."""
+    name = (name or HTML_PARSER).strip().lower()
+    if name == "auto":
+        return available_parsers()[0]
+    if is_parser_available(name):
+        return name
+    logger.warning(f"HTML parser '{name}' is not installed, falling back to {FALLBACK_PARSER}")
+    return FALLBACK_PARSER
+
+_parser = None
+
+def get_parser() -> str:
+    """The parser used by parse_html, resolved once from HTML_PARSER."""
+    global _parser
+    if _parser is None:
+        _parser = resolve_parser()
+        logger.debug("Using HTML parser: %s", _parser)
+    return _parser
+
+def parse_html(html: str, parser: str = None) -> BeautifulSoup:
+    """Parse a page with the configured (or given) parser backend."""
+    return BeautifulSoup(html, parser or get_parser())
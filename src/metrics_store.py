@@ -0,0 +1,232 @@
+"""
+Append-only store for PerformanceMonitor's duration samples.
+
+Samples are buffered in memory and appended in batches (METRICS_FLUSH_SIZE samples or
+METRICS_FLUSH_INTERVAL seconds, and at exit) to JSON Lines segments in metrics/, one line
+per sample. Each process appends to its own segment, started anew past SEGMENT_MAX_BYTES.
+Once there are more than METRICS_MAX_SEGMENTS segments, the others are compacted: their
+samples are folded into daily latency histograms per operation (rollups.json) and the
+segments deleted, so raw samples never exceed METRICS_MAX_SEGMENTS segments. Samples and
+rollups older than METRICS_RETENTION_DAYS are dropped, and skipped by reads as well.
+
+If appending fails (e.g. a full or read-only volume), it is retried after METRICS_FLUSH_INTERVAL
+and at most BUFFER_MAX_SAMPLES samples are kept in memory meanwhile; older ones are dropped
+and reported through on_dropped.
+
+Compaction takes the directory lock exclusively and appends take it shared, so no batch is
+lost between reading a segment and deleting it.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+from src.latency_histogram import LatencyHistogram
+from src.config import METRICS_FLUSH_SIZE, METRICS_FLUSH_INTERVAL, METRICS_RETENTION_DAYS, METRICS_MAX_SEGMENTS
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "metrics-"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+ROLLUPS_FILE = "rollups.json"
+# Samples kept in memory while appends fail
+BUFFER_MAX_SAMPLES = 10000
+
+def _day(timestamp: float) -> int:
+    return int(timestamp // 86400)
+
+class MetricsStore:
+    """
+    Buffered, append-only JSON Lines segments of {"operation", "duration", "timestamp", optional "labels"}
+    samples, and daily rollups of the compacted ones.
+    """
+
+    def __init__(self, directory: Path, flush_size: int = METRICS_FLUSH_SIZE,
+                 flush_interval: float = METRICS_FLUSH_INTERVAL,
+                 retention_days: float = METRICS_RETENTION_DAYS, max_segments: int = METRICS_MAX_SEGMENTS,
+                 on_dropped: Optional[Callable[[int], None]] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.max_segments = max(1, max_segments)
+        # Called with the number of samples dropped from a full buffer
+        self.on_dropped = on_dropped
+        self._warned_dropped = False
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        # After a failed append, appends wait until then before trying to write again
+        self._retry_at = 0.0
+        self._segment = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def append(self, sample: dict):
+        """Buffer a sample; flushes when the batch is full or old enough."""
+        with self._lock:
+            self._buffer.append(sample)
+            if time.monotonic() < self._retry_at:
+                self._trim_buffer_locked()
+                return
+            if len(self._buffer) < self.flush_size and time.monotonic() - self._last_flush < self.flush_interval:
+                return
+            self._flush_locked()
+
+    def flush(self):
+        """Append the buffered samples to this process's segment."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        lines = "".join(json.dumps(sample) + "\n" for sample in self._buffer)
+        try:
+            with self._directory_lock(fcntl.LOCK_SH):
+                segment = self._active_segment()
+                with open(segment, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+            self._buffer = []
+            self._retry_at = 0.0
+        except Exception as e:
+            logger.warning(f"Failed to save performance metrics: {e}")
+            self._retry_at = time.monotonic() + self.flush_interval
+            self._trim_buffer_locked()
+            return
+        if len(self.segments()) > self.max_segments:
+            self.compact()
+
+    def _trim_buffer_locked(self):
+        """Drop the oldest buffered samples beyond BUFFER_MAX_SAMPLES while appends fail."""
+        dropped = len(self._buffer) - BUFFER_MAX_SAMPLES
+        if dropped <= 0:
+            return
+        del self._buffer[:dropped]
+        if not self._warned_dropped:
+            logger.warning(f"Performance metrics cannot be saved, keeping only the latest {BUFFER_MAX_SAMPLES} samples")
+            self._warned_dropped = True
+        if self.on_dropped:
+            self.on_dropped(dropped)
+
+    def _active_segment(self) -> Path:
+        """This process's segment, started anew once it is full (or was compacted away)."""
+        if self._segment is None or (self._segment.exists() and self._segment.stat().st_size >= SEGMENT_MAX_BYTES):
+            self._segment = self.directory / f"{SEGMENT_PREFIX}{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}"
+        return self._segment
+
+    @contextmanager
+    def _directory_lock(self, operation: int):
+        with open(self.directory / ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, operation)
+            yield
+
+    def segments(self):
+        """Segment files, oldest first."""
+        return sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+    def _cutoff(self) -> Optional[float]:
+        return time.time() - self.retention_days * 86400 if self.retention_days else None
+
+    def _read_segment(self, segment: Path, cutoff: Optional[float]) -> Iterator[dict]:
+        try:
+            with open(segment, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        sample = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash mid-append
+                        continue
+                    if cutoff is None or sample.get("timestamp", 0) >= cutoff:
+                        yield sample
+        except FileNotFoundError:
+            # Compacted away by another process
+            return
+
+    def samples(self) -> Iterator[dict]:
+        """Retained samples not rolled up yet, stored and buffered, oldest segment first."""
+        cutoff = self._cutoff()
+        for segment in self.segments():
+            yield from self._read_segment(segment, cutoff)
+        with self._lock:
+            buffered = list(self._buffer)
+        yield from buffered
+
+    def _load_rollups(self) -> Dict[str, Dict[str, dict]]:
+        """Rollups as {day: {operation: histogram dict}}."""
+        try:
+            with open(self.directory / ROLLUPS_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable metrics rollups: {e}")
+            return {}
+
+    def rollups(self) -> Dict[str, LatencyHistogram]:
+        """Latency histogram of the rolled-up samples of each operation, over the retained days."""
+        cutoff = self._cutoff()
+        merged: Dict[str, LatencyHistogram] = {}
+        for day, operations in self._load_rollups().items():
+            if cutoff is not None and int(day) < _day(cutoff):
+                continue
+            for operation, histogram in operations.items():
+                merged.setdefault(operation, LatencyHistogram()).merge(LatencyHistogram.from_dict(histogram))
+        return merged
+
+    def compact(self):
+        """Roll up all segments except this process's active one into daily histograms and delete them."""
+        cutoff = self._cutoff()
+        try:
+            with self._directory_lock(fcntl.LOCK_EX):
+                segments = [segment for segment in self.segments() if segment != self._segment]
+                if not segments:
+                    return
+                histograms = {}
+                for day, operations in self._load_rollups().items():
+                    if cutoff is None or int(day) >= _day(cutoff):
+                        for operation, histogram in operations.items():
+                            histograms[(day, operation)] = LatencyHistogram.from_dict(histogram)
+                rolled_up = 0
+                for segment in segments:
+                    for sample in self._read_segment(segment, cutoff):
+                        key = (str(_day(sample.get("timestamp", 0))), sample["operation"])
+                        histograms.setdefault(key, LatencyHistogram()).record(sample["duration"])
+                        rolled_up += 1
+                rollups = {}
+                for (day, operation), histogram in histograms.items():
+                    rollups.setdefault(day, {})[operation] = histogram.to_dict()
+                rollups_path = self.directory / ROLLUPS_FILE
+                tmp_path = rollups_path.with_suffix(".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(rollups, f)
+                os.replace(tmp_path, rollups_path)
+                for segment in segments:
+                    segment.unlink()
+            logger.info(f"Rolled up {rolled_up} performance samples from {len(segments)} segments")
+        except Exception as e:
+            logger.warning(f"Failed to compact performance metrics: {e}")
+
+    def import_legacy(self, path: Path):
+        """Append the samples of a pre-store performance_metrics.json and delete it."""
+        try:
+            with open(path, 'r') as f:
+                metrics = json.load(f)
+            with self._lock:
+                for operation, measurements in metrics.items():
+                    for measurement in measurements:
+                        self._buffer.append({"operation": operation, "duration": measurement["duration"],
+                                             "timestamp": measurement.get("timestamp", 0)})
+                self._flush_locked()
+            path.unlink()
+            logger.info(f"Imported performance metrics from {path}")
+        except Exception as e:
+            logger.warning(f"Failed to import performance metrics from {path}: {e}")
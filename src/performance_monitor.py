@@ -1,110 +1,223 @@
-import os
 import time
 import logging
-import json
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
+from src.latency_histogram import LatencyHistogram
+from src.metrics_store import MetricsStore
+from src.utils import get_cache_dir
 
 logger = logging.getLogger(__name__)
 
+# Labels (e.g. account) added to every duration recorded in the current thread or asyncio task
+_context_labels: ContextVar[Dict[str, str]] = ContextVar("performance_labels", default={})
+
+# Entries shown in the slowest accounts and stages rankings
+SLOWEST_LIMIT = 5
+
 class PerformanceMonitor:
     """
     Monitor browser startup performance and optimization effectiveness.
     """
     
-    def __init__(self):
-        # Use local cache directory for development, Docker cache for production
-        if os.path.exists("/app/.cache"):
-            self.cache_dir = Path("/app/.cache")
-        else:
-            # Local development - use current directory
-            self.cache_dir = Path(".cache")
-        self.metrics_file = self.cache_dir / "performance_metrics.json"
-        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else get_cache_dir()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Per-run counters (e.g. blocked requests); kept in memory and logged with the summary
+        self.counters: Dict[str, float] = {}
+        # Duration samples, buffered and appended in batches
+        self.store = MetricsStore(self.cache_dir / "metrics",
+                                  on_dropped=lambda count: self.increment_counter("metrics_samples_dropped", count))
+        legacy_metrics_file = self.cache_dir / "performance_metrics.json"
+        if legacy_metrics_file.exists():
+            self.store.import_legacy(legacy_metrics_file)
+        # Per-run latency histograms by (operation, sorted label items)
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], LatencyHistogram] = {}
         
     def start_timer(self, operation: str) -> float:
         """Start timing an operation."""
         return time.time()
     
-    def end_timer(self, start_time: float, operation: str) -> float:
+    def end_timer(self, start_time: float, operation: str, labels: Optional[Dict[str, str]] = None) -> float:
         """End timing an operation and log the duration."""
-        duration = time.time() - start_time
+        return self.record_duration(operation, time.time() - start_time, labels)
+    
+    def record_duration(self, operation: str, duration: float, labels: Optional[Dict[str, str]] = None) -> float:
+        """Record a duration measured elsewhere (e.g. in a worker process) and log it."""
         logger.info(f"{operation} completed in {duration:.2f} seconds")
-        self._save_metric(operation, duration)
+        self.record_sample(operation, duration, labels)
         return duration
     
-    def _save_metric(self, operation: str, duration: float):
-        """Save performance metric to file."""
+    def record_sample(self, operation: str, duration: float, labels: Optional[Dict[str, str]] = None):
+        """Record a duration without logging it (e.g. for every stage of every account)."""
+        labels = {**_context_labels.get(), **(labels or {})}
+        key = (operation, tuple(sorted((name, str(value)) for name, value in labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(duration)
+        self._save_metric(operation, duration, labels)
+    
+    @contextmanager
+    def labels(self, **labels):
+        """Add labels (e.g. account=handle) to the durations recorded in this thread or task."""
+        token = _context_labels.set({**_context_labels.get(), **labels})
         try:
-            metrics = self._load_metrics()
-            if operation not in metrics:
-                metrics[operation] = []
-            
-            metrics[operation].append({
-                "duration": duration,
-                "timestamp": time.time()
-            })
-            
-            # Keep only last 100 measurements
-            if len(metrics[operation]) > 100:
-                metrics[operation] = metrics[operation][-100:]
-            
-            with open(self.metrics_file, 'w') as f:
-                json.dump(metrics, f, indent=2)
-                
-        except Exception as e:
-            logger.warning(f"Failed to save performance metric: {e}")
+            yield
+        finally:
+            _context_labels.reset(token)
     
-    def _load_metrics(self) -> Dict[str, Any]:
-        """Load existing performance metrics."""
+    def _save_metric(self, operation: str, duration: float, labels: Optional[Dict[str, str]] = None):
+        """Buffer a performance metric for the metrics store."""
+        sample = {"operation": operation, "duration": duration, "timestamp": time.time()}
+        if labels:
+            sample["labels"] = labels
+        self.store.append(sample)
+    
+    def get_history(self, operation: str) -> LatencyHistogram:
+        """
+        Latency histogram of an operation over the retained history: the store's daily rollups
+        plus the samples not rolled up yet (at most METRICS_MAX_SEGMENTS segments).
+        """
+        histogram = LatencyHistogram()
         try:
-            if self.metrics_file.exists():
-                with open(self.metrics_file, 'r') as f:
-                    return json.load(f)
+            rolled_up = self.store.rollups().get(operation)
+            if rolled_up is not None:
+                histogram.merge(rolled_up)
+            for sample in self.store.samples():
+                if sample["operation"] == operation:
+                    histogram.record(sample["duration"])
         except Exception as e:
             logger.warning(f"Failed to load performance metrics: {e}")
-        
-        return {}
+        return histogram
+    
+    def increment_counter(self, counter: str, amount: float = 1):
+        """Add to a per-run counter."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+    
+    def record_peak(self, counter: str, value: float):
+        """Keep the largest value seen this run (e.g. peak memory) as a per-run counter."""
+        with self._lock:
+            self.counters[counter] = max(self.counters.get(counter, value), value)
+    
+    def get_counters(self) -> Dict[str, float]:
+        """Get a snapshot of the per-run counters."""
+        with self._lock:
+            return dict(self.counters)
     
     def get_average_duration(self, operation: str) -> Optional[float]:
-        """Get average duration for an operation."""
-        metrics = self._load_metrics()
-        if operation in metrics and metrics[operation]:
-            durations = [m["duration"] for m in metrics[operation]]
-            return sum(durations) / len(durations)
-        return None
+        """Get average duration for an operation over the retained history."""
+        histogram = self.get_history(operation)
+        return histogram.total / histogram.count if histogram.count else None
+    
+    def _merged_histogram(self, operation: Optional[str] = None, **labels) -> LatencyHistogram:
+        """This run's histograms for an operation (any, if None) merged over the samples with the given labels."""
+        wanted = {name: str(value) for name, value in labels.items()}
+        merged = LatencyHistogram()
+        with self._lock:
+            for (name, items), histogram in self.histograms.items():
+                if operation is not None and name != operation:
+                    continue
+                if all(dict(items).get(label) == value for label, value in wanted.items()):
+                    merged.merge(histogram)
+        return merged
+    
+    def get_percentiles(self, operation: str, **labels) -> Optional[Dict[str, float]]:
+        """p50/p90/p99 (and count, total, average, max) of an operation this run, optionally for some labels."""
+        histogram = self._merged_histogram(operation, **labels)
+        return histogram.stats() if histogram.count else None
+    
+    def rank_slowest(self, label: str, operation: Optional[str] = None, by: str = "p90",
+                     limit: Optional[int] = SLOWEST_LIMIT, **labels) -> List[Tuple[str, Dict[str, float]]]:
+        """
+        Values of a label (e.g. account) with the slowest durations this run, by p50/p90/p99/total/max.
+        Only samples of the operation (if given) and with the other given labels are counted.
+        limit=None returns every value.
+        """
+        wanted = {name: str(value) for name, value in labels.items()}
+        by_value: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            for (name, items), histogram in self.histograms.items():
+                items = dict(items)
+                value = items.get(label)
+                if value is None or (operation is not None and name != operation):
+                    continue
+                if any(items.get(other) != expected for other, expected in wanted.items()):
+                    continue
+                by_value.setdefault(value, LatencyHistogram()).merge(histogram)
+        ranked = sorted(((value, histogram.stats()) for value, histogram in by_value.items()),
+                        key=lambda item: item[1][by], reverse=True)
+        return ranked[:limit]
     
     def get_performance_summary(self) -> Dict[str, Any]:
-        """Get a summary of all performance metrics."""
-        metrics = self._load_metrics()
+        """Get a summary of this run's performance metrics, from the in-memory histograms."""
+        by_operation: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            for (operation, _), histogram in self.histograms.items():
+                by_operation.setdefault(operation, LatencyHistogram()).merge(histogram)
         summary = {}
         
-        for operation, measurements in metrics.items():
-            if measurements:
-                durations = [m["duration"] for m in measurements]
+        for operation, histogram in by_operation.items():
+            if histogram.count:
+                stats = histogram.stats()
                 summary[operation] = {
-                    "average": sum(durations) / len(durations),
-                    "min": min(durations),
-                    "max": max(durations),
-                    "count": len(measurements)
+                    "average": stats["average"],
+                    "min": histogram.min,
+                    "max": histogram.max,
+                    "count": histogram.count,
+                    "p50": stats["p50"],
+                    "p90": stats["p90"],
+                    "p99": stats["p99"],
                 }
         
         return summary
     
     def log_performance_summary(self):
         """Log a summary of performance metrics."""
+        self.store.flush()
         summary = self.get_performance_summary()
         
         if summary:
-            logger.info("=== Performance Summary ===")
+            logger.info("=== Performance Summary (this run) ===")
             for operation, stats in summary.items():
                 logger.info(f"{operation}:")
                 logger.info(f"  Average: {stats['average']:.2f}s")
                 logger.info(f"  Min: {stats['min']:.2f}s")
                 logger.info(f"  Max: {stats['max']:.2f}s")
+                logger.info(f"  P50/P90/P99: {stats['p50']:.2f}s / {stats['p90']:.2f}s / {stats['p99']:.2f}s")
                 logger.info(f"  Count: {stats['count']}")
         else:
             logger.info("No performance metrics available yet.")
+        
+        slowest_stages = self.rank_slowest("stage", "stage", by="p90")
+        if slowest_stages:
+            logger.info("=== Slowest Stages (p90, this run) ===")
+            for stage, stats in slowest_stages:
+                # A stage can run several times per account (scroll steps, retries)
+                accounts = len(self.rank_slowest("account", "stage", limit=None, stage=stage))
+                logger.info(f"{stage}: p50 {stats['p50']:.2f}s, p90 {stats['p90']:.2f}s, p99 {stats['p99']:.2f}s, "
+                            f"max {stats['max']:.2f}s over {stats['count']} samples from {accounts} accounts")
+        
+        slowest_accounts = self.rank_slowest("account", "stage", by="total")
+        if slowest_accounts:
+            logger.info("=== Slowest Accounts (time in stages, this run) ===")
+            for account, stats in slowest_accounts:
+                slowest_stage = self.rank_slowest("stage", "stage", by="total", limit=1, account=account)
+                worst = f", mostly {slowest_stage[0][0]}" if slowest_stage else ""
+                logger.info(f"{account}: {stats['total']:.2f}s{worst}")
+        
+        counters = self.get_counters()
+        if counters:
+            logger.info("=== Run Counters ===")
+            for counter, value in sorted(counters.items()):
+                logger.info(f"{counter}: {value:g}")
 
 # Global performance monitor instance
 _performance_monitor = None
@@ -116,18 +229,44 @@ def get_performance_monitor() -> PerformanceMonitor:
         _performance_monitor = PerformanceMonitor()
     return _performance_monitor
 
-def monitor_operation(operation: str):
-    """Decorator to monitor operation performance."""
+def monitor_operation(operation: str, labels: Union[Dict[str, str], Callable[..., Dict[str, str]], None] = None):
+    """
+    Decorator to monitor operation performance. Supports sync and async functions.
+    labels (a dict, or a function of the call's arguments returning one, e.g.
+    lambda url, **_: {"account": ...}) are added to this duration and every one recorded inside the call.
+    """
+    def call_labels(args, kwargs) -> Dict[str, str]:
+        if labels is None:
+            return {}
+        return labels(*args, **kwargs) if callable(labels) else labels
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                monitor = get_performance_monitor()
+                with monitor.labels(**call_labels(args, kwargs)):
+                    start_time = monitor.start_timer(operation)
+                    try:
+                        result = await func(*args, **kwargs)
+                        monitor.end_timer(start_time, operation)
+                        return result
+                    except Exception as e:
+                        monitor.end_timer(start_time, f"{operation}_error")
+                        raise
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             monitor = get_performance_monitor()
-            start_time = monitor.start_timer(operation)
-            try:
-                result = func(*args, **kwargs)
-                monitor.end_timer(start_time, operation)
-                return result
-            except Exception as e:
-                monitor.end_timer(start_time, f"{operation}_error")
-                raise
+            with monitor.labels(**call_labels(args, kwargs)):
+                start_time = monitor.start_timer(operation)
+                try:
+                    result = func(*args, **kwargs)
+                    monitor.end_timer(start_time, operation)
+                    return result
+                except Exception as e:
+                    monitor.end_timer(start_time, f"{operation}_error")
+                    raise
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,147 @@
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Postgres statement timeout / cancelled query
+TIMEOUT_ERROR_CODES = {"57014"}
+
+def is_timeout_error(error: Exception) -> bool:
+    """Return True if an insert failed because the request or statement timed out."""
+    if getattr(error, "code", None) in TIMEOUT_ERROR_CODES:
+        return True
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return True
+    message = str(error).lower()
+    return "timeout" in message or "timed out" in message
+
+# SQLSTATE classes a single row can cause: data exceptions (22) and integrity constraint violations (23)
+ROW_ERROR_SQLSTATE_CLASSES = {"22", "23"}
+
+def is_row_error(error: Exception) -> bool:
+    """
+    Return True if a write failed because of some row(s) in it, so splitting the chunk can
+    isolate them: PostgREST's row-level SQLSTATE errors, its request errors (PGRST1xx, HTTP 400),
+    and statement timeouts (a smaller chunk may finish in time). Transport, auth (JWT) and
+    server errors fail every row alike.
+    """
+    code = getattr(error, "code", None)
+    if code in TIMEOUT_ERROR_CODES or "statement timeout" in str(error).lower():
+        return True
+    if not isinstance(code, str):
+        return False
+    if code.startswith("PGRST"):
+        return code.startswith("PGRST1")
+    return len(code) == 5 and code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+
+class BatchedPostWriter:
+    """
+    Writes rows to a Supabase table in multi-row requests.
+
+    With on_conflict set, rows are upserted and rows that conflict with existing ones
+    are skipped by the database instead of failing the request.
+
+    The chunk size adapts to observed latency: it doubles while requests finish well
+    under the target latency and halves when they are slow or time out. A chunk that
+    fails because of its rows (is_row_error) is split in half and each half retried,
+    until the bad rows are isolated; any other failure fails the whole chunk at once.
+    """
+
+    def __init__(self, supabase, table: str = "user_posts", batch_size: int = 10,
+                 min_batch_size: int = 1, max_batch_size: int = 100, target_latency: float = 2.0,
+                 on_conflict: Optional[str] = None):
+        self.supabase = supabase
+        self.table = table
+        self.on_conflict = on_conflict
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.batch_size = min(max(batch_size, self.min_batch_size), self.max_batch_size)
+        self.target_latency = target_latency
+        # Chunk size is shared by concurrent scrape workers
+        self._lock = threading.Lock()
+
+    def write(self, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Exception]]]:
+        """
+        Write rows in adaptive chunks.
+        Returns (written_rows, failed) where failed is a list of (row, error) pairs.
+        """
+        written = []
+        _, failed = self.write_stream(rows, written.extend)
+        return written, failed
+
+    def write_stream(self, rows: Iterable[Dict[str, Any]],
+                     on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> Tuple[int, List[Tuple[Dict[str, Any], Exception]]]:
+        """
+        Write rows from any iterable, sending each chunk as soon as it fills up.
+        Only the current chunk is held in memory; written chunks are passed to on_written.
+        Returns (number of rows written, failed) where failed is a list of (row, error) pairs.
+        """
+        written_count = 0
+        failed = []
+
+        def written(chunk):
+            nonlocal written_count
+            written_count += len(chunk)
+            if on_written:
+                on_written(chunk)
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch_size:
+                self._write_chunk(chunk, written, failed)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk, written, failed)
+        return written_count, failed
+
+    def _execute(self, chunk: List[Dict[str, Any]]):
+        """Send one multi-row request."""
+        if self.on_conflict:
+            return self.supabase.table(self.table).upsert(chunk, on_conflict=self.on_conflict, ignore_duplicates=True).execute()
+        return self.supabase.table(self.table).insert(chunk).execute()
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]], written: Callable[[List[Dict[str, Any]]], None], failed: list,
+                     bisected: bool = False):
+        """Write a chunk, bisecting it on row errors until failing rows are isolated."""
+        started = time.time()
+        try:
+            self._execute(chunk)
+        except Exception as e:
+            if is_timeout_error(e):
+                self._shrink()
+            if len(chunk) == 1:
+                logger.error(f"❌ Failed to write row to {self.table}: {e}")
+                failed.append((chunk[0], e))
+                return
+            if not is_row_error(e):
+                # Splitting cannot help (e.g. Supabase unreachable): don't send 2n-1 failing requests
+                logger.error(f"❌ Failed to write {len(chunk)} rows to {self.table}: {e}")
+                failed.extend((row, e) for row in chunk)
+                return
+            logger.warning(f"⚠️ Write of {len(chunk)} rows failed ({e}), splitting chunk")
+            middle = len(chunk) // 2
+            self._write_chunk(chunk[:middle], written, failed, bisected=True)
+            self._write_chunk(chunk[middle:], written, failed, bisected=True)
+            return
+
+        latency = time.time() - started
+        written(chunk)
+        self._adapt(latency, len(chunk), allow_growth=not bisected)
+
+    def _adapt(self, latency: float, chunk_size: int, allow_growth: bool = True):
+        """
+        Grow or shrink the chunk size based on the latency of a successful write.
+        Halves of a bisected chunk never grow it, since they follow a failure.
+        """
+        if latency > self.target_latency:
+            self._shrink()
+        elif allow_growth and latency < self.target_latency / 2 and chunk_size >= self.batch_size:
+            with self._lock:
+                self.batch_size = min(self.batch_size * 2, self.max_batch_size)
+
+    def _shrink(self):
+        with self._lock:
+            self.batch_size = max(self.batch_size // 2, self.min_batch_size)
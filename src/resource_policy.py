@@ -0,0 +1,86 @@
+import logging
+from fnmatch import fnmatch
+from typing import Iterable, Optional
+from src.config import BLOCK_RESOURCES, BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS, ALLOWED_URL_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+# Rough average transfer size per resource type, used to estimate bytes saved by blocking.
+# Aborted requests are never sent, so their real size is unknown.
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 60_000,
+    "media": 750_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "beacon": 1_000,
+    "ping": 1_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+# URL patterns standing in for resource types where requests are blocked by URL only
+# (CDP Network.setBlockedURLs, used when routing would disable the HTTP cache)
+RESOURCE_TYPE_URL_PATTERNS = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.heic*", "*.avif*"],
+    "media": ["*.mp4*", "*.m4a*", "*.m4v*", "*.webm*", "*.mp3*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*"],
+}
+
+class ResourcePolicy:
+    """
+    Decides which browser requests to abort.
+
+    URL patterns are shell-style globs matched against the full URL. Allow patterns
+    win over everything else, then deny patterns, then the blocked resource types.
+    The document itself is never blocked.
+    """
+
+    def __init__(self, blocked_types: Iterable[str] = (), deny_patterns: Iterable[str] = (),
+                 allow_patterns: Iterable[str] = ()):
+        self.blocked_types = {t.strip().lower() for t in blocked_types if t.strip()}
+        self.deny_patterns = [p.strip() for p in deny_patterns if p.strip()]
+        self.allow_patterns = [p.strip() for p in allow_patterns if p.strip()]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.blocked_types or self.deny_patterns)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Return True if a request should be aborted."""
+        if resource_type == "document":
+            return False
+        if any(fnmatch(url, pattern) for pattern in self.allow_patterns):
+            return False
+        if any(fnmatch(url, pattern) for pattern in self.deny_patterns):
+            return True
+        return resource_type in self.blocked_types
+
+    def blocked_url_patterns(self) -> list:
+        """
+        Deny patterns plus URL patterns for the blocked resource types, for blocking by URL only.
+        Allow patterns cannot be expressed this way and are not applied.
+        """
+        patterns = list(self.deny_patterns)
+        for resource_type in sorted(self.blocked_types):
+            patterns.extend(RESOURCE_TYPE_URL_PATTERNS.get(resource_type, []))
+        return patterns
+
+    @staticmethod
+    def estimated_bytes(resource_type: str) -> int:
+        """Estimated size of a request of the given type."""
+        return ESTIMATED_RESOURCE_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+def _split(value: Optional[str]) -> list:
+    return [item for item in (value or "").split(",") if item.strip()]
+
+def get_resource_policy() -> ResourcePolicy:
+    """Build the resource policy configured in src.config."""
+    if not BLOCK_RESOURCES:
+        return ResourcePolicy()
+    return ResourcePolicy(
+        blocked_types=_split(BLOCKED_RESOURCE_TYPES),
+        deny_patterns=_split(BLOCKED_URL_PATTERNS),
+        allow_patterns=_split(ALLOWED_URL_PATTERNS),
+    )
@@ -2,8 +2,47 @@ import os
 import logging
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from src.methods.method_1 import download_html_playwright, extract_posts
-from src.browser_manager import cleanup_browser_manager
+from src.methods.method_1 import (
+    download_html_playwright,
+    download_html_playwright_async,
+    download_posts_playwright,
+    download_posts_playwright_async,
+    extract_posts_job,
+    iter_posts,
+    leading_post_ids,
+    scroll_profile,
+)
+from src.methods.method_2 import download_posts_from_network, download_posts_from_network_async
+from src.browser_manager import BrowserManager, cleanup_browser_manager, get_browser_manager
+from src.async_browser_manager import AsyncBrowserManager
+from src.performance_monitor import get_performance_monitor
+from src.post_writer import BatchedPostWriter
+from src.seen_index import SeenPostIndex, get_seen_index
+from src.high_water_marks import get_high_water_marks
+from src.watchdog import StageTimeout, browser_guard, stage_deadline
+from src.utils import iter_unique_posts, iter_until_known, compute_post_key, post_lookup_keys
+from src.config import (
+    SCRAPER_WORKERS,
+    SCRAPER_ENGINE,
+    INSERT_BATCH_SIZE,
+    INSERT_MAX_BATCH_SIZE,
+    INSERT_TARGET_LATENCY,
+    SEEN_INDEX_ENABLED,
+    INCREMENTAL_SCRAPING,
+    SCRAPE_METHOD,
+    METHOD_1_EXTRACTION,
+    PARSE_PROCESSES,
+    SCROLL_PAGINATION,
+    SESSION_POOL_SIZE,
+)
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import threading
 import time
 
 # Load environment variables from .env file
@@ -43,10 +82,542 @@ def get_trusted_sources(supabase: Client):
         logger.error(f"Error fetching trusted sources: {str(e)}")
         return []
 
-def scrape_and_store_posts():
+def create_post_writer(supabase: Client) -> BatchedPostWriter:
+    """Creates the batched user_posts writer configured from src.config."""
+    return BatchedPostWriter(
+        supabase,
+        table="user_posts",
+        batch_size=INSERT_BATCH_SIZE,
+        max_batch_size=INSERT_MAX_BATCH_SIZE,
+        target_latency=INSERT_TARGET_LATENCY,
+        on_conflict="account_handle,post_key",
+    )
+
+def seed_seen_index(supabase: Client, account_handle: str, seen_index: SeenPostIndex):
+    """Rebuilds the local seen-post index for an account from its most recently stored posts."""
+    try:
+        response = supabase.table("user_posts").select("post_key").eq("account_handle", account_handle).order("datetime", desc=True).limit(seen_index.max_keys_per_account).execute()
+        # Oldest first, so the newest keys are the last to be evicted
+        keys = [row["post_key"] for row in reversed(response.data) if row.get("post_key")]
+        seen_index.seed(account_handle, keys)
+        logger.info(f"Rebuilt seen-post index for {account_handle} with {len(keys)} keys")
+    except Exception as e:
+        logger.warning(f"Could not rebuild seen-post index for {account_handle}: {e}")
+
+# Hands out the shared sessions in turn (SESSION_POOL_SIZE > 0)
+_session_rotation = itertools.count()
+
+def session_name_for(account_handle: str) -> str:
+    """Session to scrape an account with: its own, or the next of the SESSION_POOL_SIZE shared sessions."""
+    if not SESSION_POOL_SIZE:
+        return f"threads_session_{account_handle}"
+    monitor = get_performance_monitor()
+    monitor.record_peak("session_pool_size", SESSION_POOL_SIZE)
+    monitor.increment_counter("shared_session_uses")
+    return f"threads_session_shared_{next(_session_rotation) % SESSION_POOL_SIZE}"
+
+def save_scrape_state():
+    """Persists the local seen-post index and high-water marks at the end of a run."""
+    if SEEN_INDEX_ENABLED:
+        get_seen_index().save()
+    if INCREMENTAL_SCRAPING:
+        get_high_water_marks().save()
+
+# Posts checked against user_posts per duplicate-check query while streaming
+DUPLICATE_CHECK_WINDOW = 50
+
+def iter_post_rows(account_handle: str, posts):
     """
-    Scrapes posts from Threads for trusted sources and stores them in Supabase.
-    Returns True if the method is working (successfully extracted posts), False otherwise.
+    Normalizes extracted posts into user_posts rows, dropping posts repeated on the page.
+    Yields (row, lookup keys) pairs.
+    """
+    for post in iter_unique_posts(posts):
+        # Prepare post data with image handling
+        image_value = post.get("image")
+
+        # If image is a URL string, use it; otherwise set to None
+        if not (image_value and isinstance(image_value, str) and (image_value.startswith('http') or image_value.startswith('/'))):
+            # No image or invalid image data
+            image_value = None
+
+        post_data = {
+            "datetime": post.get("datetime"),
+            "account_handle": account_handle,
+            "platform": "Threads",
+            "content": post.get("content"),
+            "image": image_value,
+            "post_key": compute_post_key(post),
+        }
+        yield post_data, post_lookup_keys(post)
+
+def _filter_existing(supabase: Client, account_handle: str, window: list, seen_index: Optional[SeenPostIndex], stats: dict):
+    """Yields the rows of a window of (row, lookup keys) pairs that are not stored yet."""
+    # Batch check for existing posts using the short, fixed-size post keys
+    try:
+        logger.info(f"🔍 Batch checking {len(window)} posts for duplicates...")
+
+        keys_to_check = sorted({key for _, keys in window for key in keys})
+        existing_posts_response = supabase.table("user_posts").select("post_key").eq("account_handle", account_handle).in_("post_key", keys_to_check).execute()
+
+        # Create a set of existing keys for fast lookup
+        existing_keys = {post["post_key"] for post in existing_posts_response.data}
+        if seen_index is not None:
+            seen_index.add(account_handle, existing_keys)
+
+    except Exception as e:
+        logger.error(f"Error checking existing posts for {account_handle}: {e}")
+        # Writes upsert on (account_handle, post_key), so the database skips anything already stored
+        logger.info(f"⚠️ Writing these posts for {account_handle} and letting the database skip duplicates")
+        existing_keys = set()
+
+    for post_data, keys in window:
+        # Filter out posts that already exist under any of their keys
+        if existing_keys.intersection(keys):
+            stats["existing"] += 1
+        else:
+            stats["new"] += 1
+            yield post_data
+
+def iter_new_rows(supabase: Client, account_handle: str, rows, seen_index: Optional[SeenPostIndex], stats: dict):
+    """
+    Filters (row, lookup keys) pairs down to rows that are not stored yet: first against the
+    local seen-post index, then against Supabase one DUPLICATE_CHECK_WINDOW at a time.
+    """
+    window = []
+    for post_data, keys in rows:
+        # Skip posts the local seen-post index already knows were stored
+        if seen_index is not None:
+            # Once per account and run, even if the rebuild fails
+            if seen_index.needs_seed(account_handle):
+                seed_seen_index(supabase, account_handle, seen_index)
+            if seen_index.contains_any(account_handle, keys):
+                stats["known"] += 1
+                continue
+        window.append((post_data, keys))
+        if len(window) >= DUPLICATE_CHECK_WINDOW:
+            yield from _filter_existing(supabase, account_handle, window, seen_index, stats)
+            window = []
+    if window:
+        yield from _filter_existing(supabase, account_handle, window, seen_index, stats)
+
+def store_posts(supabase: Client, account_handle: str, posts, writer: Optional[BatchedPostWriter] = None):
+    """
+    Stores extracted posts for an account in Supabase, skipping duplicates.
+    Posts are keyed by their Threads post ID (or a content hash when there is none).
+    
+    posts may be any iterable, including a generator that is still extracting the page:
+    posts stream through normalization, dedupe and batched writes, so memory stays flat
+    and the first chunk can be written before extraction finishes.
+    Returns True if every new post was written, False if any write failed.
+    """
+    if writer is None:
+        writer = create_post_writer(supabase)
+
+    # Start timing the database operations
+    db_start_time = time.time()
+
+    seen_index = get_seen_index() if SEEN_INDEX_ENABLED else None
+    stats = {"known": 0, "existing": 0, "new": 0, "with_images": 0}
+
+    def on_written(chunk):
+        stats["with_images"] += sum(1 for post_data in chunk if post_data["image"])
+        if seen_index is not None:
+            seen_index.add(account_handle, [post_data["post_key"] for post_data in chunk])
+
+    # Write in adaptive multi-row batches; failing chunks are bisected
+    rows = iter_post_rows(account_handle, posts)
+    successful_inserts, failed_posts = writer.write_stream(iter_new_rows(supabase, account_handle, rows, seen_index, stats), on_written)
+
+    if stats["known"]:
+        logger.info(f"⚡ {stats['known']} posts for {account_handle} found in local seen-post index")
+
+    if not stats["new"]:
+        logger.info(f"✅ All posts for {account_handle} already exist, skipping.")
+        return True
+
+    for post_data, error in failed_posts:
+        logger.error(f"❌ Failed to insert post {post_data['post_key']} for {account_handle}: {error}")
+
+    # Summary
+    if successful_inserts > 0:
+        posts_with_images = stats["with_images"]
+        posts_without_images = successful_inserts - posts_with_images
+        logger.info(f"🎉 Successfully inserted {successful_inserts}/{stats['new']} new posts for {account_handle}")
+        if posts_with_images > 0:
+            logger.info(f"✅ Posts with images: {posts_with_images}")
+        if posts_without_images > 0:
+            logger.info(f"✅ Posts without images: {posts_without_images}")
+
+        # Performance metrics
+        db_time = time.time() - db_start_time
+        logger.info(f"⚡ Database operations completed in {db_time:.2f}s for {stats['new']} posts (batch size now {writer.batch_size})")
+    else:
+        logger.warning(f"⚠️ No posts were successfully inserted")
+
+    return not failed_posts
+
+def _is_unchanged(mark: Optional[dict], head: list) -> bool:
+    """Return True if the leading posts of a profile match its high-water mark."""
+    return bool(mark and head and head == mark.get("head"))
+
+def store_account_posts(supabase: Client, account_handle: str, posts, head: list,
+                        stop_at_id: Optional[str] = None, writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Stores extracted posts and advances the account's high-water mark.
+    posts may be a generator; it is consumed while being stored, and only the newest
+    post is kept around for the mark.
+    Returns the number of posts extracted.
+    """
+    marks = get_high_water_marks() if INCREMENTAL_SCRAPING else None
+
+    # Generators parse lazily: everything up to the first post counts as the parse stage
+    posts = iter(posts)
+    with stage_deadline("parse"):
+        first = next(posts, None)
+    if first is None:
+        if stop_at_id and stop_at_id in head:
+            logger.info(f"⚡ No new posts for {account_handle} since last run.")
+            marks.update(account_handle, head)
+            return len(head)
+        logger.info(f"No posts extracted for {account_handle}.")
+        return 0
+
+    tally = {"count": 0, "newest": None, "undated": None}
+
+    def tracked(stream):
+        for post in stream:
+            tally["count"] += 1
+            if post.get("id"):
+                if post.get("datetime"):
+                    if tally["newest"] is None or post["datetime"] > tally["newest"]["datetime"]:
+                        tally["newest"] = post
+                elif tally["undated"] is None:
+                    tally["undated"] = post
+            yield post
+
+    stream = tracked(itertools.chain([first], posts))
+    with stage_deadline("store"):
+        stored = store_posts(supabase, account_handle, stream, writer)
+        # Drain anything store_posts left unread so the count covers every extracted post
+        for _ in stream:
+            pass
+    logger.info(f"Extracted {tally['count']} posts for {account_handle}.")
+    # Only advance the mark once everything in front of it is safely stored
+    if marks and stored:
+        marks.update(account_handle, head, [post for post in (tally["newest"], tally["undated"]) if post])
+    return tally["count"]
+
+def process_account_html(supabase: Client, account_handle: str, html: str,
+                         writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Extracts posts from a downloaded profile page (method 1) and stores the new ones.
+    
+    With incremental scraping, an account whose leading posts are unchanged since the
+    last run is skipped without parsing, and extraction stops at the newest stored post.
+    Skipped accounts count their visible posts, so quiet runs still report the method as working.
+    Returns the number of posts extracted.
+    """
+    mark = get_high_water_marks().get(account_handle) if INCREMENTAL_SCRAPING else None
+    head = leading_post_ids(html)
+
+    if _is_unchanged(mark, head):
+        logger.info(f"⚡ No new posts for {account_handle} since last run, skipping.")
+        return len(head)
+
+    stop_at_id = mark.get("post_id") if mark else None
+    posts = iter_posts(html, stop_at_id=stop_at_id)
+    return store_account_posts(supabase, account_handle, posts, head, stop_at_id, writer)
+
+def process_account_posts(supabase: Client, account_handle: str, posts: list,
+                          writer: Optional[BatchedPostWriter] = None, head: Optional[list] = None) -> int:
+    """
+    Stores posts extracted without a Python-side parse (method 2, or method 1 run in the page),
+    applying the same high-water mark rules as process_account_html.
+    head defaults to the IDs of the first five posts.
+    Returns the number of posts extracted.
+    """
+    mark = get_high_water_marks().get(account_handle) if INCREMENTAL_SCRAPING else None
+    if head is None:
+        head = [post["id"] for post in posts[:5]]
+
+    if _is_unchanged(mark, head):
+        logger.info(f"⚡ No new posts for {account_handle} since last run, skipping.")
+        return len(head)
+
+    stop_at_id = mark.get("post_id") if mark else None
+    posts = list(iter_until_known(posts, stop_at_id))
+    return store_account_posts(supabase, account_handle, posts, head, stop_at_id, writer)
+
+def process_account_stream(supabase: Client, account_handle: str, head: list, posts,
+                           writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Stores posts streamed from an infinite-scroll session, which already stopped at the
+    newest stored post. Accounts with an unchanged head are skipped before scrolling.
+    Returns the number of posts extracted.
+    """
+    mark = get_high_water_marks().get(account_handle) if INCREMENTAL_SCRAPING else None
+    if _is_unchanged(mark, head):
+        logger.info(f"⚡ No new posts for {account_handle} since last run, skipping.")
+        return len(head)
+    stop_at_id = mark.get("post_id") if mark else None
+    return store_account_posts(supabase, account_handle, posts, head, stop_at_id, writer)
+
+def stored_post_id(account_handle: str) -> Optional[str]:
+    """The newest stored post of an account, where extraction can stop (incremental scraping only)."""
+    if not INCREMENTAL_SCRAPING:
+        return None
+    mark = get_high_water_marks().get(account_handle)
+    return mark.get("post_id") if mark else None
+
+def run_with_browser_recovery(account_handle: str, browser_manager: BrowserManager, scrape):
+    """
+    Run scrape() with its browser stages under the stage watchdog, which kills a hung browser.
+    If the browser crashed or was killed, relaunch it and run scrape() once more.
+    """
+    for attempt in range(2):
+        try:
+            with browser_guard(browser_manager.kill_browser):
+                return scrape()
+        except Exception as e:
+            if attempt == 0 and browser_manager.recover_browser(force=isinstance(e, StageTimeout)):
+                logger.warning(f"🔄 Retrying {account_handle} in a relaunched browser after: {e}")
+                get_performance_monitor().increment_counter("account_retries")
+                continue
+            raise
+
+def scrape_account(supabase: Client, account_handle: str, browser_manager: Optional[BrowserManager] = None,
+                   writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Scrapes and stores posts for a single account with the configured SCRAPE_METHOD.
+    A crashed or hung browser is relaunched and the account retried once.
+    Returns the number of posts extracted (0 on failure).
+    """
+    logger.info(f"Scraping posts for: {account_handle}")
+    if browser_manager is None:
+        browser_manager = get_browser_manager()
+    monitor = get_performance_monitor()
+    # Every duration recorded while scraping the account is labelled with it
+    with monitor.labels(account=account_handle):
+        start_time = monitor.start_timer(f"{SCRAPE_METHOD}_account")
+        try:
+            extracted = run_with_browser_recovery(account_handle, browser_manager,
+                                                  lambda: _scrape_account_once(supabase, account_handle, browser_manager, writer))
+            monitor.end_timer(start_time, f"{SCRAPE_METHOD}_account")
+            monitor.increment_counter(f"{SCRAPE_METHOD}_posts_extracted", extracted)
+            return extracted
+
+        except Exception as e:
+            monitor.end_timer(start_time, f"{SCRAPE_METHOD}_account_error")
+            logger.error(f"Failed to scrape or store posts for {account_handle}: {e}")
+            return 0
+
+def _scrape_account_once(supabase: Client, account_handle: str, browser_manager: BrowserManager,
+                         writer: Optional[BatchedPostWriter] = None) -> int:
+    """One attempt of scrape_account; raises on failure."""
+    user_url = f"https://www.threads.net/@{account_handle}"
+    
+    session_name = session_name_for(account_handle)
+    if SCRAPE_METHOD == "method_2":
+        posts = download_posts_from_network(user_url, profile_name="threads_scraper", session_name=session_name, browser_manager=browser_manager)
+        return process_account_posts(supabase, account_handle, posts, writer)
+    if SCROLL_PAGINATION:
+        with scroll_profile(user_url, profile_name="threads_scraper", session_name=session_name,
+                            browser_manager=browser_manager, stop_at_id=stored_post_id(account_handle)) as (head, posts):
+            return process_account_stream(supabase, account_handle, head, posts, writer)
+    if METHOD_1_EXTRACTION == "browser":
+        head, posts = download_posts_playwright(user_url, profile_name="threads_scraper", session_name=session_name,
+                                                browser_manager=browser_manager, stop_at_id=stored_post_id(account_handle))
+        return process_account_posts(supabase, account_handle, posts, writer, head=head)
+    html = download_html_playwright(user_url, profile_name="threads_scraper", session_name=session_name, browser_manager=browser_manager)
+    return process_account_html(supabase, account_handle, html, writer)
+
+def scrape_accounts_concurrently(supabase: Client, trusted_sources: list, workers: int,
+                                 writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Scrapes accounts with a bounded pool of worker threads.
+    
+    Playwright's sync API is bound to the thread that started it, so each worker
+    owns a separate BrowserManager and creates its own BrowserContext per account.
+    Navigation waits and human-like delays of different accounts overlap instead of adding up.
+    Returns the total number of posts extracted.
+    """
+    workers = min(workers, len(trusted_sources))
+    pending = queue.Queue()
+    for account_handle in trusted_sources:
+        pending.put(account_handle)
+
+    # Create the shared monitor up front so worker threads don't race to initialize it
+    performance_monitor = get_performance_monitor()
+
+    def worker() -> int:
+        browser_manager = BrowserManager()
+        extracted = 0
+        try:
+            while True:
+                try:
+                    account_handle = pending.get_nowait()
+                except queue.Empty:
+                    break
+                extracted += scrape_account(supabase, account_handle, browser_manager, writer)
+        finally:
+            browser_manager.close(log_summary=False)
+        return extracted
+
+    logger.info(f"Scraping {len(trusted_sources)} accounts with {workers} concurrent workers...")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape-worker") as executor:
+        futures = [executor.submit(worker) for _ in range(workers)]
+        total_posts_extracted = 0
+        for future in futures:
+            try:
+                total_posts_extracted += future.result()
+            except Exception as e:
+                logger.error(f"Scrape worker failed: {e}")
+
+    performance_monitor.log_performance_summary()
+    return total_posts_extracted
+
+def create_parse_pool(processes: int) -> ProcessPoolExecutor:
+    """
+    Process pool for the parse stage. Workers come from a fork server (or are spawned),
+    never forked from this process, whose browser threads must not be duplicated.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+
+def scrape_accounts_pipelined(supabase: Client, trusted_sources: list, workers: int, parse_processes: int,
+                              writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Method 1 as a three-stage pipeline: fetch threads → parse processes → storage.
+    
+    Fetch workers each own a BrowserManager (as in scrape_accounts_concurrently) and hand
+    downloaded HTML to a process pool, so parsing uses the other CPUs while the browsers
+    keep navigating. Parsed posts are stored on the calling thread. At most
+    2 × parse_processes pages are parsing or waiting to be stored; a fetch worker blocks
+    before handing over another page, which holds the browsers back when parsing or
+    storage falls behind. If a parse process dies (BrokenProcessPool), pages are parsed in
+    the fetch threads for the rest of the run, and the pages lost with it on this thread.
+    Returns the total number of posts extracted.
+    """
+    workers = min(workers, len(trusted_sources))
+    pending = queue.Queue()
+    for account_handle in trusted_sources:
+        pending.put(account_handle)
+    # Exactly one entry per account: (account_handle, head, stop_at_id, html, parse future or final count, start time)
+    parsed = queue.Queue()
+    parse_slots = threading.Semaphore(2 * parse_processes)
+    performance_monitor = get_performance_monitor()
+    # Set once a parse process died (e.g. OOM-killed); pages are then parsed in the fetch threads
+    pool_broken = threading.Event()
+
+    def parse_in_thread(html: str, stop_at_id: Optional[str]) -> Future:
+        future = Future()
+        try:
+            future.set_result(extract_posts_job(html, stop_at_id))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def submit_parse(pool: ProcessPoolExecutor, html: str, stop_at_id: Optional[str]) -> Future:
+        if not pool_broken.is_set():
+            try:
+                return pool.submit(extract_posts_job, html, stop_at_id)
+            except BrokenProcessPool as e:
+                if not pool_broken.is_set():
+                    pool_broken.set()
+                    logger.error(f"Parse pool is broken ({e}), parsing in the fetch threads from now on")
+        return parse_in_thread(html, stop_at_id)
+
+    def fetch_worker(pool: ProcessPoolExecutor):
+        try:
+            browser_manager = BrowserManager()
+        except Exception as e:
+            logger.error(f"Fetch worker failed to start: {e}")
+            return
+        try:
+            while True:
+                try:
+                    account_handle = pending.get_nowait()
+                except queue.Empty:
+                    break
+                with performance_monitor.labels(account=account_handle):
+                    start_time = performance_monitor.start_timer("method_1_account")
+                    head, stop_at_id = [], None
+                    try:
+                        logger.info(f"Scraping posts for: {account_handle}")
+                        session_name = session_name_for(account_handle)
+                        html = run_with_browser_recovery(account_handle, browser_manager, lambda: download_html_playwright(
+                            f"https://www.threads.net/@{account_handle}", profile_name="threads_scraper",
+                            session_name=session_name, browser_manager=browser_manager))
+                        mark = get_high_water_marks().get(account_handle) if INCREMENTAL_SCRAPING else None
+                        head = leading_post_ids(html)
+                        if _is_unchanged(mark, head):
+                            logger.info(f"⚡ No new posts for {account_handle} since last run, skipping.")
+                            parsed.put((account_handle, head, None, None, len(head), start_time))
+                            continue
+                        stop_at_id = mark.get("post_id") if mark else None
+                        parse_slots.acquire()
+                        try:
+                            future = submit_parse(pool, html, stop_at_id)
+                        except Exception:
+                            parse_slots.release()
+                            raise
+                        future.add_done_callback(lambda f, item=(account_handle, head, stop_at_id, html): parsed.put(item + (f, start_time)))
+                    except Exception as e:
+                        logger.error(f"Failed to scrape {account_handle}: {e}")
+                        parsed.put((account_handle, head, stop_at_id, None, None, start_time))
+        finally:
+            browser_manager.close(log_summary=False)
+
+    logger.info(f"Scraping {len(trusted_sources)} accounts with {workers} fetch workers and {parse_processes} parse processes...")
+    total_posts_extracted = 0
+    with create_parse_pool(parse_processes) as pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch-worker") as fetchers:
+        fetch_futures = [fetchers.submit(fetch_worker, pool) for _ in range(workers)]
+
+        remaining = len(trusted_sources)
+        while remaining:
+            try:
+                account_handle, head, stop_at_id, html, outcome, start_time = parsed.get(timeout=1.0)
+            except queue.Empty:
+                if all(future.done() for future in fetch_futures):
+                    # Every fetch worker died; nobody will take the accounts still pending
+                    while not pending.empty():
+                        logger.error(f"Failed to scrape {pending.get_nowait()}: no fetch worker left")
+                        remaining -= 1
+                continue
+            remaining -= 1
+            with performance_monitor.labels(account=account_handle):
+                if outcome is None:
+                    performance_monitor.end_timer(start_time, "method_1_account_error")
+                    continue
+                if isinstance(outcome, int):
+                    extracted = outcome
+                else:
+                    parse_slots.release()
+                    try:
+                        try:
+                            posts, parse_seconds = outcome.result()
+                        except BrokenProcessPool:
+                            # The page was in a parse process that died; parse it here instead
+                            pool_broken.set()
+                            posts, parse_seconds = parse_in_thread(html, stop_at_id).result()
+                        performance_monitor.record_duration("method_1_parse", parse_seconds)
+                        extracted = store_account_posts(supabase, account_handle, posts, head, stop_at_id, writer)
+                    except Exception as e:
+                        performance_monitor.end_timer(start_time, "method_1_account_error")
+                        logger.error(f"Failed to parse or store posts for {account_handle}: {e}")
+                        continue
+                performance_monitor.end_timer(start_time, "method_1_account")
+                performance_monitor.increment_counter("method_1_posts_extracted", extracted)
+            total_posts_extracted += extracted
+
+    performance_monitor.log_performance_summary()
+    return total_posts_extracted
+
+def init_authenticated_client() -> Optional[Client]:
+    """
+    Initializes a Supabase client and signs in as the admin service user.
+    Returns None if credentials are missing or authentication fails.
     """
     supabase = init_supabase_client()
     
@@ -56,7 +627,7 @@ def scrape_and_store_posts():
 
     if not email or not password:
         logger.error("Admin user email and password must be set in the .env file.")
-        return False
+        return None
 
     try:
         logger.info(f"Authenticating as admin user {email}...")
@@ -65,6 +636,22 @@ def scrape_and_store_posts():
         
     except Exception as e:
         logger.error(f"Authentication failed: {e}")
+        return None
+
+    return supabase
+
+def scrape_and_store_posts():
+    """
+    Scrapes posts from Threads for trusted sources and stores them in Supabase.
+    Returns True if the method is working (successfully extracted posts), False otherwise.
+    
+    With SCRAPER_ENGINE=async this is a thin wrapper around scrape_and_store_posts_async.
+    """
+    if SCRAPER_ENGINE == "async":
+        return asyncio.run(scrape_and_store_posts_async())
+
+    supabase = init_authenticated_client()
+    if supabase is None:
         return False
 
     trusted_sources = get_trusted_sources(supabase)
@@ -74,147 +661,121 @@ def scrape_and_store_posts():
         return False
 
     total_posts_extracted = 0
+    # One writer per run so the adapted batch size carries over between accounts
+    writer = create_post_writer(supabase)
     
     try:
-        for account_handle in trusted_sources:
-            logger.info(f"Scraping posts for: {account_handle}")
-            try:
-                user_url = f"https://www.threads.net/@{account_handle}"
-                
-                # Use session management for each account
-                session_name = f"threads_session_{account_handle}"
-                html = download_html_playwright(user_url, profile_name="threads_scraper", session_name=session_name)
-                posts = extract_posts(html)
-
-                if not posts:
-                    logger.info(f"No posts extracted for {account_handle}.")
-                    continue
-
-                total_posts_extracted += len(posts)
-                logger.info(f"Extracted {len(posts)} posts for {account_handle}.")
-
-                # Start timing the database operations
-                db_start_time = time.time()
-                
-                # Prepare all posts for batch processing
-                posts_to_insert = []
-                posts_to_check = []
-                
-                for post in posts:
-                    # Prepare post data with image handling
-                    image_value = post.get("image")
-                    
-                    # If image is a URL string, use it; otherwise set to None
-                    if image_value and isinstance(image_value, str) and (image_value.startswith('http') or image_value.startswith('/')):
-                        # This looks like a valid image URL
-                        post_data = {
-                            "datetime": post.get("datetime"),
-                            "account_handle": account_handle,
-                            "platform": "Threads",
-                            "content": post.get("content"),
-                            "image": image_value,  # Use image URL directly
-                        }
-                    else:
-                        # No image or invalid image data
-                        post_data = {
-                            "datetime": post.get("datetime"),
-                            "account_handle": account_handle,
-                            "platform": "Threads",
-                            "content": post.get("content"),
-                            "image": None,  # Set to None for posts without images
-                        }
-                    
-                    posts_to_insert.append(post_data)
-                    posts_to_check.append(post.get("content"))
-
-                # Batch check for existing posts (much faster than individual checks)
-                if posts_to_check:
-                    try:
-                        logger.info(f"🔍 Batch checking {len(posts_to_check)} posts for duplicates...")
-                        
-                        # Use IN clause to check multiple posts at once
-                        existing_posts_response = supabase.table("user_posts").select("content").eq("account_handle", account_handle).in_("content", posts_to_check).execute()
-                        
-                        # Create a set of existing content for fast lookup
-                        existing_contents = {post["content"] for post in existing_posts_response.data}
-                        
-                        # Filter out posts that already exist
-                        new_posts = [post for post in posts_to_insert if post["content"] not in existing_contents]
-                        
-                        if new_posts:
-                            logger.info(f"📝 Found {len(new_posts)} new posts to insert for {account_handle}")
-                            
-                            # Process posts individually to avoid database timeouts
-                            successful_inserts = 0
-                            posts_with_images = 0
-                            posts_without_images = 0
-                            
-                            for i, post_data in enumerate(new_posts, 1):
-                                try:
-                                    logger.info(f"📝 Processing post {i}/{len(new_posts)}...")
-                                    
-                                    # Insert post with image (should work now with fixed trigger)
-                                    supabase.table("user_posts").insert(post_data).execute()
-                                    successful_inserts += 1
-                                    
-                                    if post_data["image"]:
-                                        posts_with_images += 1
-                                        logger.info(f"✅ Inserted post {i} with image for {account_handle}")
-                                    else:
-                                        posts_without_images += 1
-                                        logger.info(f"✅ Inserted post {i} without image for {account_handle}")
-                                        
-                                except Exception as e:
-                                    logger.error(f"❌ Failed to insert post {i} for {account_handle}: {e}")
-                            
-                            # Summary
-                            if successful_inserts > 0:
-                                logger.info(f"🎉 Successfully inserted {successful_inserts}/{len(new_posts)} posts")
-                                if posts_with_images > 0:
-                                    logger.info(f"✅ Posts with images: {posts_with_images}")
-                                if posts_without_images > 0:
-                                    logger.info(f"✅ Posts without images: {posts_without_images}")
-                                    
-                                # Performance metrics
-                                db_time = time.time() - db_start_time
-                                logger.info(f"⚡ Database operations completed in {db_time:.2f}s for {len(new_posts)} posts")
-                            else:
-                                logger.warning(f"⚠️ No posts were successfully inserted")
-                                
-                        else:
-                            logger.info(f"✅ All posts for {account_handle} already exist, skipping.")
-                            
-                    except Exception as e:
-                        logger.error(f"Error checking existing posts for {account_handle}: {e}")
-                        # Fallback to individual processing if batch check fails
-                        logger.info(f"⚠️ Falling back to individual post processing for {account_handle}")
-                        
-                        for post_data in posts_to_insert:
-                            try:
-                                # Check for existing post to avoid duplicates
-                                existing_post_response = supabase.table("user_posts").select("id").eq("account_handle", account_handle).eq("content", post_data["content"]).execute()
-
-                                if not existing_post_response.data:
-                                    # Insert post with image (should work now with fixed trigger)
-                                    supabase.table("user_posts").insert(post_data).execute()
-                                    if post_data["image"]:
-                                        logger.info(f"Inserted new post for {account_handle} with image.")
-                                    else:
-                                        logger.info(f"Inserted new post for {account_handle} without image.")
-                                else:
-                                    logger.info(f"Post already exists for {account_handle}, skipping.")
-                            except Exception as e:
-                                logger.error(f"Error saving post to Supabase for {account_handle}: {e}")
-
-            except Exception as e:
-                logger.error(f"Failed to scrape or store posts for {account_handle}: {e}")
+        if PARSE_PROCESSES > 0 and SCRAPE_METHOD == "method_1" and METHOD_1_EXTRACTION == "html" and not SCROLL_PAGINATION:
+            total_posts_extracted = scrape_accounts_pipelined(supabase, trusted_sources, SCRAPER_WORKERS, PARSE_PROCESSES, writer)
+        elif SCRAPER_WORKERS > 1:
+            total_posts_extracted = scrape_accounts_concurrently(supabase, trusted_sources, SCRAPER_WORKERS, writer)
+        else:
+            for account_handle in trusted_sources:
+                total_posts_extracted += scrape_account(supabase, account_handle, writer=writer)
 
     finally:
         # Cleanup browser manager
         cleanup_browser_manager()
+        save_scrape_state()
+
+    # Method is working if we extracted at least some posts
+    return total_posts_extracted > 0
+
+async def run_with_browser_recovery_async(account_handle: str, browser_manager: AsyncBrowserManager, scrape):
+    """
+    Async counterpart of run_with_browser_recovery. Browser stages past their deadline are
+    cancelled by async_stage_deadline and fail the account without touching the shared
+    browser. If the browser crashed, it is relaunched (once for all the accounts that were
+    on it) and scrape() awaited once more.
+    """
+    for attempt in range(2):
+        browser = browser_manager.browser
+        try:
+            return await scrape()
+        except Exception as e:
+            if attempt == 0 and await browser_manager.recover_browser(browser):
+                logger.warning(f"🔄 Retrying {account_handle} in a relaunched browser after: {e}")
+                get_performance_monitor().increment_counter("account_retries")
+                continue
+            raise
+
+async def scrape_account_async(supabase: Client, account_handle: str, browser_manager: AsyncBrowserManager,
+                               writer: Optional[BatchedPostWriter] = None) -> int:
+    """
+    Async counterpart of scrape_account.
+    Parsing and the blocking Supabase calls run in worker threads so the event loop keeps driving pages.
+    A crashed browser is relaunched and the account retried once.
+    Returns the number of posts extracted (0 on failure).
+    """
+    logger.info(f"Scraping posts for: {account_handle}")
+    monitor = get_performance_monitor()
+    with monitor.labels(account=account_handle):
+        start_time = monitor.start_timer(f"{SCRAPE_METHOD}_account")
+        try:
+            extracted = await run_with_browser_recovery_async(
+                account_handle, browser_manager,
+                lambda: _scrape_account_once_async(supabase, account_handle, browser_manager, writer))
+            monitor.end_timer(start_time, f"{SCRAPE_METHOD}_account")
+            monitor.increment_counter(f"{SCRAPE_METHOD}_posts_extracted", extracted)
+            return extracted
+
+        except Exception as e:
+            monitor.end_timer(start_time, f"{SCRAPE_METHOD}_account_error")
+            logger.error(f"Failed to scrape or store posts for {account_handle}: {e}")
+            return 0
+
+async def _scrape_account_once_async(supabase: Client, account_handle: str, browser_manager: AsyncBrowserManager,
+                                     writer: Optional[BatchedPostWriter] = None) -> int:
+    """One attempt of scrape_account_async; raises on failure."""
+    user_url = f"https://www.threads.net/@{account_handle}"
+
+    session_name = session_name_for(account_handle)
+    if SCRAPE_METHOD == "method_2":
+        posts = await download_posts_from_network_async(user_url, profile_name="threads_scraper", session_name=session_name, browser_manager=browser_manager)
+        return await asyncio.to_thread(process_account_posts, supabase, account_handle, posts, writer)
+    if METHOD_1_EXTRACTION == "browser":
+        head, posts = await download_posts_playwright_async(user_url, profile_name="threads_scraper", session_name=session_name,
+                                                            browser_manager=browser_manager, stop_at_id=stored_post_id(account_handle))
+        return await asyncio.to_thread(process_account_posts, supabase, account_handle, posts, writer, head)
+    html = await download_html_playwright_async(user_url, profile_name="threads_scraper", session_name=session_name, browser_manager=browser_manager)
+    return await asyncio.to_thread(process_account_html, supabase, account_handle, html, writer)
+
+async def scrape_and_store_posts_async():
+    """
+    Async orchestrator: scrapes all trusted sources on one event loop with a single browser,
+    keeping up to SCRAPER_WORKERS pages in flight at once.
+    Returns True if the method is working (successfully extracted posts), False otherwise.
+    """
+    supabase = await asyncio.to_thread(init_authenticated_client)
+    if supabase is None:
+        return False
+
+    trusted_sources = await asyncio.to_thread(get_trusted_sources, supabase)
+    
+    if not trusted_sources:
+        logger.info("No trusted sources found to scrape.")
+        return False
+
+    browser_manager = AsyncBrowserManager()
+    writer = create_post_writer(supabase)
+    semaphore = asyncio.Semaphore(SCRAPER_WORKERS)
+
+    async def bounded_scrape(account_handle: str) -> int:
+        async with semaphore:
+            return await scrape_account_async(supabase, account_handle, browser_manager, writer)
+
+    try:
+        # Launch up front so concurrent accounts don't race to start the browser
+        await browser_manager.launch_browser()
+        logger.info(f"Scraping {len(trusted_sources)} accounts with up to {SCRAPER_WORKERS} pages in flight...")
+        results = await asyncio.gather(*(bounded_scrape(handle) for handle in trusted_sources))
+        total_posts_extracted = sum(results)
+    finally:
+        await browser_manager.close()
+        save_scrape_state()
 
     # Method is working if we extracted at least some posts
     return total_posts_extracted > 0
 
 if __name__ == "__main__":
-    scrape_and_store_posts() 
\ No newline at end of file
+    scrape_and_store_posts()
\ No newline at end of file
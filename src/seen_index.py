@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional
+from src.config import SEEN_INDEX_MAX_KEYS, SEEN_INDEX_MAX_ACCOUNTS
+from src.utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+class SeenPostIndex:
+    """
+    Local, persistent index of post keys already stored in Supabase, per account.
+
+    It is a pure cache: keys that are missing (evicted, never seen, or lost with a
+    corrupt file) are simply checked against the database again. Accounts and the
+    keys within an account are both kept in LRU order and bounded in size.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_keys_per_account: int = 200, max_accounts: int = 1000):
+        if path is None:
+            path = get_cache_dir() / "seen_posts.json"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_keys_per_account = max(1, max_keys_per_account)
+        self.max_accounts = max(1, max_accounts)
+
+        self._accounts: "OrderedDict[str, OrderedDict[str, None]]" = OrderedDict()
+        self._dirty = False
+        # Accounts a rebuild was attempted for, so a failing rebuild is not retried per post
+        self._seed_attempts = set()
+        # Shared by concurrent scrape workers
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load the index from disk, starting empty if it is missing or corrupt."""
+        if not self.path.exists():
+            logger.info("Seen-post index not found, it will be rebuilt from Supabase")
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or not isinstance(data.get("accounts"), dict):
+                raise ValueError("unexpected index format")
+            for account_handle, keys in data["accounts"].items():
+                if not isinstance(keys, list):
+                    raise ValueError(f"invalid keys for {account_handle}")
+                self._accounts[account_handle] = OrderedDict((str(key), None) for key in keys)
+            logger.info(f"Loaded seen-post index with {len(self._accounts)} accounts")
+        except Exception as e:
+            logger.warning(f"Seen-post index is corrupt ({e}), it will be rebuilt from Supabase")
+            self._accounts = OrderedDict()
+            self._dirty = True
+
+    def has_account(self, account_handle: str) -> bool:
+        """Return True if the index has been seeded for this account."""
+        with self._lock:
+            return account_handle in self._accounts
+
+    def needs_seed(self, account_handle: str) -> bool:
+        """
+        Return True if the account should be rebuilt from Supabase: it is not in the index
+        and no rebuild was attempted for it yet. Records the attempt.
+        """
+        with self._lock:
+            if account_handle in self._accounts or account_handle in self._seed_attempts:
+                return False
+            self._seed_attempts.add(account_handle)
+            return True
+
+    def seed(self, account_handle: str, keys: Iterable[str]):
+        """Mark an account as known, with the keys already stored for it."""
+        self.add(account_handle, keys)
+
+    def add(self, account_handle: str, keys: Iterable[str]):
+        """Record keys as stored for an account."""
+        with self._lock:
+            self._accounts.setdefault(account_handle, OrderedDict())
+            self._add_locked(account_handle, keys)
+
+    def contains_any(self, account_handle: str, keys: Iterable[str]) -> bool:
+        """Return True if any of the keys is known to be stored for the account."""
+        with self._lock:
+            account_keys = self._accounts.get(account_handle)
+            if not account_keys:
+                return False
+            for key in keys:
+                if key in account_keys:
+                    account_keys.move_to_end(key)
+                    return True
+            return False
+
+    def _add_locked(self, account_handle: str, keys: Iterable[str]):
+        account_keys = self._accounts[account_handle]
+        self._accounts.move_to_end(account_handle)
+        for key in keys:
+            account_keys[key] = None
+            account_keys.move_to_end(key)
+        while len(account_keys) > self.max_keys_per_account:
+            account_keys.popitem(last=False)
+        while len(self._accounts) > self.max_accounts:
+            self._accounts.popitem(last=False)
+        self._dirty = True
+
+    def save(self):
+        """Persist the index atomically if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "accounts": {handle: list(keys) for handle, keys in self._accounts.items()},
+            }
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"Failed to save seen-post index: {e}")
+
+# Global seen-post index instance
+_seen_index = None
+_seen_index_lock = threading.Lock()
+
+def get_seen_index() -> SeenPostIndex:
+    """Get the global seen-post index instance."""
+    global _seen_index
+    with _seen_index_lock:
+        if _seen_index is None:
+            _seen_index = SeenPostIndex(max_keys_per_account=SEEN_INDEX_MAX_KEYS, max_accounts=SEEN_INDEX_MAX_ACCOUNTS)
+        return _seen_index
@@ -0,0 +1,110 @@
+"""
+Browser sessions (Playwright storage state) kept in memory for the run.
+
+Contexts read a session from the store instead of its file, and saving a session only
+replaces the in-memory copy; it is marked dirty if the state actually changed. save()
+writes the dirty sessions to sessions/<name>.json, each atomically (temp file + rename).
+
+Cookies are stored once, inside the storage state, which is also how contexts restore them.
+Files written before the store also hold a separate "cookies" copy; it is ignored.
+"""
+import os
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from src.utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+SESSION_VERSION = 1
+
+class SessionStore:
+    """In-memory storage states by session name, persisted to one file per session."""
+
+    def __init__(self, sessions_dir: Optional[Path] = None):
+        if sessions_dir is None:
+            sessions_dir = get_cache_dir() / "sessions"
+        self.sessions_dir = Path(sessions_dir)
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+
+        # session name -> storage state (None: no usable file)
+        self._states: Dict[str, Optional[dict]] = {}
+        self._dirty = set()
+        # Shared by concurrent scrape workers
+        self._lock = threading.Lock()
+
+    def path(self, session_name: str) -> Path:
+        return self.sessions_dir / f"{session_name}.json"
+
+    def _load(self, session_name: str) -> Optional[dict]:
+        """Read a session file, in the current or the pre-store format."""
+        path = self.path(session_name)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            storage_state = data.get("storage_state")
+            if not isinstance(storage_state, dict):
+                raise ValueError("missing storage state")
+            logger.info(f"Loaded session: {session_name}")
+            return storage_state
+        except Exception as e:
+            logger.warning(f"Failed to load session {session_name}: {e}")
+            return None
+
+    def get(self, session_name: str) -> Optional[dict]:
+        """The storage state of a session, read from disk on first use."""
+        with self._lock:
+            if session_name not in self._states:
+                self._states[session_name] = self._load(session_name)
+            return self._states[session_name]
+
+    def put(self, session_name: str, storage_state: dict) -> bool:
+        """Replace a session's storage state; returns True if it changed."""
+        with self._lock:
+            if session_name not in self._states:
+                self._states[session_name] = self._load(session_name)
+            if self._states[session_name] == storage_state:
+                return False
+            self._states[session_name] = storage_state
+            self._dirty.add(session_name)
+            return True
+
+    def save(self) -> int:
+        """Write the sessions that changed since the last save; returns how many were written."""
+        with self._lock:
+            saved = 0
+            for session_name in sorted(self._dirty):
+                data = {
+                    "version": SESSION_VERSION,
+                    "storage_state": self._states[session_name],
+                    "saved_at": time.time(),
+                }
+                path = self.path(session_name)
+                tmp_path = path.with_suffix(".tmp")
+                try:
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f)
+                    os.replace(tmp_path, path)
+                    self._dirty.discard(session_name)
+                    saved += 1
+                    logger.info(f"Saved session: {session_name}")
+                except Exception as e:
+                    logger.warning(f"Failed to save session {session_name}: {e}")
+            return saved
+
+# Global session store instances, by sessions directory
+_session_stores: Dict[Path, SessionStore] = {}
+_session_stores_lock = threading.Lock()
+
+def get_session_store(sessions_dir: Path) -> SessionStore:
+    """Get the shared session store for a sessions directory."""
+    with _session_stores_lock:
+        key = Path(sessions_dir).resolve()
+        if key not in _session_stores:
+            _session_stores[key] = SessionStore(sessions_dir)
+        return _session_stores[key]
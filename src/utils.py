@@ -1,7 +1,17 @@
+import os
 import json
-from typing import List, Dict, Any
+import hashlib
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Iterable, Iterator
 
 
+def get_cache_dir() -> Path:
+    """Directory for state kept between runs: the Docker cache in production, .cache locally."""
+    if os.path.exists("/app/.cache"):
+        return Path("/app/.cache")
+    # Local development - use current directory
+    return Path(".cache")
+
 def load_json(path: str) -> Any:
     try:
         with open(path, 'r', encoding='utf-8') as f:
@@ -14,14 +24,75 @@ def save_json(path: str, data: Any) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 def deduplicate_posts(posts: List[Dict]) -> List[Dict]:
+    return list(iter_unique_posts(posts))
+
+def iter_unique_posts(posts: Iterable[Dict]) -> Iterator[Dict]:
+    """Streaming deduplicate_posts: yields each post the first time it is seen."""
     seen = set()
-    unique_posts = []
     for post in posts:
         post_id = post.get('id') or (post.get('user'), post.get('datetime'), post.get('content'))
         if post_id not in seen:
             seen.add(post_id)
-            unique_posts.append(post)
-    return unique_posts
+            yield post
+
+def _is_newer(post: Dict, than: Dict) -> bool:
+    return bool(post.get('datetime') and than.get('datetime') and post['datetime'] > than['datetime'])
+
+def iter_until_known(posts: Iterable[Dict], stop_at_id: Optional[str],
+                     is_quote: Optional[Callable[[Dict], bool]] = None) -> Iterator[Dict]:
+    """
+    Yields posts in page order up to the already stored post stop_at_id.
+    A pinned post leads the feed above newer posts: when the stored post is the first post
+    and a newer one follows it, it is skipped instead, and the stream stops at the first
+    later post not newer than it. Posts quoted inside another post (is_quote) never decide the stop.
+    """
+    if not stop_at_id:
+        yield from posts
+        return
+    leading = True
+    pending = None  # the stored post in the leading slot, until the next post shows whether it is pinned
+    known = None    # the stored post, once skipped as pinned
+    for post in posts:
+        if is_quote is not None and is_quote(post):
+            # Quotes inside the stored post belong to it
+            if pending is None:
+                yield post
+            continue
+        if pending is not None:
+            if not _is_newer(post, pending):
+                return
+            known, pending = pending, None
+        if known is not None and not _is_newer(post, known):
+            return
+        if post.get('id') == stop_at_id:
+            if not leading:
+                return
+            pending = post
+            leading = False
+            continue
+        leading = False
+        yield post
 
 def sort_posts_newest_first(posts: List[Dict]) -> List[Dict]:
     return sorted(posts, key=lambda x: x.get('datetime') or '', reverse=True)
+
+def content_hash_key(content: Optional[str]) -> str:
+    """Fixed-size dedupe key derived from post content."""
+    return "sha256:" + hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+def compute_post_key(post: Dict) -> str:
+    """Dedupe key for a post: its Threads post ID, or a content hash when it has no ID."""
+    if post.get('id'):
+        return str(post['id'])
+    return content_hash_key(post.get('content'))
+
+def post_lookup_keys(post: Dict) -> List[str]:
+    """
+    All keys a post may already be stored under: its post key, plus the content hash
+    that rows stored before post IDs were kept were backfilled with.
+    """
+    keys = [compute_post_key(post)]
+    content_key = content_hash_key(post.get('content'))
+    if content_key not in keys:
+        keys.append(content_key)
+    return keys
@@ -0,0 +1,211 @@
+"""
+Per-stage deadlines for scraping an account, enforced by one watchdog thread.
+
+Stages are entered with stage_deadline(name): navigate, settle (readiness and dwell),
+capture, parse and store. A stage still running past its STAGE_DEADLINES entry is reported
+(warning and stage_timeouts_<name> counter). Browser stages are also enforced: the thread
+scraping the account registers a callback with browser_guard (BrowserManager.kill_browser),
+and the watchdog calls it so that the Playwright call blocked on a hung browser fails at
+once instead of after its own timeout. The stage then raises StageTimeout.
+
+The async engine enters stages with async_stage_deadline instead: a browser stage past its
+deadline is cancelled on the event loop (only the hung page's await, not the shared browser)
+and raises StageTimeout.
+
+Parse and store run Python code, which cannot be interrupted from another thread; their
+overruns are only reported (database requests are bounded by the client's own timeouts).
+
+Every stage's duration is recorded as a "stage" sample labelled with the stage and its
+outcome (ok, error or timeout), for the slowest stages and accounts in the run summary.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional
+from src.config import DEADLINE_NAVIGATE, DEADLINE_SETTLE, DEADLINE_CAPTURE, DEADLINE_PARSE, DEADLINE_STORE
+from src.performance_monitor import get_performance_monitor
+
+logger = logging.getLogger(__name__)
+
+STAGE_DEADLINES = {
+    "navigate": DEADLINE_NAVIGATE,
+    "settle": DEADLINE_SETTLE,
+    "capture": DEADLINE_CAPTURE,
+    "parse": DEADLINE_PARSE,
+    "store": DEADLINE_STORE,
+}
+BROWSER_STAGES = ("navigate", "settle", "capture")
+
+class StageTimeout(Exception):
+    """A browser stage ran past its deadline and the browser was killed."""
+
+class StageWatchdog:
+    """Tracks the running stages of all threads and acts on the ones past their deadline."""
+
+    def __init__(self, deadlines: Optional[Dict[str, float]] = None, interval: float = 0.5):
+        self.deadlines = STAGE_DEADLINES if deadlines is None else deadlines
+        self.interval = interval
+        # token -> running stage: {"name", "deadline", "on_expire", "expired"}
+        self._stages = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread = None
+
+    @contextmanager
+    def guard(self, on_expire: Callable[[], None]):
+        """Call on_expire when a browser stage entered by this thread overruns its deadline."""
+        previous = getattr(self._local, "on_expire", None)
+        self._local.on_expire = on_expire
+        try:
+            yield
+        finally:
+            self._local.on_expire = previous
+
+    @contextmanager
+    def stage(self, name: str):
+        """Run a block as the given stage, under that stage's deadline, and record its duration."""
+        start = time.monotonic()
+        outcome = "error"
+        try:
+            with self._deadline(name):
+                yield
+            outcome = "ok"
+        except StageTimeout:
+            outcome = "timeout"
+            raise
+        finally:
+            get_performance_monitor().record_sample("stage", time.monotonic() - start, {"stage": name, "outcome": outcome})
+
+    @asynccontextmanager
+    async def async_stage(self, name: str):
+        """stage() for coroutines: a browser stage past its deadline is cancelled and raises StageTimeout."""
+        start = time.monotonic()
+        outcome = "error"
+        try:
+            if name in BROWSER_STAGES:
+                async with self._async_deadline(name):
+                    yield
+            else:
+                with self._deadline(name):
+                    yield
+            outcome = "ok"
+        except StageTimeout:
+            outcome = "timeout"
+            raise
+        finally:
+            get_performance_monitor().record_sample("stage", time.monotonic() - start, {"stage": name, "outcome": outcome})
+
+    @asynccontextmanager
+    async def _async_deadline(self, name: str):
+        timeout = self.deadlines.get(name)
+        if not timeout:
+            yield
+            return
+
+        task = asyncio.current_task()
+        expired = False
+
+        def expire():
+            nonlocal expired
+            expired = True
+            get_performance_monitor().increment_counter(f"stage_timeouts_{name}")
+            logger.error(f"{name} stage exceeded its {timeout:.0f}s deadline, cancelling it")
+            task.cancel()
+
+        handle = asyncio.get_running_loop().call_later(timeout, expire)
+        try:
+            yield
+        except asyncio.CancelledError:
+            if expired:
+                # The cancellation was ours, not the caller's (Python 3.11+ counts them)
+                if hasattr(task, "uncancel"):
+                    task.uncancel()
+                raise StageTimeout(f"{name} stage exceeded its {timeout:.0f}s deadline") from None
+            raise
+        finally:
+            handle.cancel()
+
+    @contextmanager
+    def _deadline(self, name: str):
+        timeout = self.deadlines.get(name)
+        if not timeout:
+            yield
+            return
+
+        on_expire = getattr(self._local, "on_expire", None) if name in BROWSER_STAGES else None
+        entry = {"name": name, "deadline": time.monotonic() + timeout, "on_expire": on_expire, "expired": False}
+        token = next(self._tokens)
+        with self._lock:
+            self._stages[token] = entry
+            self._ensure_thread()
+        try:
+            yield
+        except Exception as e:
+            if entry["expired"] and on_expire:
+                raise StageTimeout(f"{name} stage exceeded its {timeout:.0f}s deadline") from e
+            raise
+        finally:
+            with self._lock:
+                self._stages.pop(token, None)
+        if entry["expired"] and on_expire:
+            raise StageTimeout(f"{name} stage exceeded its {timeout:.0f}s deadline")
+
+    def _ensure_thread(self):
+        """Start the watchdog thread on first use (caller holds the lock)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="stage-watchdog", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self):
+        """Act on every stage past its deadline (once per stage)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [entry for entry in self._stages.values() if not entry["expired"] and now >= entry["deadline"]]
+            for entry in expired:
+                entry["expired"] = True
+
+        monitor = get_performance_monitor()
+        for entry in expired:
+            name = entry["name"]
+            monitor.increment_counter(f"stage_timeouts_{name}")
+            if entry["on_expire"]:
+                logger.error(f"{name} stage exceeded its {self.deadlines[name]:.0f}s deadline, killing the browser")
+                try:
+                    entry["on_expire"]()
+                except Exception as e:
+                    logger.error(f"Failed to stop hung {name} stage: {e}")
+            else:
+                logger.warning(f"{name} stage exceeded its {self.deadlines[name]:.0f}s deadline")
+
+# Global watchdog instance
+_stage_watchdog = None
+_stage_watchdog_lock = threading.Lock()
+
+def get_stage_watchdog() -> StageWatchdog:
+    """Get the global stage watchdog."""
+    global _stage_watchdog
+    with _stage_watchdog_lock:
+        if _stage_watchdog is None:
+            _stage_watchdog = StageWatchdog()
+        return _stage_watchdog
+
+def stage_deadline(name: str):
+    """Context manager running a block as a stage of the global watchdog."""
+    return get_stage_watchdog().stage(name)
+
+def async_stage_deadline(name: str):
+    """Async context manager running a block as a stage of the global watchdog (async engine)."""
+    return get_stage_watchdog().async_stage(name)
+
+def browser_guard(on_expire: Callable[[], None]):
+    """Context manager registering the browser-killing callback for this thread's stages."""
+    return get_stage_watchdog().guard(on_expire)
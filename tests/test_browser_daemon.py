@@ -0,0 +1,119 @@
+import json
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+from src import browser_daemon
+
+# Stands in for Chromium: answers the DevTools version endpoint on --remote-debugging-port
+FAKE_BROWSER = """#!{python}
+import json, sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+port = int(next(arg for arg in sys.argv if arg.startswith("--remote-debugging-port=")).split("=")[1])
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({{"webSocketDebuggerUrl": "ws://127.0.0.1:%d/devtools/browser/x" % port}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def daemon_env(tmp_path, monkeypatch):
+    executable = tmp_path / "fake-chromium"
+    executable.write_text(FAKE_BROWSER.format(python=sys.executable))
+    executable.chmod(0o755)
+    port = free_port()
+    state_file = tmp_path / "browser_daemon.json"
+    monkeypatch.setattr(browser_daemon, "state_path", lambda: state_file)
+    monkeypatch.setattr(browser_daemon, "BROWSER_DAEMON_PORT", port)
+    yield str(executable), port, state_file
+    state = browser_daemon.read_state()
+    if state:
+        browser_daemon.stop_daemon(state)
+
+
+def test_daemon_is_started_reused_and_replaced_when_unhealthy(daemon_env):
+    print("Testing: The browser daemon is started once, reused while healthy and replaced when it stops answering")
+    executable, port, state_file = daemon_env
+
+    endpoint = browser_daemon.ensure_browser_daemon(executable, [])
+    assert endpoint == f"http://127.0.0.1:{port}"
+    first = json.loads(state_file.read_text())
+    assert browser_daemon.is_healthy(port)
+
+    # Healthy: attaching does not start another one
+    assert browser_daemon.ensure_browser_daemon(executable, []) == endpoint
+    assert json.loads(state_file.read_text())["pid"] == first["pid"]
+
+    # A dead daemon is replaced
+    browser_daemon.stop_daemon(first)
+    deadline = time.time() + 5
+    while browser_daemon.is_healthy(port) and time.time() < deadline:
+        time.sleep(0.05)
+    assert browser_daemon.ensure_browser_daemon(executable, []) == endpoint
+    assert json.loads(state_file.read_text())["pid"] != first["pid"]
+
+
+def test_stale_daemon_is_replaced_only_when_allowed(daemon_env, monkeypatch):
+    print("Testing: A daemon older than BROWSER_DAEMON_MAX_AGE_HOURS is replaced when a run attaches")
+    executable, port, state_file = daemon_env
+    browser_daemon.ensure_browser_daemon(executable, [])
+    state = json.loads(state_file.read_text())
+    state["started_at"] -= 13 * 3600
+    state_file.write_text(json.dumps(state))
+    monkeypatch.setattr(browser_daemon, "BROWSER_DAEMON_MAX_AGE_HOURS", 12)
+
+    browser_daemon.ensure_browser_daemon(executable, [], replace_stale=False)
+    assert json.loads(state_file.read_text())["pid"] == state["pid"]
+    browser_daemon.ensure_browser_daemon(executable, [])
+    assert json.loads(state_file.read_text())["pid"] != state["pid"]
+
+
+def test_state_from_a_previous_boot_is_ignored(tmp_path, monkeypatch):
+    print("Testing: A daemon recorded before a machine restart is never killed by pid")
+    state_file = tmp_path / "browser_daemon.json"
+    monkeypatch.setattr(browser_daemon, "state_path", lambda: state_file)
+    state_file.write_text(json.dumps({"pid": os.getpid(), "port": 9222, "started_at": 0, "boot_id": "previous-boot"}))
+    assert browser_daemon.read_state() is None
+
+
+def test_unavailable_daemon_returns_none(tmp_path, monkeypatch):
+    print("Testing: ensure_browser_daemon returns None when the browser cannot be started")
+    monkeypatch.setattr(browser_daemon, "state_path", lambda: tmp_path / "browser_daemon.json")
+    assert browser_daemon.ensure_browser_daemon(str(tmp_path / "missing-chromium"), []) is None
+
+
+def test_stale_daemon_is_kept_while_another_worker_is_attached(daemon_env, monkeypatch):
+    print("Testing: A stale daemon is only replaced once no other worker is attached to it")
+    executable, port, state_file = daemon_env
+    endpoint, attachment = browser_daemon.attach_browser_daemon(executable, [])
+    state = json.loads(state_file.read_text())
+    state["started_at"] -= 13 * 3600
+    state_file.write_text(json.dumps(state))
+    monkeypatch.setattr(browser_daemon, "BROWSER_DAEMON_MAX_AGE_HOURS", 12)
+
+    assert browser_daemon.ensure_browser_daemon(executable, []) == endpoint
+    assert json.loads(state_file.read_text())["pid"] == state["pid"]
+
+    attachment.close()
+    browser_daemon.ensure_browser_daemon(executable, [])
+    assert json.loads(state_file.read_text())["pid"] != state["pid"]
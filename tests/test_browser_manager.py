@@ -0,0 +1,200 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock
+
+from src import browser_manager
+from src.browser_manager import BrowserManager, process_memory_bytes
+from src.performance_monitor import PerformanceMonitor
+
+
+def make_browser():
+    browser = MagicMock()
+    browser.new_context.side_effect = lambda **options: MagicMock()
+    return browser
+
+
+def make_manager(pool_size=4, max_pages=0, max_rss_mb=0):
+    manager = BrowserManager(pool_size=pool_size, max_pages=max_pages, max_rss_mb=max_rss_mb)
+    manager.performance_monitor = PerformanceMonitor()
+    manager.browser = make_browser()
+    manager.save_context_session = MagicMock()
+    return manager
+
+
+def test_contexts_are_pooled_by_session_with_lru_eviction(tmp_path, monkeypatch):
+    print("Testing: Browser contexts are reused per session and the least recently used is evicted")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager(pool_size=2)
+
+    manager.create_page("threads_scraper", "threads_session_a")
+    context_a = manager.context
+    manager.create_page("threads_scraper", "threads_session_b")
+    manager.create_page("threads_scraper", "threads_session_a")
+    assert manager.context is context_a
+    assert manager.browser.new_context.call_count == 2
+
+    # b is now the least recently used session
+    context_b = manager.contexts["threads_session_b"][0]
+    manager.create_page("threads_scraper", "threads_session_c")
+    assert list(manager.contexts) == ["threads_session_a", "threads_session_c"]
+    manager.save_context_session.assert_called_once_with(context_b, "threads_session_b")
+    context_b.close.assert_called_once()
+
+    counters = manager.performance_monitor.get_counters()
+    assert counters["context_pool_hits"] == 1
+    assert counters["context_pool_misses"] == 3
+    assert counters["context_pool_evictions"] == 1
+
+
+def test_close_saves_and_closes_every_pooled_context(tmp_path, monkeypatch):
+    print("Testing: Closing the browser manager closes all pooled contexts")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager(pool_size=4)
+    manager.create_page("threads_scraper", "threads_session_a")
+    manager.create_page("threads_scraper")
+    contexts = [context for context, _ in manager.contexts.values()]
+
+    manager.close(log_summary=False)
+    assert not manager.contexts
+    assert manager.context is None
+    for context in contexts:
+        context.close.assert_called_once()
+    # Only contexts with a session are saved
+    manager.save_context_session.assert_called_once_with(contexts[0], "threads_session_a")
+
+
+def test_browser_is_recycled_after_max_pages(tmp_path, monkeypatch):
+    print("Testing: The browser is relaunched between accounts once it has served max_pages pages")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager(max_pages=2)
+    first_browser = manager.browser
+    launched = []
+
+    def fake_launch():
+        manager.browser = make_browser()
+        manager.pages_served = 0
+        launched.append(manager.browser)
+        return manager.browser
+
+    manager.launch_browser = fake_launch
+    manager.create_page("threads_scraper", "threads_session_a")
+    manager.create_page("threads_scraper", "threads_session_b")
+    assert not launched
+
+    manager.create_page("threads_scraper", "threads_session_c")
+    assert len(launched) == 1
+    first_browser.close.assert_called_once()
+    # Pooled sessions are saved before the old browser goes away
+    assert manager.save_context_session.call_count == 2
+    assert list(manager.contexts) == ["threads_session_c"]
+    assert manager.pages_served == 1
+    counters = manager.performance_monitor.get_counters()
+    assert counters["browser_recycles"] == 1
+    assert counters["browser_recycles_pages"] == 1
+
+
+def test_browser_is_recycled_above_max_rss(tmp_path, monkeypatch):
+    print("Testing: The browser is relaunched when its process tree exceeds max_rss_mb")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager(max_rss_mb=500)
+    manager.launch_browser = MagicMock(side_effect=lambda: setattr(manager, "browser", make_browser()))
+    rss = iter([300.0, 650.0])
+    manager.browser_memory_mb = lambda: next(rss)
+
+    manager.create_page("threads_scraper", "threads_session_a")
+    manager.launch_browser.assert_not_called()
+    manager.create_page("threads_scraper", "threads_session_b")
+    manager.launch_browser.assert_called_once()
+    counters = manager.performance_monitor.get_counters()
+    assert counters["browser_recycles_memory"] == 1
+    assert counters["browser_memory_mb_peak"] == 650.0
+
+
+def test_process_memory_bytes_reads_pss_with_rss_fallback(monkeypatch):
+    print("Testing: Memory of a process tree is its PSS from /proc, or its RSS without smaps_rollup")
+    assert process_memory_bytes([]) is None
+    assert process_memory_bytes([2 ** 30]) is None
+    if not os.path.exists(f"/proc/{os.getpid()}/statm"):
+        return
+    rss = browser_manager._rss_bytes(os.getpid())
+    if os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"):
+        # Shared pages are split between the processes sharing them
+        assert 0 < process_memory_bytes([os.getpid(), 2 ** 30]) <= rss * 1.1
+    monkeypatch.setattr(browser_manager, "_pss_bytes", lambda pid: None)
+    assert process_memory_bytes([os.getpid()]) > 0
+
+
+def test_persistent_profile_dirs_are_claimed_per_manager(tmp_path, monkeypatch):
+    print("Testing: Concurrent managers get their own persistent profile directory")
+    monkeypatch.chdir(tmp_path)
+    first, second = make_manager(), make_manager()
+    first.profiles_dir = second.profiles_dir = tmp_path / "browser_profiles"
+    (first.profiles_dir / "threads_scraper").mkdir(parents=True)
+    (first.profiles_dir / "threads_scraper" / "SingletonLock").write_text("stale")
+
+    assert first.claim_profile_dir("threads_scraper").name == "threads_scraper"
+    assert not (first.profiles_dir / "threads_scraper" / "SingletonLock").exists()
+    assert second.claim_profile_dir("threads_scraper").name == "threads_scraper-1"
+    first.release_profile_dir()
+    second.release_profile_dir()
+    assert second.claim_profile_dir("threads_scraper").name == "threads_scraper"
+    second.release_profile_dir()
+
+
+def test_contexts_restore_sessions_from_storage_state_only(tmp_path, monkeypatch):
+    print("Testing: Pooled contexts restore cookies once, through the storage state")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager()
+    state = {"cookies": [{"name": "sessionid", "value": "abc", "domain": ".threads.net", "path": "/"}], "origins": []}
+    manager.save_session("threads_session_a", state)
+    manager.create_page("threads_scraper", "threads_session_a")
+
+    manager.browser.new_context.assert_called_once()
+    assert manager.browser.new_context.call_args.kwargs["storage_state"] == state
+    context = manager.contexts["threads_session_a"][0]
+    context.add_cookies.assert_not_called()
+
+
+def test_daemon_is_not_recycled_for_memory(tmp_path, monkeypatch):
+    print("Testing: The shared browser daemon is not recycled for its memory")
+    monkeypatch.chdir(tmp_path)
+    manager = make_manager(max_rss_mb=100)
+    manager.daemon_endpoint = "http://127.0.0.1:9222"
+    manager.browser_memory_mb = MagicMock(return_value=500)
+    assert manager.recycle_reason() is None
+    manager.browser_memory_mb.assert_not_called()
+
+
+def test_hung_stage_on_the_daemon_closes_only_this_managers_pages(tmp_path, monkeypatch):
+    print("Testing: A hung stage on the browser daemon closes this manager's pages instead of killing the daemon")
+    monkeypatch.chdir(tmp_path)
+    closed = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            closed.append(self.path)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        manager = make_manager()
+        manager.daemon_endpoint = f"http://127.0.0.1:{server.server_port}"
+        manager.browser_pid = os.getpid()
+        monkeypatch.setattr(os, "kill", MagicMock(side_effect=AssertionError("daemon killed")))
+
+        page = MagicMock()
+        page.context.new_cdp_session.return_value.send.return_value = {"targetInfo": {"targetId": "T1"}}
+        manager.track_page_target(page)
+        manager.kill_browser()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert closed == ["/json/close/T1"]
+    assert manager.performance_monitor.get_counters()["browser_daemon_page_kills"] == 1
@@ -0,0 +1,26 @@
+from src.high_water_marks import HighWaterMarks
+
+
+def test_high_water_marks_track_newest_post(tmp_path):
+    print("Testing: High-water marks advance to the newest stored post")
+    path = tmp_path / "marks.json"
+    marks = HighWaterMarks(path)
+    assert marks.get("someone") is None
+
+    posts = [
+        {"id": "PINNED", "datetime": "2024-01-01T00:00:00.000Z"},
+        {"id": "NEW", "datetime": "2024-06-02T00:00:00.000Z"},
+        {"id": "OLDER", "datetime": "2024-06-01T00:00:00.000Z"},
+    ]
+    marks.update("someone", ["PINNED", "NEW", "OLDER"], posts)
+    assert marks.get("someone") == {
+        "head": ["PINNED", "NEW", "OLDER"],
+        "post_id": "NEW",
+        "datetime": "2024-06-02T00:00:00.000Z",
+    }
+
+    # A head-only update keeps the stored post
+    marks.update("someone", ["PINNED", "NEW"])
+    assert marks.get("someone")["post_id"] == "NEW"
+    marks.save()
+    assert HighWaterMarks(path).get("someone")["head"] == ["PINNED", "NEW"]
@@ -0,0 +1,57 @@
+import os
+
+from src.http_cache import HttpCacheObserver, trim_cache
+from src.performance_monitor import PerformanceMonitor
+
+
+def write_entry(path, size, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_trim_cache_evicts_oldest_entries_and_keeps_indexes(tmp_path):
+    print("Testing: The profile cache is trimmed oldest-first under the cap, keeping index files")
+    cache = tmp_path / "Default" / "Cache" / "Cache_Data"
+    code_cache = tmp_path / "Default" / "Code Cache" / "js"
+    write_entry(cache / "index", 100, 1)
+    write_entry(cache / "old_0", 400, 10)
+    write_entry(code_cache / "old_1", 400, 20)
+    write_entry(cache / "new_0", 400, 30)
+
+    assert trim_cache(tmp_path, 2000) == 0
+    assert trim_cache(tmp_path, 1000) == 400
+    assert not (cache / "old_0").exists()
+    assert (code_cache / "old_1").exists() and (cache / "new_0").exists() and (cache / "index").exists()
+
+    # Trimming goes down to 80% of the cap
+    assert trim_cache(tmp_path, 500) == 400
+    assert not (code_cache / "old_1").exists() and (cache / "new_0").exists()
+
+
+def test_cache_observer_counts_hits_bytes_and_blocked_requests(tmp_path, monkeypatch):
+    print("Testing: Cache hits, bytes saved and CDP-blocked requests are counted from Network events")
+    monkeypatch.chdir(tmp_path)
+    monitor = PerformanceMonitor()
+    observer = HttpCacheObserver(monitor)
+
+    observer._on_response({"requestId": "1", "type": "Script",
+                           "response": {"url": "https://static.cdninstagram.com/a.js", "fromDiskCache": True,
+                                        "headers": {"Content-Length": "120000"}}})
+    observer._on_served_from_cache({"requestId": "2"})
+    observer._on_response({"requestId": "2", "type": "Stylesheet",
+                           "response": {"url": "https://static.cdninstagram.com/a.css", "headers": {}}})
+    observer._on_response({"requestId": "3", "type": "Document",
+                           "response": {"url": "https://www.threads.net/@someone", "headers": {}}})
+    observer._on_response({"requestId": "4", "type": "Image", "response": {"url": "data:image/png;base64,xx"}})
+    observer._on_loading_failed({"requestId": "5", "type": "Image", "blockedReason": "inspector"})
+    observer._on_loading_failed({"requestId": "6", "type": "XHR", "errorText": "net::ERR_FAILED"})
+
+    assert observer.hit_ratio == 2 / 3
+    counters = monitor.get_counters()
+    assert counters["http_cache_requests"] == 3
+    assert counters["http_cache_hits"] == 2
+    # Content-Length when present, else the resource type's estimate
+    assert counters["http_cache_bytes_saved"] == 120000 + 30000
+    assert counters["blocked_requests"] == 1
+    assert counters["blocked_requests_image"] == 1
@@ -0,0 +1,68 @@
+import json
+
+from src.methods.json_posts import parse_json_payloads, posts_from_payloads
+from src.methods.method_2 import posts_from_responses, profile_username_from_url
+
+
+def make_node(code, text, taken_at=1717243200, username="someone", image=None):
+    node = {
+        "pk": "1",
+        "code": code,
+        "taken_at": taken_at,
+        "caption": {"text": text} if text is not None else None,
+        "user": {"username": username},
+    }
+    if image:
+        node["image_versions2"] = {"candidates": [{"url": image, "width": 1080}]}
+    return node
+
+
+def test_posts_from_nested_graphql_payload():
+    print("Testing: Post nodes are found anywhere in a GraphQL payload")
+    payload = {
+        "data": {
+            "mediaData": {
+                "edges": [
+                    {"node": {"thread_items": [{"post": make_node("AAA", " First post ", image="https://img/a.jpg")}]}},
+                    {"node": {"thread_items": [{"post": make_node("BBB", "Second post")}]}},
+                    {"node": {"thread_items": [{"post": make_node("AAA", "First post")}]}},
+                    {"node": {"thread_items": [{"post": make_node("CCC", None)}]}},
+                ]
+            }
+        }
+    }
+    posts = posts_from_payloads([payload])
+    assert posts == [
+        {"id": "AAA", "datetime": "2024-06-01T12:00:00.000Z", "user": "someone", "content": "First post", "image": "https://img/a.jpg"},
+        {"id": "BBB", "datetime": "2024-06-01T12:00:00.000Z", "user": "someone", "content": "Second post", "image": None},
+    ]
+
+
+def test_parse_json_payloads_handles_prefix_and_streams():
+    print("Testing: Response bodies with hijacking prefix and one document per line")
+    body = "for (;;);" + json.dumps({"a": 1})
+    assert parse_json_payloads(body) == [{"a": 1}]
+    assert parse_json_payloads('{"a": 1}\n{"b": 2}\n') == [{"a": 1}, {"b": 2}]
+    assert parse_json_payloads("<html></html>") == []
+
+
+def test_posts_from_responses_fall_back_to_profile_username():
+    print("Testing: Posts without a user take the profile handle from the URL")
+    node = make_node("AAA", "Hello")
+    del node["user"]
+    bodies = [json.dumps({"data": {"post": node}})]
+    posts = posts_from_responses(bodies, "https://www.threads.net/@someone")
+    assert posts[0]["user"] == "someone"
+    assert profile_username_from_url("https://www.threads.net/@a.b_c?x=1") == "a.b_c"
+
+
+def test_posts_from_responses_reads_embedded_blobs_in_document():
+    print("Testing: The profile document's embedded JSON blobs are decoded alongside API responses")
+    blob = json.dumps({"require": [{"thread_items": [{"post": make_node("AAA", "From the document")}]}]})
+    document = (
+        '<!DOCTYPE html><html><head><script type="application/json">{"config": true}</script>'
+        f'<script type="application/json" data-sjs>{blob}</script></head><body></body></html>'
+    )
+    bodies = [document, json.dumps({"data": {"post": make_node("BBB", "From the API")}})]
+    posts = posts_from_responses(bodies, "https://www.threads.net/@someone")
+    assert [p["id"] for p in posts] == ["AAA", "BBB"]
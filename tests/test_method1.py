@@ -1,6 +1,12 @@
+import json
+from pathlib import Path
+
 import pytest
 from src.methods import method_1
 
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "profiles"
+PROFILE_FIXTURES = sorted(path.stem for path in FIXTURES_DIR.glob("*.html"))
+
 
 @pytest.mark.skip("Requires network access to Threads")
 def test_scrape_threads_real():
@@ -12,3 +18,246 @@ def test_scrape_threads_real():
     assert first.get("user")
     assert first.get("content")
     assert first.get("datetime")
+
+
+def make_profile_html(post_ids):
+    posts = "".join(
+        f'<div data-pressable-container="true">'
+        f'<a href="/@someone"><span>someone</span></a>'
+        f'<a href="/@someone/post/{post_id}"><time datetime="2024-06-{10 + i:02d}T12:00:00.000Z">06/{10 + i:02d}/24</time></a>'
+        f'<span>Post body number {post_id}</span>'
+        f'</div>'
+        for i, post_id in enumerate(post_ids)
+    )
+    return f'<html><body><a href="/@someone"><span>someone</span></a>{posts}</body></html>'
+
+
+def make_feed_html(posts):
+    """Profile page with (post_id, date) posts in the given order."""
+    return "<html><body>" + "".join(
+        f'<div data-pressable-container="true">'
+        f'<a href="/@someone"><span>someone</span></a>'
+        f'<a href="/@someone/post/{post_id}"><time datetime="{date}T12:00:00.000Z">x</time></a>'
+        f'<span>Post body number {post_id}</span>'
+        f'</div>'
+        for post_id, date in posts
+    ) + "</body></html>"
+
+
+# The stored post CCC was pinned, then NEW was posted under it
+PINNED_FEED = [("CCC", "2024-06-05"), ("NEW", "2024-06-09"), ("OLD", "2024-06-04"), ("OLDER", "2024-06-03")]
+
+
+@pytest.mark.parametrize("fixture", PROFILE_FIXTURES)
+def test_extract_posts_matches_golden_output(fixture):
+    print(f"Testing: DOM extraction of {fixture} matches the recorded output")
+    html = (FIXTURES_DIR / f"{fixture}.html").read_text(encoding="utf-8")
+    expected = json.loads((FIXTURES_DIR / f"{fixture}.json").read_text(encoding="utf-8"))
+    assert method_1.extract_posts(html) == expected["posts"]
+    if expected.get("stop_at_id"):
+        assert method_1.extract_posts(html, stop_at_id=expected["stop_at_id"]) == expected["posts_stop_at_third"]
+
+
+def test_leading_post_ids_scans_raw_html():
+    print("Testing: Leading post IDs are read from raw HTML")
+    html = make_profile_html(["AAA", "BBB", "CCC"])
+    assert method_1.leading_post_ids(html, limit=2) == ["AAA", "BBB"]
+    assert method_1.leading_post_ids(html) == ["AAA", "BBB", "CCC"]
+
+
+def test_extract_posts_stops_at_known_post():
+    print("Testing: Extraction stops at the newest stored post")
+    html = make_profile_html(["AAA", "BBB", "CCC"])
+    assert [p["id"] for p in method_1.extract_posts(html)] == ["AAA", "BBB", "CCC"]
+    assert [p["id"] for p in method_1.extract_posts(html, stop_at_id="BBB")] == ["AAA"]
+
+
+def test_extract_posts_skips_pinned_known_post():
+    print("Testing: A stored post pinned above newer posts does not stop extraction")
+    assert [p["id"] for p in method_1.extract_posts(make_feed_html(PINNED_FEED), stop_at_id="CCC")] == ["NEW"]
+    # Not pinned: nothing is newer than the stored post
+    unpinned = make_feed_html([("CCC", "2024-06-05"), ("OLD", "2024-06-04")])
+    assert method_1.extract_posts(unpinned, stop_at_id="CCC") == []
+    # Below the leading slot the stored post always stops extraction
+    assert [p["id"] for p in method_1.extract_posts(make_feed_html(PINNED_FEED), stop_at_id="OLD")] == ["CCC", "NEW"]
+
+
+def test_extract_posts_fast_path_reads_embedded_json_without_dom(monkeypatch):
+    print("Testing: Embedded JSON blobs are decoded without building a DOM")
+    node = {
+        "code": "AAA",
+        "taken_at": 1717243200,
+        "caption": {"text": "From the blob"},
+        "user": {"username": "someone"},
+    }
+    blob = json.dumps({"require": [["ScheduledServerJS", {"thread_items": [{"post": node}]}]]})
+    html = (
+        '<html><head><script>var x = "</div>";</script>'
+        f'<script type="application/json" data-sjs>{blob}</script></head>'
+        + make_profile_html(["ZZZ"])[6:]
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("DOM should not be built")
+
+    monkeypatch.setattr(method_1, "parse_html", fail)
+    posts = method_1.extract_posts(html)
+    assert [(p["id"], p["content"]) for p in posts] == [("AAA", "From the blob")]
+
+
+def test_extract_posts_next_data_and_dom_fallback():
+    print("Testing: __NEXT_DATA__ blobs win; pages without usable blobs use the DOM heuristic")
+    data = {"posts": [{"id": "1", "datetime": "2024-06-01T12:00:00", "content": "Hi"}]}
+    html = (
+        '<html><body><a href="/@someone"><span>someone</span></a>'
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+        '</body></html>'
+    )
+    assert method_1.extract_posts(html) == [
+        {"id": "1", "user": "someone", "datetime": "2024-06-01T12:00:00", "content": "Hi", "image": None}
+    ]
+    html = make_profile_html(["AAA"]).replace("</body>", '<script type="application/json">{"x": 1}</script></body>')
+    assert [p["id"] for p in method_1.extract_posts(html)] == ["AAA"]
+
+
+def test_posts_from_page_result_prefers_json_blobs():
+    print("Testing: In-page results use JSON blobs first, like extract_posts")
+    dom_posts = [{"id": "AAA", "datetime": None, "user": "someone", "content": "From the DOM", "image": None}]
+    result = {"head": ["AAA"], "profileUsername": "someone", "scripts": [], "posts": dom_posts}
+    assert method_1.posts_from_page_result(result) == (["AAA"], dom_posts)
+
+    data = {"posts": [{"id": "1", "content": "Hi"}, {"id": "2", "content": "Old"}]}
+    result["scripts"] = [{"id": "__NEXT_DATA__", "text": json.dumps(data)}]
+    head, posts = method_1.posts_from_page_result(result, stop_at_id="2")
+    assert posts == [{"id": "1", "user": "someone", "datetime": None, "content": "Hi", "image": None}]
+
+
+def launch_test_browser():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    playwright = sync_api.sync_playwright().start()
+    try:
+        return playwright, playwright.chromium.launch()
+    except Exception as e:
+        playwright.stop()
+        pytest.skip(f"Chromium is not available: {e}")
+
+
+def test_in_page_extraction_matches_extract_posts():
+    print("Testing: In-page extraction returns exactly what extract_posts finds in the serialized page")
+    media_post = (
+        '<div data-pressable-container="true">'
+        '<a href="/@other"><img src="https://img/avatar.jpg"><span></span></a>'
+        '<span>other</span>'
+        '<a href="/@other/post/MMM"><time datetime="2024-06-01T00:00:00.000Z">06/01/24</time></a>'
+        '<div><span>Short</span><span>A longer body <b>with markup</b></span></div>'
+        '<a href="/@other/post/MMM/media"><img src="https://img/photo.jpg"></a>'
+        '</div>'
+    )
+    pages = [
+        make_profile_html(["AAA", "BBB", "CCC"]),
+        make_profile_html(["AAA"]).replace("</body>", media_post + "</body>"),
+        '<html><body><a href="/@someone"><span>someone</span></a>'
+        '<script id="__NEXT_DATA__" type="application/json">{"posts": [{"id": "1", "content": "Hi"}]}</script>'
+        '</body></html>',
+        make_feed_html(PINNED_FEED),
+    ] + [(FIXTURES_DIR / f"{fixture}.html").read_text(encoding="utf-8") for fixture in PROFILE_FIXTURES]
+    playwright, browser = launch_test_browser()
+    try:
+        page = browser.new_page()
+        for html in pages:
+            page.set_content(html)
+            expected = method_1.extract_posts(page.content(), stop_at_id="CCC")
+            result = page.evaluate(method_1.EXTRACT_POSTS_JS, {"stopAtId": "CCC", "headLimit": 5})
+            head, posts = method_1.posts_from_page_result(result, stop_at_id="CCC")
+            assert posts == expected
+            assert head == method_1.leading_post_ids(page.content())
+
+        # Scroll mode: handled posts are marked and pruned, so a second pass finds nothing new
+        page.set_content(make_profile_html(["AAA", "BBB"]))
+        options = {"headLimit": 5, "skipProcessed": True, "prune": True}
+        assert [p["id"] for p in page.evaluate(method_1.EXTRACT_POSTS_JS, options)["posts"]] == ["AAA", "BBB"]
+        assert page.evaluate(method_1.EXTRACT_POSTS_JS, options)["posts"] == []
+        assert page.evaluate(method_1.PENDING_POST_LINKS_JS) == 0
+    finally:
+        browser.close()
+        playwright.stop()
+
+
+class FakeScrollPage:
+    """Stands in for a Playwright page: each extraction returns the next scripted step."""
+
+    def __init__(self, steps):
+        self.steps = iter(steps)
+        self.scrolls = 0
+
+    def evaluate(self, script, arg=None):
+        if script == method_1.EXTRACT_POSTS_JS:
+            assert arg["skipProcessed"]
+            posts, reached_stop = next(self.steps)
+            return {"head": [p["id"] for p in posts][:5], "profileUsername": "someone", "scripts": [],
+                    "posts": posts, "reachedStop": reached_stop}
+        if script == method_1.SCROLL_TO_END_JS:
+            self.scrolls += 1
+        return 0
+
+    def wait_for_function(self, script, arg=None, timeout=None):
+        pass
+
+
+def scroll_step(*ids, day=10, reached_stop=False):
+    posts = [{"id": post_id, "datetime": f"2024-06-{day:02d}T00:00:00.000Z", "user": "someone",
+              "content": f"Post {post_id}", "image": None} for post_id in ids]
+    return posts, reached_stop
+
+
+def test_scroll_posts_pages_until_a_stop_condition(monkeypatch):
+    print("Testing: Infinite scrolling yields new posts per step and stops at known posts, limits and the cutoff")
+    monkeypatch.setattr(method_1.random, "uniform", lambda a, b: 0)
+
+    # Stops at the stored post; a post repeated across steps is yielded once
+    page = FakeScrollPage([scroll_step("A", "B"), scroll_step("B", "C"), scroll_step("D", reached_stop=True)])
+    head, posts = method_1.scroll_posts(page, stop_at_id="E")
+    assert head == ["A", "B"]
+    assert [p["id"] for p in posts] == ["A", "B", "C", "D"]
+    assert page.scrolls == 2
+
+    # Post limit, without scrolling further than needed
+    page = FakeScrollPage([scroll_step("A", "B"), scroll_step("C", "D"), scroll_step("E")])
+    _, posts = method_1.scroll_posts(page, max_posts=3)
+    assert [p["id"] for p in posts] == ["A", "B", "C"]
+    assert page.scrolls == 1
+
+    # Date cutoff: a step with only older posts ends the session
+    page = FakeScrollPage([scroll_step("A", day=20), scroll_step("B", day=5), scroll_step("C", day=1)])
+    _, posts = method_1.scroll_posts(page, cutoff="2024-06-08T00:00:00.000Z")
+    assert [p["id"] for p in posts] == ["A"]
+    assert page.scrolls == 1
+
+    # End of the feed: scrolls that load nothing new
+    page = FakeScrollPage([scroll_step("A")] + [scroll_step()] * 5)
+    _, posts = method_1.scroll_posts(page)
+    assert [p["id"] for p in posts] == ["A"]
+    assert page.scrolls == method_1.SCROLL_IDLE_STEPS
+
+
+def test_scroll_posts_keeps_first_screen_posts_missing_from_json(monkeypatch):
+    print("Testing: First-screen DOM posts missing from the JSON blobs are kept, and blobs are only collected once")
+    monkeypatch.setattr(method_1.random, "uniform", lambda a, b: 0)
+    data = {"posts": [{"id": "A", "user": "someone", "content": "From JSON"}]}
+    options_seen = []
+
+    class JsonScrollPage(FakeScrollPage):
+        def evaluate(self, script, arg=None):
+            result = super().evaluate(script, arg)
+            if script == method_1.EXTRACT_POSTS_JS:
+                options_seen.append(dict(arg))
+                if len(options_seen) == 1:
+                    result["scripts"] = [{"id": "__NEXT_DATA__", "text": json.dumps(data)}]
+            return result
+
+    page = JsonScrollPage([scroll_step("A", "B"), scroll_step("C", reached_stop=True)])
+    _, posts = method_1.scroll_posts(page)
+    posts = list(posts)
+    assert [p["id"] for p in posts] == ["A", "B", "C"]
+    assert posts[0]["content"] == "From JSON"
+    assert options_seen[0].get("collectScripts", True) and options_seen[1]["collectScripts"] is False
@@ -0,0 +1,90 @@
+import json
+import time
+
+from src.metrics_store import MetricsStore
+
+
+def sample(operation, duration, timestamp=None):
+    return {"operation": operation, "duration": duration, "timestamp": time.time() if timestamp is None else timestamp}
+
+
+def test_metrics_store_buffers_and_appends_in_batches(tmp_path):
+    print("Testing: Metrics are buffered and appended to a segment in batches")
+    store = MetricsStore(tmp_path, flush_size=3, flush_interval=3600)
+    store.append(sample("scrape", 1.0))
+    store.append(sample("scrape", 2.0))
+    assert not store.segments()
+    # Buffered samples are still read
+    assert [s["duration"] for s in store.samples()] == [1.0, 2.0]
+
+    store.append(sample("scrape", 3.0))
+    [segment] = store.segments()
+    assert len(segment.read_text().splitlines()) == 3
+
+    # Samples beyond any fixed count are kept
+    for i in range(200):
+        store.append(sample("scrape", float(i)))
+    store.flush()
+    assert len(list(store.samples())) == 203
+
+
+def test_metrics_store_rolls_up_segments_and_applies_retention(tmp_path):
+    print("Testing: Old segments are rolled up into daily histograms and expired samples dropped")
+    old = time.time() - 10 * 86400
+    for i in range(4):
+        lines = [sample("scrape", float(i)), sample("scrape", 99.0, timestamp=old)]
+        (tmp_path / f"metrics-{i}-1.jsonl").write_text("".join(json.dumps(line) + "\n" for line in lines))
+    # A line cut short by a crash is skipped
+    with open(tmp_path / "metrics-3-1.jsonl", 'a') as f:
+        f.write('{"operation": "scr')
+
+    store = MetricsStore(tmp_path, flush_size=1, retention_days=7, max_segments=4)
+    assert [s["duration"] for s in store.samples()] == [0.0, 1.0, 2.0, 3.0]
+
+    # The fifth segment triggers compaction of the other four
+    store.append(sample("scrape", 4.0))
+    assert len(store.segments()) == 1
+    assert [s["duration"] for s in store.samples()] == [4.0]
+    rolled_up = store.rollups()["scrape"]
+    assert (rolled_up.count, rolled_up.total, rolled_up.max) == (4, 6.0, 3.0)
+
+    # Later compactions add to the rollups instead of rewriting the samples
+    store._segment = None
+    store.append(sample("scrape", 5.0))
+    store.compact()
+    assert [s["duration"] for s in store.samples()] == [5.0]
+    assert store.rollups()["scrape"].count == 5
+    assert json.loads((tmp_path / "rollups.json").read_text()).keys() == {str(int(time.time() // 86400))}
+
+
+def test_performance_monitor_imports_legacy_metrics(tmp_path):
+    print("Testing: Metrics from performance_metrics.json are carried over to the store")
+    from src.performance_monitor import PerformanceMonitor
+
+    legacy = tmp_path / "performance_metrics.json"
+    legacy.write_text(json.dumps({"scrape": [{"duration": 2.0, "timestamp": time.time()}]}))
+
+    monitor = PerformanceMonitor(tmp_path)
+    assert not legacy.exists()
+    monitor.record_duration("scrape", 4.0)
+    assert monitor.get_average_duration("scrape") == 3.0
+    # The summary covers this run only
+    assert monitor.get_performance_summary()["scrape"]["count"] == 1
+
+
+def test_metrics_store_caps_the_buffer_while_appends_fail(tmp_path, monkeypatch, caplog):
+    print("Testing: Failing appends keep a bounded buffer and count the dropped samples")
+    from src import metrics_store
+
+    monkeypatch.setattr(metrics_store, "BUFFER_MAX_SAMPLES", 5)
+    dropped = []
+    store = MetricsStore(tmp_path, flush_size=1, on_dropped=dropped.append)
+    monkeypatch.setattr(store, "_active_segment", lambda: tmp_path / "missing" / "segment.jsonl")
+
+    for i in range(8):
+        store.append(sample("scrape", float(i)))
+    assert [s["duration"] for s in store.samples()] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert sum(dropped) == 3
+    assert caplog.text.count("keeping only the latest") == 1
+    # Appends wait for METRICS_FLUSH_INTERVAL before trying to write again
+    assert caplog.text.count("Failed to save performance metrics") == 1
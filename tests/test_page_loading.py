@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+from src.methods import page_loading
+
+
+class FakePage:
+    def __init__(self, ready_after=0.0, ready=True):
+        self.ready_after = ready_after
+        self.ready = ready
+        self.calls = []
+
+    def goto(self, url, timeout=None, wait_until=None):
+        self.calls.append(("goto", wait_until))
+
+    def wait_for_function(self, script, arg=None, polling=None, timeout=None):
+        self.calls.append(("wait_for_function", arg))
+        if not self.ready:
+            raise page_loading.PlaywrightTimeoutError("Timeout exceeded")
+
+    def evaluate(self, script):
+        self.calls.append(("evaluate", script))
+
+
+def test_load_profile_page_waits_for_posts_and_sleeps_only_the_rest_of_the_dwell(monkeypatch):
+    print("Testing: Pages are ready once permalinks are stable; the dwell budget absorbs load time")
+    monitor = MagicMock()
+    monitor.record_duration.side_effect = lambda operation, duration: duration
+    monkeypatch.setattr(page_loading, "get_performance_monitor", lambda: monitor)
+    monkeypatch.setattr(page_loading.random, "uniform", lambda a, b: 3.0)
+    clock = iter([100.0, 101.0, 102.5])
+    now = [100.0]
+
+    def fake_time():
+        # Further calls (log records read the clock too) keep the last time
+        now[0] = next(clock, now[0])
+        return now[0]
+
+    monkeypatch.setattr(page_loading.time, "time", fake_time)
+    slept = []
+    monkeypatch.setattr(page_loading.time, "sleep", slept.append)
+
+    page = FakePage()
+    assert page_loading.load_profile_page(page, "https://www.threads.net/@someone")
+    assert page.calls[0] == ("goto", "domcontentloaded")
+    assert page.calls[1] == ("wait_for_function", page_loading.READY_STABLE_MS)
+    # 2.5 s of the 3 s dwell went to navigation and readiness
+    assert slept == [0.5]
+    stages = [call.args[0] for call in monitor.record_duration.call_args_list]
+    assert stages == ["page_navigate", "page_ready", "page_dwell"]
+
+    clock = iter([100.0, 101.0, 120.0])
+    slept.clear()
+    assert not page_loading.load_profile_page(FakePage(ready=False), "https://www.threads.net/@someone")
+    assert slept == [0.0]
@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+
+import pytest
+from src.methods import method_1, parsers
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "profiles"
+PROFILE_FIXTURES = sorted(path.stem for path in FIXTURES_DIR.glob("*.html"))
+
+
+def test_resolve_parser_falls_back_to_html_parser():
+    print("Testing: Parser names resolve to an installed backend")
+    assert parsers.resolve_parser("html.parser") == "html.parser"
+    assert parsers.resolve_parser("no-such-parser") == "html.parser"
+    assert parsers.resolve_parser("auto") == parsers.available_parsers()[0]
+    assert parsers.available_parsers()[-1] == "html.parser"
+
+
+@pytest.mark.parametrize("parser", parsers.PREFERRED_PARSERS)
+@pytest.mark.parametrize("fixture", PROFILE_FIXTURES)
+def test_parser_backends_extract_identical_posts(parser, fixture, monkeypatch):
+    print(f"Testing: {parser} extracts the recorded posts from {fixture}")
+    if not parsers.is_parser_available(parser):
+        pytest.skip(f"{parser} is not installed")
+    monkeypatch.setattr(parsers, "_parser", parser)
+    html = (FIXTURES_DIR / f"{fixture}.html").read_text(encoding="utf-8")
+    expected = json.loads((FIXTURES_DIR / f"{fixture}.json").read_text(encoding="utf-8"))
+    assert method_1.extract_posts(html) == expected["posts"]
+    if expected.get("stop_at_id"):
+        assert method_1.extract_posts(html, stop_at_id=expected["stop_at_id"]) == expected["posts_stop_at_third"]
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from src import performance_monitor
+from src.performance_monitor import LatencyHistogram, PerformanceMonitor, monitor_operation
+
+
+def test_latency_histogram_percentiles_within_bucket_error():
+    print("Testing: Streaming histogram estimates p50/p90/p99 within the bucket error")
+    histogram = LatencyHistogram()
+    for i in range(1, 1001):
+        histogram.record(i / 100)
+    for q, exact in ((50, 5.0), (90, 9.0), (99, 9.9)):
+        assert abs(histogram.percentile(q) - exact) / exact < 0.03
+    assert histogram.percentile(100) == 10.0
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_labels_rank_slowest_accounts_and_stages(tmp_path):
+    print("Testing: Labelled durations rank the slowest accounts and stages")
+    monitor = PerformanceMonitor(tmp_path)
+    for account, navigate, store in (("alice", 1.0, 0.5), ("bob", 8.0, 1.0), ("carol", 2.0, 6.0)):
+        with monitor.labels(account=account):
+            monitor.record_sample("stage", navigate, {"stage": "navigate"})
+            monitor.record_sample("stage", store, {"stage": "store"})
+
+    assert [account for account, _ in monitor.rank_slowest("account", "stage", by="total")] == ["bob", "carol", "alice"]
+    assert monitor.rank_slowest("stage", "stage", by="total", limit=1, account="carol")[0][0] == "store"
+    navigate = monitor.get_percentiles("stage", stage="navigate")
+    assert navigate["count"] == 3 and navigate["max"] == 8.0
+    assert monitor.get_percentiles("stage", stage="navigate", account="bob")["p50"] == 8.0
+
+    # Labels are stored with the samples
+    monitor.store.flush()
+    assert {"account": "bob", "stage": "store"} in [sample["labels"] for sample in monitor.store.samples()]
+
+
+def test_monitor_operation_labels_from_arguments(tmp_path, monkeypatch, caplog):
+    print("Testing: monitor_operation labels a call's durations from its arguments")
+    monitor = PerformanceMonitor(tmp_path)
+    monkeypatch.setattr(performance_monitor, "_performance_monitor", monitor)
+
+    @monitor_operation("fetch", labels=lambda account, **_: {"account": account})
+    def fetch(account, seconds):
+        monitor.record_sample("stage", seconds, {"stage": "navigate"})
+
+    @monitor_operation("fetch_async", labels={"engine": "async"})
+    async def fetch_async():
+        return 1
+
+    fetch("alice", seconds=3.0)
+    asyncio.run(fetch_async())
+    assert monitor.get_percentiles("fetch", account="alice")["count"] == 1
+    assert monitor.get_percentiles("stage", account="alice")["p50"] == 3.0
+    assert monitor.get_percentiles("fetch_async", engine="async")["count"] == 1
+
+    with caplog.at_level(logging.INFO):
+        monitor.log_performance_summary()
+    assert "Slowest Accounts" in caplog.text and "alice: 3.00s, mostly navigate" in caplog.text
+
+
+def test_slowest_stages_count_samples_and_distinct_accounts(tmp_path, caplog):
+    print("Testing: Slowest stages report samples and distinct accounts separately")
+    monitor = PerformanceMonitor(tmp_path)
+    with monitor.labels(account="alice"):
+        # One capture per scroll step
+        for _ in range(3):
+            monitor.record_sample("stage", 1.0, {"stage": "capture"})
+    with monitor.labels(account="bob"):
+        monitor.record_sample("stage", 2.0, {"stage": "capture"})
+
+    with caplog.at_level(logging.INFO):
+        monitor.log_performance_summary()
+    assert "over 4 samples from 2 accounts" in caplog.text
@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock
+
+from src.post_writer import BatchedPostWriter, is_row_error, is_timeout_error
+
+
+class FakeAPIError(Exception):
+    """Stands in for postgrest's APIError, which carries the SQLSTATE or PostgREST code."""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeSupabase:
+    """Records insert requests and rejects any chunk containing a bad row."""
+
+    def __init__(self, bad_ids=(), error=None):
+        self.bad_ids = set(bad_ids)
+        self.error = error or FakeAPIError("invalid input syntax for type timestamp", "22007")
+        self.requests = []
+
+    def table(self, name):
+        fake = self
+
+        class Query:
+            def insert(self, rows):
+                self.rows = rows
+                return self
+
+            def execute(self):
+                fake.requests.append([r["id"] for r in self.rows])
+                if any(r["id"] in fake.bad_ids for r in self.rows):
+                    raise fake.error
+                return MagicMock(data=self.rows)
+
+        return Query()
+
+
+def make_rows(n):
+    return [{"id": i} for i in range(n)]
+
+
+def test_writes_rows_in_multi_row_chunks():
+    print("Testing: Batched writer sends rows in chunks")
+    supabase = FakeSupabase()
+    writer = BatchedPostWriter(supabase, batch_size=10, max_batch_size=10)
+    written, failed = writer.write(make_rows(30))
+    assert len(written) == 30
+    assert failed == []
+    assert [len(r) for r in supabase.requests] == [10, 10, 10]
+
+
+def test_bisects_failing_chunk_to_isolate_bad_rows():
+    print("Testing: Batched writer bisects failing chunks")
+    supabase = FakeSupabase(bad_ids={5})
+    writer = BatchedPostWriter(supabase, batch_size=8, max_batch_size=8)
+    written, failed = writer.write(make_rows(8))
+    assert [row["id"] for row, _ in failed] == [5]
+    assert sorted(row["id"] for row in written) == [0, 1, 2, 3, 4, 6, 7]
+    # 8 -> 4 + 4 -> (4) + 2 + 2 -> 1 + 1
+    assert supabase.requests[0] == list(range(8))
+    assert [5] in supabase.requests
+
+
+def test_batch_size_grows_when_fast_and_shrinks_on_timeout():
+    print("Testing: Batched writer adapts batch size to latency and timeouts")
+    writer = BatchedPostWriter(FakeSupabase(), batch_size=4, max_batch_size=16)
+    writer.write(make_rows(4))
+    assert writer.batch_size == 8
+
+    timeout = Exception("canceling statement due to statement timeout")
+    slow = BatchedPostWriter(FakeSupabase(bad_ids={0}, error=timeout), batch_size=8)
+    slow.write(make_rows(8))
+    assert slow.batch_size < 8
+
+
+def test_is_timeout_error():
+    print("Testing: Timeout error detection")
+    error = Exception("boom")
+    error.code = "57014"
+    assert is_timeout_error(error)
+    assert is_timeout_error(TimeoutError())
+    assert not is_timeout_error(ValueError("duplicate key value"))
+
+
+def test_transport_errors_fail_the_chunk_without_bisecting():
+    print("Testing: Errors no row caused (connection, auth, 5xx) fail the chunk with one request")
+    supabase = FakeSupabase(bad_ids=set(range(100)), error=ConnectionError("Connection refused"))
+    writer = BatchedPostWriter(supabase, batch_size=50, max_batch_size=50)
+    written, failed = writer.write(make_rows(100))
+    assert written == []
+    assert len(failed) == 100
+    assert [len(r) for r in supabase.requests] == [50, 50]
+
+
+def test_is_row_error():
+    print("Testing: Row-level error detection")
+    assert is_row_error(FakeAPIError("duplicate key value", "23505"))
+    assert is_row_error(FakeAPIError("invalid input syntax", "22P02"))
+    assert is_row_error(FakeAPIError("All object keys must match", "PGRST102"))
+    assert is_row_error(Exception("canceling statement due to statement timeout"))
+    assert not is_row_error(FakeAPIError("JWT expired", "PGRST301"))
+    assert not is_row_error(FakeAPIError("permission denied for table", "42501"))
+    assert not is_row_error(ConnectionError("Connection refused"))
+    assert not is_row_error(TimeoutError("The read operation timed out"))
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+from src.browser_manager import BaseBrowserManager
+from src.performance_monitor import PerformanceMonitor
+from src.resource_policy import ResourcePolicy
+
+
+def test_resource_policy_blocks_by_type_and_pattern():
+    print("Testing: Resource policy allow/deny by type and URL pattern")
+    policy = ResourcePolicy(
+        blocked_types=["image", "font"],
+        deny_patterns=["*/ajax/bz*"],
+        allow_patterns=["*static.cdninstagram.com/rsrc.php/*.png"],
+    )
+    assert policy.should_block("image", "https://scontent.cdninstagram.com/v/avatar.jpg")
+    assert policy.should_block("xhr", "https://www.threads.net/ajax/bz?__a=1")
+    assert not policy.should_block("image", "https://static.cdninstagram.com/rsrc.php/v3/icon.png")
+    assert not policy.should_block("script", "https://static.cdninstagram.com/rsrc.php/app.js")
+    assert not policy.should_block("document", "https://www.threads.net/ajax/bz")
+    assert not ResourcePolicy().enabled
+
+
+def test_blocked_requests_are_counted(tmp_path, monkeypatch):
+    print("Testing: Blocked requests and estimated bytes saved are counted")
+    monkeypatch.chdir(tmp_path)
+    manager = BaseBrowserManager()
+    manager.performance_monitor = PerformanceMonitor()
+    manager.resource_policy = ResourcePolicy(blocked_types=["image"])
+
+    assert manager.should_block_request(MagicMock(resource_type="image", url="https://x/a.jpg"))
+    assert not manager.should_block_request(MagicMock(resource_type="script", url="https://x/a.js"))
+    counters = manager.performance_monitor.get_counters()
+    assert counters["blocked_requests"] == 1
+    assert counters["blocked_requests_image"] == 1
+    assert counters["blocked_bytes_estimated"] == ResourcePolicy.estimated_bytes("image")
+
+
+def test_blocked_url_patterns_cover_types_and_deny_patterns():
+    print("Testing: Blocking by URL only maps resource types to URL patterns")
+    policy = ResourcePolicy(blocked_types=["image", "font"], deny_patterns=["*/ajax/bz*"])
+    patterns = policy.blocked_url_patterns()
+    assert patterns[0] == "*/ajax/bz*"
+    assert "*.webp*" in patterns and "*.woff*" in patterns
+    assert not any("mp4" in pattern for pattern in patterns)
@@ -0,0 +1,311 @@
+import asyncio
+import threading
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from src import scraper
+from src.seen_index import SeenPostIndex
+from src.high_water_marks import HighWaterMarks
+from src.utils import compute_post_key
+from src.post_writer import BatchedPostWriter
+
+
+def test_scrape_accounts_concurrently_uses_one_browser_per_worker():
+    print("Testing: Concurrent scraping gives each worker its own browser manager")
+    handles = [f"user{i}" for i in range(6)]
+    seen = []
+    lock = threading.Lock()
+
+    def fake_scrape_account(supabase, account_handle, browser_manager=None, writer=None):
+        with lock:
+            seen.append((account_handle, browser_manager))
+        return 2
+
+    managers = []
+
+    def fake_browser_manager():
+        manager = MagicMock()
+        managers.append(manager)
+        return manager
+
+    with patch("src.scraper.scrape_account", side_effect=fake_scrape_account), \
+         patch("src.scraper.BrowserManager", side_effect=fake_browser_manager):
+        total = scraper.scrape_accounts_concurrently(MagicMock(), handles, workers=3)
+
+    assert total == 12
+    assert sorted(h for h, _ in seen) == sorted(handles)
+    assert len(managers) == 3
+    assert {id(m) for _, m in seen} <= {id(m) for m in managers}
+    for manager in managers:
+        manager.close.assert_called_once_with(log_summary=False)
+
+
+def test_scrape_and_store_posts_async_bounds_pages_in_flight():
+    print("Testing: Async orchestrator keeps at most SCRAPER_WORKERS pages in flight")
+    handles = [f"user{i}" for i in range(8)]
+    in_flight = 0
+    peak = 0
+
+    async def fake_scrape_account_async(supabase, account_handle, browser_manager, writer=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 1
+
+    browser_manager = MagicMock()
+    browser_manager.launch_browser = AsyncMock()
+    browser_manager.close = AsyncMock()
+
+    with patch("src.scraper.init_authenticated_client", return_value=MagicMock()), \
+         patch("src.scraper.get_trusted_sources", return_value=handles), \
+         patch("src.scraper.AsyncBrowserManager", return_value=browser_manager), \
+         patch("src.scraper.scrape_account_async", side_effect=fake_scrape_account_async), \
+         patch("src.scraper.SCRAPER_WORKERS", 3):
+        assert asyncio.run(scraper.scrape_and_store_posts_async()) is True
+
+    assert peak == 3
+    browser_manager.close.assert_awaited_once()
+
+
+def make_stream_writer():
+    writer = MagicMock()
+    writer.written = []
+
+    def write_stream(rows, on_written=None):
+        rows = list(rows)
+        writer.written.extend(rows)
+        if on_written and rows:
+            on_written(rows)
+        return len(rows), []
+
+    writer.write_stream.side_effect = write_stream
+    return writer
+
+
+def test_store_posts_dedupes_by_post_key():
+    print("Testing: store_posts checks post keys and writes only new posts")
+    supabase = MagicMock()
+    existing = MagicMock(data=[{"post_key": "old1"}, {"post_key": compute_post_key({"content": "legacy"})}])
+    supabase.table.return_value.select.return_value.eq.return_value.in_.return_value.execute.return_value = existing
+    writer = make_stream_writer()
+
+    posts = [
+        {"id": "old1", "content": "already stored"},
+        {"id": "new1", "content": "legacy"},
+        {"id": "new2", "content": "fresh", "image": "https://img"},
+        {"id": "new2", "content": "fresh", "image": "https://img"},
+    ]
+    with patch("src.scraper.SEEN_INDEX_ENABLED", False):
+        scraper.store_posts(supabase, "someone", posts, writer)
+
+    checked_keys = supabase.table.return_value.select.return_value.eq.return_value.in_.call_args[0][1]
+    assert "old1" in checked_keys and all(len(k) <= 71 for k in checked_keys)
+    written = writer.written
+    assert [row["post_key"] for row in written] == ["new2"]
+    assert written[0]["image"] == "https://img"
+
+
+def test_store_posts_skips_posts_in_seen_index(tmp_path):
+    print("Testing: store_posts only asks Supabase about posts missing from the seen-post index")
+    index = SeenPostIndex(tmp_path / "seen_posts.json")
+    index.seed("someone", ["p1", "p2"])
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.in_.return_value.execute.return_value = MagicMock(data=[])
+    writer = make_stream_writer()
+
+    posts = [{"id": "p1", "content": "one"}, {"id": "p2", "content": "two"}, {"id": "p3", "content": "three"}]
+    with patch("src.scraper.get_seen_index", return_value=index):
+        scraper.store_posts(supabase, "someone", posts, writer)
+        checked_keys = supabase.table.return_value.select.return_value.eq.return_value.in_.call_args[0][1]
+        assert "p3" in checked_keys and "p1" not in checked_keys
+        assert index.contains_any("someone", ["p3"])
+
+        # Everything is known now: no database round-trip at all
+        supabase.reset_mock()
+        scraper.store_posts(supabase, "someone", posts, writer)
+        supabase.table.assert_not_called()
+
+
+def test_failed_seen_index_rebuild_is_attempted_once_per_account(tmp_path):
+    print("Testing: A failing seen-post index rebuild is not retried for every post")
+    index = SeenPostIndex(tmp_path / "seen_posts.json")
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value.execute.side_effect = Exception("timeout")
+    supabase.table.return_value.select.return_value.eq.return_value.in_.return_value.execute.return_value = MagicMock(data=[])
+    writer = make_stream_writer()
+
+    posts = [{"id": f"p{i}", "content": f"post {i}"} for i in range(5)]
+    with patch("src.scraper.get_seen_index", return_value=index):
+        scraper.store_posts(supabase, "someone", posts, writer)
+    rebuilds = supabase.table.return_value.select.return_value.eq.return_value.order.return_value.limit.return_value.execute
+    assert rebuilds.call_count == 1
+    assert [row["post_key"] for row in writer.written] == [f"p{i}" for i in range(5)]
+
+
+def test_process_account_html_skips_unchanged_accounts(tmp_path):
+    print("Testing: Accounts with an unchanged head are skipped without parsing or storing")
+    marks = HighWaterMarks(tmp_path / "marks.json")
+    marks.update("someone", ["AAA", "BBB"], [{"id": "AAA", "datetime": "2024-06-02T00:00:00.000Z"}])
+    html = '<a href="/@someone/post/AAA"></a><a href="/@someone/post/BBB"></a>'
+
+    with patch("src.scraper.get_high_water_marks", return_value=marks), \
+         patch("src.scraper.iter_posts") as extract, \
+         patch("src.scraper.store_posts") as store:
+        assert scraper.process_account_html(MagicMock(), "someone", html) == 2
+        extract.assert_not_called()
+        store.assert_not_called()
+
+        # A new post in front: extraction stops at the stored post
+        extract.return_value = [{"id": "NEW", "datetime": "2024-06-03T00:00:00.000Z", "content": "x"}]
+        store.return_value = True
+        html = '<a href="/@someone/post/NEW"></a>' + html
+        assert scraper.process_account_html(MagicMock(), "someone", html) == 1
+        assert extract.call_args.kwargs["stop_at_id"] == "AAA"
+        assert marks.get("someone")["post_id"] == "NEW"
+
+
+def test_process_account_html_stores_posts_under_a_pinned_stored_post(tmp_path):
+    print("Testing: New posts below a pinned stored post are stored and advance the mark")
+    marks = HighWaterMarks(tmp_path / "marks.json")
+    marks.update("someone", ["PIN", "OLD"], [{"id": "PIN", "datetime": "2024-06-05T00:00:00.000Z"}])
+
+    def post(post_id, day):
+        return (f'<div data-pressable-container="true"><a href="/@someone"><span>someone</span></a>'
+                f'<a href="/@someone/post/{post_id}"><time datetime="2024-06-{day:02d}T00:00:00.000Z">x</time></a>'
+                f'<span>Body of {post_id}</span></div>')
+
+    html = "<html><body>" + post("PIN", 5) + post("NEW", 9) + post("OLD", 4) + "</body></html>"
+    stored = []
+
+    def fake_store_posts(supabase, account_handle, posts, writer=None):
+        stored.extend(p["id"] for p in posts)
+        return True
+
+    with patch("src.scraper.get_high_water_marks", return_value=marks), \
+         patch("src.scraper.store_posts", side_effect=fake_store_posts):
+        assert scraper.process_account_html(MagicMock(), "someone", html) == 1
+
+    assert stored == ["NEW"]
+    assert marks.get("someone")["post_id"] == "NEW"
+
+
+def test_scrape_accounts_pipelined_parses_in_worker_processes(tmp_path):
+    print("Testing: Pipelined scraping parses pages in worker processes and stores every account")
+    handles = ["fresh", "known", "quiet", "broken"]
+    marks = HighWaterMarks(tmp_path / "marks.json")
+    marks.update("known", ["OLD"], [{"id": "OLD", "datetime": "2024-06-01T00:00:00.000Z"}])
+    marks.update("quiet", ["QQQ"], [{"id": "QQQ", "datetime": "2024-06-01T00:00:00.000Z"}])
+
+    def page(handle, post_ids):
+        return "<html><body>" + "".join(
+            f'<div data-pressable-container="true"><a href="/@{handle}"><span>{handle}</span></a>'
+            f'<a href="/@{handle}/post/{post_id}"><time datetime="2024-06-02T00:00:00.000Z">06/02/24</time></a>'
+            f'<span>Body of {post_id}</span></div>'
+            for post_id in post_ids
+        ) + "</body></html>"
+
+    pages = {"fresh": page("fresh", ["A1", "A2"]), "known": page("known", ["NEW", "OLD", "OLDER"]), "quiet": page("quiet", ["QQQ"])}
+
+    def fake_download(url, profile_name=None, session_name=None, browser_manager=None):
+        handle = url.rsplit("@", 1)[1]
+        if handle not in pages:
+            raise RuntimeError("navigation failed")
+        return pages[handle]
+
+    stored = {}
+
+    def fake_store_account_posts(supabase, account_handle, posts, head, stop_at_id=None, writer=None):
+        stored[account_handle] = [post["id"] for post in posts]
+        return len(posts)
+
+    with patch("src.scraper.download_html_playwright", side_effect=fake_download), \
+         patch("src.scraper.BrowserManager", side_effect=lambda: MagicMock()), \
+         patch("src.scraper.get_high_water_marks", return_value=marks), \
+         patch("src.scraper.get_performance_monitor", return_value=MagicMock()), \
+         patch("src.scraper.store_account_posts", side_effect=fake_store_account_posts):
+        total = scraper.scrape_accounts_pipelined(MagicMock(), handles, workers=2, parse_processes=2)
+
+    # "quiet" is unchanged: counted without parsing or storing; "broken" fails alone
+    assert stored == {"fresh": ["A1", "A2"], "known": ["NEW"]}
+    assert total == 2 + 1 + 1
+
+
+def test_store_posts_streams_first_write_before_extraction_finishes():
+    print("Testing: Posts from a generator are written chunk by chunk while extraction continues")
+    events = []
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.in_.return_value.execute.return_value = MagicMock(data=[])
+    supabase.table.return_value.upsert.return_value.execute.side_effect = lambda: events.append("write")
+    writer = BatchedPostWriter(supabase, batch_size=2, max_batch_size=2, on_conflict="account_handle,post_key")
+
+    def posts():
+        for i in range(6):
+            events.append(f"extract{i}")
+            yield {"id": f"p{i}", "content": f"post {i}"}
+
+    with patch("src.scraper.SEEN_INDEX_ENABLED", False), \
+         patch("src.scraper.DUPLICATE_CHECK_WINDOW", 2):
+        assert scraper.store_posts(supabase, "someone", posts(), writer)
+
+    assert events.count("write") == 3
+    assert events.index("write") < events.index("extract5")
+
+
+def test_session_name_for_rotates_shared_sessions():
+    print("Testing: Accounts get their own session, or share a rotating pool of sessions")
+    with patch("src.scraper.SESSION_POOL_SIZE", 0):
+        assert scraper.session_name_for("alice") == "threads_session_alice"
+
+    monitor = MagicMock()
+    with patch("src.scraper.SESSION_POOL_SIZE", 2), \
+         patch("src.scraper._session_rotation", iter(range(3))), \
+         patch("src.scraper.get_performance_monitor", return_value=monitor):
+        names = [scraper.session_name_for(handle) for handle in ("alice", "bob", "carol")]
+    assert names == ["threads_session_shared_0", "threads_session_shared_1", "threads_session_shared_0"]
+    monitor.record_peak.assert_called_with("session_pool_size", 2)
+    assert monitor.increment_counter.call_count == 3
+
+
+def test_scrape_accounts_pipelined_parses_in_threads_once_pool_breaks():
+    print("Testing: Pipelined scraping finishes every account when the parse pool breaks")
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    handles = [f"user{i}" for i in range(6)]
+
+    def fake_download(url, profile_name=None, session_name=None, browser_manager=None):
+        handle = url.rsplit("@", 1)[1]
+        return ("<html><body><div data-pressable-container=\"true\">"
+                f"<a href=\"/@{handle}\"><span>{handle}</span></a>"
+                f"<a href=\"/@{handle}/post/P{handle}\"><time datetime=\"2024-06-02T00:00:00.000Z\">06/02/24</time></a>"
+                f"<span>Body</span></div></body></html>")
+
+    # The first page is lost with a dying parse process, then the pool refuses new work
+    lost = Future()
+    lost.set_exception(BrokenProcessPool("a parse process died"))
+    pool = MagicMock()
+    pool.submit.side_effect = [lost] + [BrokenProcessPool("pool is broken")] * 10
+    pool.__enter__.return_value = pool
+
+    stored = {}
+
+    def fake_store_account_posts(supabase, account_handle, posts, head, stop_at_id=None, writer=None):
+        stored[account_handle] = [post["id"] for post in posts]
+        return len(posts)
+
+    result = {}
+    with patch("src.scraper.download_html_playwright", side_effect=fake_download), \
+         patch("src.scraper.BrowserManager", side_effect=lambda: MagicMock()), \
+         patch("src.scraper.INCREMENTAL_SCRAPING", False), \
+         patch("src.scraper.create_parse_pool", return_value=pool), \
+         patch("src.scraper.get_performance_monitor", return_value=MagicMock()), \
+         patch("src.scraper.store_account_posts", side_effect=fake_store_account_posts):
+        run = threading.Thread(target=lambda: result.update(
+            total=scraper.scrape_accounts_pipelined(MagicMock(), handles, workers=2, parse_processes=1)), daemon=True)
+        run.start()
+        run.join(timeout=30)
+
+    assert not run.is_alive(), "pipelined scraping hung on the broken parse pool"
+    assert result["total"] == len(handles)
+    assert sorted(stored) == sorted(handles)
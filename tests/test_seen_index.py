@@ -0,0 +1,33 @@
+from src.seen_index import SeenPostIndex
+
+
+def test_seen_index_persists_and_evicts(tmp_path):
+    print("Testing: Seen-post index persistence and bounded eviction")
+    path = tmp_path / "seen_posts.json"
+    index = SeenPostIndex(path, max_keys_per_account=3, max_accounts=2)
+    assert not index.has_account("alice")
+
+    index.seed("alice", ["a1", "a2"])
+    index.add("alice", ["a3", "a4"])
+    assert not index.contains_any("alice", ["a1"])  # evicted, oldest key
+    assert index.contains_any("alice", ["zz", "a4"])
+
+    index.seed("bob", [])
+    index.seed("carol", ["c1"])
+    assert not index.has_account("alice")  # least recently used account evicted
+    index.save()
+
+    reloaded = SeenPostIndex(path, max_keys_per_account=3, max_accounts=2)
+    assert reloaded.has_account("bob")
+    assert reloaded.contains_any("carol", ["c1"])
+
+
+def test_seen_index_starts_empty_when_corrupt(tmp_path):
+    print("Testing: Corrupt seen-post index is discarded and rebuilt")
+    path = tmp_path / "seen_posts.json"
+    path.write_text("{not json")
+    index = SeenPostIndex(path)
+    assert not index.has_account("alice")
+    index.seed("alice", ["a1"])
+    index.save()
+    assert SeenPostIndex(path).contains_any("alice", ["a1"])
@@ -0,0 +1,36 @@
+import json
+
+from src.session_store import SessionStore
+
+STATE = {"cookies": [{"name": "sessionid", "value": "abc", "domain": ".threads.net", "path": "/"}], "origins": []}
+
+
+def test_session_store_writes_only_changed_sessions(tmp_path):
+    print("Testing: Session store keeps sessions in memory and writes only changed ones")
+    store = SessionStore(tmp_path)
+    assert store.get("alice") is None
+
+    assert store.put("alice", STATE)
+    assert not (tmp_path / "alice.json").exists()
+    assert store.save() == 1
+    # Same state again: nothing to write
+    assert not store.put("alice", json.loads(json.dumps(STATE)))
+    assert store.save() == 0
+
+    data = json.loads((tmp_path / "alice.json").read_text())
+    # Cookies are only stored inside the storage state
+    assert "cookies" not in data
+    assert data["storage_state"] == STATE
+    assert not list(tmp_path.glob("*.tmp"))
+    assert SessionStore(tmp_path).get("alice") == STATE
+
+
+def test_session_store_reads_legacy_files(tmp_path):
+    print("Testing: Session files with a separate cookies copy are still restored")
+    legacy = {"cookies": STATE["cookies"], "storage_state": STATE, "timestamp": "0"}
+    (tmp_path / "bob.json").write_text(json.dumps(legacy))
+    (tmp_path / "carol.json").write_text("{not json")
+    store = SessionStore(tmp_path)
+    assert store.get("bob") == STATE
+    assert not store.put("bob", STATE)
+    assert store.get("carol") is None
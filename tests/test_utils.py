@@ -1,7 +1,7 @@
 import os
 import tempfile
 import json
-from src.utils import load_json, save_json, deduplicate_posts, sort_posts_newest_first
+from src.utils import load_json, save_json, deduplicate_posts, sort_posts_newest_first, compute_post_key, post_lookup_keys, iter_until_known
 
 def test_load_and_save_json():
     print("Testing: JSON file operations")
@@ -30,3 +30,25 @@ def test_sort_posts_newest_first():
     ]
     sorted_posts = sort_posts_newest_first(posts)
     assert sorted_posts[0]["content"] == "B"
+
+def test_compute_post_key_prefers_post_id():
+    print("Testing: Post keys use the Threads post ID or a content hash")
+    assert compute_post_key({"id": "C1a2B3", "content": "A"}) == "C1a2B3"
+    key = compute_post_key({"content": "A" * 10000})
+    assert key.startswith("sha256:") and len(key) == len("sha256:") + 64
+    assert compute_post_key({"content": "A"}) == compute_post_key({"id": None, "content": "A"})
+    assert post_lookup_keys({"id": "C1a2B3", "content": "A"}) == ["C1a2B3", compute_post_key({"content": "A"})]
+
+
+def test_iter_until_known_skips_pinned_stored_post():
+    print("Testing: Streams stop at the stored post unless it is pinned above newer posts")
+    def post(post_id, day):
+        return {"id": post_id, "datetime": f"2024-06-{day:02d}T00:00:00"}
+
+    feed = [post("P", 5), post("QUOTED", 1), post("R", 9), post("S", 7), post("O", 4)]
+    ids = lambda posts: [p["id"] for p in posts]
+    is_quote = lambda p: p["id"] == "QUOTED"
+    assert ids(iter_until_known(feed, "P", is_quote)) == ["R", "S"]
+    assert ids(iter_until_known([post("P", 5), post("O", 4)], "P")) == []
+    assert ids(iter_until_known(feed, "S", is_quote)) == ["P", "QUOTED", "R"]
+    assert ids(iter_until_known(feed, None)) == ["P", "QUOTED", "R", "S", "O"]
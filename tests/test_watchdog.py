@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src import watchdog
+from src.performance_monitor import PerformanceMonitor
+from src.async_browser_manager import AsyncBrowserManager
+from src.scraper import run_with_browser_recovery, run_with_browser_recovery_async
+from src.watchdog import StageTimeout, StageWatchdog
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor = PerformanceMonitor()
+    monkeypatch.setattr(watchdog, "get_performance_monitor", lambda: monitor)
+    return monitor
+
+
+def test_hung_browser_stage_is_killed_and_raises(monitor):
+    print("Testing: A browser stage past its deadline calls the guard's callback and raises StageTimeout")
+    dog = StageWatchdog({"navigate": 0.05}, interval=0.01)
+    killed = threading.Event()
+
+    def blocked_call():
+        # Stands in for a Playwright call that only returns once the browser is killed
+        assert killed.wait(timeout=5)
+        raise RuntimeError("Target page, context or browser has been closed")
+
+    with pytest.raises(StageTimeout):
+        with dog.guard(killed.set):
+            with dog.stage("navigate"):
+                blocked_call()
+    assert monitor.get_counters()["stage_timeouts_navigate"] == 1
+
+
+def test_stages_within_deadline_and_non_browser_overruns_do_not_raise(monitor):
+    print("Testing: Parse/store overruns are only reported; stages without a deadline are not watched")
+    dog = StageWatchdog({"navigate": 5, "store": 0.05, "parse": 0}, interval=0.01)
+    on_expire = MagicMock()
+    with dog.guard(on_expire):
+        with dog.stage("navigate"):
+            pass
+        with dog.stage("store"):
+            time.sleep(0.2)
+        with dog.stage("parse"):
+            pass
+    on_expire.assert_not_called()
+    assert monitor.get_counters() == {"stage_timeouts_store": 1}
+    assert not dog._stages
+
+
+def test_account_is_retried_once_in_a_relaunched_browser(tmp_path, monkeypatch):
+    print("Testing: A crashed or hung browser is relaunched and only the affected account retried")
+    monkeypatch.chdir(tmp_path)
+    browser_manager = MagicMock()
+    browser_manager.recover_browser.return_value = True
+    scrape = MagicMock(side_effect=[StageTimeout("navigate stage exceeded its 75s deadline"), 7])
+
+    assert run_with_browser_recovery("someone", browser_manager, scrape) == 7
+    browser_manager.recover_browser.assert_called_once_with(force=True)
+
+    # Failures the browser did not cause are not retried
+    browser_manager.recover_browser.reset_mock()
+    browser_manager.recover_browser.return_value = False
+    with pytest.raises(ValueError):
+        run_with_browser_recovery("someone", browser_manager, MagicMock(side_effect=ValueError("bad row")))
+    browser_manager.recover_browser.assert_called_once_with(force=False)
+
+    # A second failure in the relaunched browser gives up on the account
+    browser_manager.recover_browser.return_value = True
+    scrape = MagicMock(side_effect=RuntimeError("Browser closed"))
+    with pytest.raises(RuntimeError):
+        run_with_browser_recovery("someone", browser_manager, scrape)
+    assert scrape.call_count == 2
+
+
+def test_hung_async_browser_stage_is_cancelled_and_raises(monitor):
+    print("Testing: An async browser stage past its deadline is cancelled and raises StageTimeout")
+    dog = StageWatchdog({"navigate": 0.05, "settle": 5}, interval=0.01)
+
+    async def run():
+        with pytest.raises(StageTimeout):
+            async with dog.async_stage("navigate"):
+                # Stands in for an await on a hung page
+                await asyncio.sleep(5)
+        # Within its deadline, and the task is usable again after the timeout
+        async with dog.async_stage("settle"):
+            await asyncio.sleep(0)
+
+    asyncio.run(asyncio.wait_for(run(), timeout=2))
+    assert monitor.get_counters()["stage_timeouts_navigate"] == 1
+    assert monitor.get_percentiles("stage", stage="navigate", outcome="timeout")["count"] == 1
+    assert monitor.get_percentiles("stage", stage="settle", outcome="ok")["count"] == 1
+
+
+def test_async_account_is_retried_once_after_a_browser_crash(tmp_path, monkeypatch):
+    print("Testing: The async engine relaunches a crashed browser once for all accounts on it and retries them")
+    monkeypatch.chdir(tmp_path)
+    manager = AsyncBrowserManager()
+    crashed = MagicMock()
+    crashed.is_connected.return_value = False
+    crashed.close = AsyncMock()
+    manager.browser = crashed
+
+    async def relaunch():
+        manager.browser = MagicMock()
+    manager.launch_browser = AsyncMock(side_effect=relaunch)
+
+    async def run():
+        attempts = {"alice": 0, "bob": 0}
+
+        def scrape(account):
+            async def once():
+                attempts[account] += 1
+                if manager.browser is crashed:
+                    await asyncio.sleep(0)
+                    raise RuntimeError("Browser closed")
+                return 3
+            return once
+
+        results = await asyncio.gather(*(run_with_browser_recovery_async(account, manager, scrape(account))
+                                         for account in attempts))
+        return results, attempts
+
+    results, attempts = asyncio.run(run())
+    assert results == [3, 3]
+    assert attempts == {"alice": 2, "bob": 2}
+    manager.launch_browser.assert_awaited_once()
+
+    # A failure on a browser that is still connected is not retried
+    manager.browser.is_connected.return_value = True
+    with pytest.raises(ValueError):
+        asyncio.run(run_with_browser_recovery_async("alice", manager, AsyncMock(side_effect=ValueError("bad row"))))
+    manager.launch_browser.assert_awaited_once()